@@ -1,28 +1,28 @@
-import pyodbc
-from pyodbc import Connection
-import pandas as pd
-
-def connect():
-    # Some other example server values are
-    # server = 'localhost\sqlexpress' # for a named instance
-    # server = 'myserver,port' # to specify an alternate port
-    server = 'HIPLI-XASDO' 
-    database = 'Boaz' 
-    #username = 'myusername' 
-    #password = 'mypassword' 
+from app.data.backend import SqlServerBackend
+from app.data.connection_pool import ConnectionPool
+from app.data.terms import iter_term_chunks
+
+# Some other example server values are
+# server = 'localhost\sqlexpress' # for a named instance
+# server = 'myserver,port' # to specify an alternate port
+# For SQL Server authentication, pass username and password to SqlServerBackend.
+SERVER = 'HIPLI-XASDO'
+DATABASE = 'Boaz'
+
+
+def connect() -> ConnectionPool:
     # ENCRYPT defaults to yes starting in ODBC Driver 18. It's good to always specify ENCRYPT=yes on the client side to avoid MITM attacks.
-    #cnxn = pyodbc.connect('DRIVER={ODBC Driver 18 for SQL Server};SERVER='+server+';DATABASE='+database+';ENCRYPT=yes;UID='+username+';PWD='+ password)
-    connection = pyodbc.connect(f"DRIVER={{ODBC Driver 18 for SQL Server}};SERVER={server};DATABASE={database};ENCRYPT=no;Trusted_Connection=yes")
-    return connection
+    return ConnectionPool(SqlServerBackend(SERVER, DATABASE, encrypt=False))
 
-def query1(connection: Connection):
-    df = pd.read_sql_query('SELECT * FROM AF_Terms', connection)
-    print(df)
+def query1(pool: ConnectionPool, chunksize: int = 1000):
+    # Streams AF_Terms in chunks rather than loading the whole table at once.
+    for chunk in iter_term_chunks(pool, chunksize):
+        for row in chunk:
+            print(row)
 
 
 
 if __name__ == "__main__":
 
-    connection = connect()
-    query1(connection)
-    x = 1
\ No newline at end of file
+    with connect() as pool:
+        query1(pool)
@@ -0,0 +1,61 @@
+import sqlite3
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+class Backend(ABC):
+    """
+    A database the data layer can read from. Backends only open connections (DB-API 2.0);
+    pooling and streaming are the same for all of them (see ConnectionPool and iter_terms).
+    """
+
+    @abstractmethod
+    def connect(self) -> Any:
+        """
+        Opens a new connection to the database.
+
+        Returns:
+            Any: The (DB-API 2.0) connection.
+        """
+
+
+class SqlServerBackend(Backend):
+    """
+    SQL Server, through pyodbc, which is only imported when a connection is opened.
+    """
+
+    def __init__(self, server: str, database: str, driver: str = "ODBC Driver 18 for SQL Server", encrypt: bool = False,
+                 username: Optional[str] = None, password: Optional[str] = None):
+        # server may name an instance ('localhost\sqlexpress') or a port ('myserver,port').
+        self.server = server
+        self.database = database
+        self.driver = driver
+        self.encrypt = encrypt  # ENCRYPT defaults to yes starting in ODBC Driver 18.
+        self.username = username  # Without a username, the connection is trusted (Windows authentication).
+        self.password = password
+
+    def connection_string(self) -> str:
+        connection_string = f"DRIVER={{{self.driver}}};SERVER={self.server};DATABASE={self.database};ENCRYPT={'yes' if self.encrypt else 'no'};"
+        if self.username is None:
+            return connection_string + "Trusted_Connection=yes"
+        return connection_string + f"UID={self.username};PWD={self.password}"
+
+    def connect(self) -> Any:
+        try:
+            import pyodbc
+        except ImportError as error:
+            raise ImportError("The SQL Server backend needs pyodbc: pip install pyodbc.") from error
+        return pyodbc.connect(self.connection_string())
+
+
+class SqliteBackend(Backend):
+    """
+    SQLite, for local and offline runs (":memory:" databases are not shared between connections).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self) -> Any:
+        # Pooled connections may be handed to another thread than the one that opened them.
+        return sqlite3.connect(self.path, check_same_thread=False)
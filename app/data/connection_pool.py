@@ -0,0 +1,111 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from queue import Empty
+from threading import Condition
+from typing import Any, Iterator, Optional
+from app.data.backend import Backend
+
+
+class ConnectionPool:
+    """
+    Connections to a backend, opened on demand up to a maximum and reused, rather than opened for every query.
+    """
+
+    def __init__(self, backend: Backend, size: int = 4):
+        if size < 1:
+            raise ValueError(f"The pool size must be at least 1, not {size}.")
+        self.backend = backend
+        self.size = size  # Maximum number of connections open at once.
+        self._idle = deque()  # Open connections not in use.
+        self._opened = 0  # Connections open, idle or lent.
+        self._closed = False
+        self._condition = Condition()  # Guards the above, and wakes borrowers when a connection is given back or a slot frees up.
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Lends a connection of the pool: an idle one, else a new one if the pool is not full, else waits for one to be given back
+        (or for a slot to free up, when a lent connection fails and is closed).
+        The connection goes back to the pool afterwards (rolled back if the block raised); a connection that fails is closed.
+
+        Args:
+            timeout (Optional[float]): The time in seconds to wait for a connection when the pool is full, if any.
+
+        Raises:
+            ValueError: Raised if the pool is closed.
+            queue.Empty: Raised if no connection was given back within the timeout.
+
+        Yields:
+            Any: The (DB-API 2.0) connection.
+        """
+        connection = self._acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+            except Exception:
+                self._discard(connection)
+                raise
+            self._release(connection)
+            raise
+        self._release(connection)
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ValueError("The connection pool is closed.")
+                if self._idle:
+                    return self._idle.popleft()
+                if self._opened < self.size:
+                    self._opened += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise Empty
+                self._condition.wait(remaining)
+        try:
+            return self.backend.connect()
+        except BaseException:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, connection: Any):
+        with self._condition:
+            if not self._closed:
+                self._idle.append(connection)
+                self._condition.notify()
+                return
+        self._discard(connection)
+
+    def _discard(self, connection: Any):
+        with self._condition:
+            self._opened -= 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass  # The connection is dropped either way.
+
+    def close(self):
+        """
+        Closes the idle connections, and the lent ones as they are given back. The pool lends no more connections.
+        """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()  # Waiting borrowers get the error.
+        for connection in idle:
+            self._discard(connection)
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
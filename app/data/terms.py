@@ -0,0 +1,84 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from app.data.connection_pool import ConnectionPool
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")  # Table and column names are written into the query, so only plain names are allowed.
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"'{name}' is not a plain table or column name.")
+    return name
+
+
+def iter_term_chunks(pool: ConnectionPool, chunksize: int = 1000, table: str = "AF_Terms",
+                     columns: Optional[Sequence[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Streams the rows of the terms table in chunks, so that memory stays flat however big the table is.
+    A pooled connection is held until the generator is exhausted or closed.
+
+    Args:
+        pool (ConnectionPool): The pool to take the connection from.
+        chunksize (int): The number of rows fetched at a time.
+        table (str): The name of the terms table.
+        columns (Optional[Sequence[str]]): The columns to read (default: all).
+
+    Raises:
+        ValueError: Raised if the chunk size is not positive, or a table or column name is not a plain name.
+
+    Yields:
+        List[Dict[str, Any]]: The rows of each chunk, as dicts by column name.
+    """
+    if chunksize < 1:
+        raise ValueError(f"The chunk size must be at least 1, not {chunksize}.")
+    selected = "*" if columns is None else ", ".join(_identifier(column) for column in columns)
+    query = f"SELECT {selected} FROM {_identifier(table)}"
+
+    with pool.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query)
+            names = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+                yield [dict(zip(names, row)) for row in rows]
+        finally:
+            cursor.close()
+
+
+def iter_terms(pool: ConnectionPool, chunksize: int = 1000, table: str = "AF_Terms",
+               columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the rows of the terms table one at a time, fetched in chunks (see iter_term_chunks).
+
+    Args:
+        pool (ConnectionPool): The pool to take the connection from.
+        chunksize (int): The number of rows fetched at a time.
+        table (str): The name of the terms table.
+        columns (Optional[Sequence[str]]): The columns to read (default: all).
+
+    Yields:
+        Dict[str, Any]: The rows, as dicts by column name.
+    """
+    for chunk in iter_term_chunks(pool, chunksize, table, columns):
+        yield from chunk
+
+
+def iter_column(pool: ConnectionPool, column: str, chunksize: int = 1000, table: str = "AF_Terms") -> Iterator[Any]:
+    """
+    Streams the values of one column of the terms table, such as the texts to hand to batch_service.run_machine_batch.
+
+    Args:
+        pool (ConnectionPool): The pool to take the connection from.
+        column (str): The name of the column.
+        chunksize (int): The number of rows fetched at a time.
+        table (str): The name of the terms table.
+
+    Yields:
+        Any: The values of the column.
+    """
+    for chunk in iter_term_chunks(pool, chunksize, table, [column]):
+        for row in chunk:
+            yield row[column]
@@ -1,8 +1,184 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+
+# Consonants (final forms included), in the SBL academic style. Shin is š unless it bears the sin dot.
+_CONSONANTS = {
+    "א": "ʾ", "ב": "b", "ג": "g", "ד": "d", "ה": "h", "ו": "w", "ז": "z", "ח": "ḥ", "ט": "ṭ", "י": "y",
+    "כ": "k", "ך": "k", "ל": "l", "מ": "m", "ם": "m", "נ": "n", "ן": "n", "ס": "s", "ע": "ʿ",
+    "פ": "p", "ף": "p", "צ": "ṣ", "ץ": "ṣ", "ק": "q", "ר": "r", "ש": "š", "ת": "t",
+}
+
+_SHEWA = "\u05B0"
+_HIREQ = "\u05B4"
+_TSERE = "\u05B5"
+_SEGOL = "\u05B6"
+_PATAH = "\u05B7"
+_QAMETS = "\u05B8"
+_HOLAM = "\u05B9"
+_DAGESH = "\u05BC"  # Also the mappiq of a final he, and the dot of the shureq.
+_SHIN_DOT = "\u05C1"
+_SIN_DOT = "\u05C2"
+
+# Vowel points. The shewa is vocal or silent depending on its context (see _shewa_is_vocal).
+_VOWELS = {
+    _SHEWA: "ə", "\u05B1": "ĕ", "\u05B2": "ă", "\u05B3": "ŏ", _HIREQ: "i", _TSERE: "ē", _SEGOL: "e", _PATAH: "a",
+    _QAMETS: "ā", _HOLAM: "ō", "\u05BA": "ō", "\u05BB": "u", "\u05C7": "o",
+}
+_LONG_VOWELS = frozenset("āēōîêûôâ")
+_REDUCED_VOWELS = frozenset("ĕăŏə")
+
+# Vowels written with a vowel letter (mater lectionis) after them.
+_YOD_MATRES = {_HIREQ: "î", _TSERE: "ê", _SEGOL: "ê"}
+_HE_MATRES = {_QAMETS: "â", _TSERE: "ê", _SEGOL: "ê", _HOLAM: "ô"}
+
+_GUTTURALS = frozenset("חע")  # With the mappiq he, the final consonants that take a furtive patah.
+
+# Marks with no bearing on the transliteration: cantillation, meteg, rafe, upper and lower dots, nun hafukha.
+_IGNORED_MARKS = dict.fromkeys(
+    [*range(0x0591, 0x05B0), 0x05BD, 0x05BF, 0x05C4, 0x05C5, 0x05C6],
+    None,
+)
+
+# Punctuation between words: maqaf, paseq, sof pasuq, geresh, gershayim.
+_PUNCTUATION = str.maketrans({"\u05BE": "-", "\u05C0": "|", "\u05C3": ".", "\u05F3": "'", "\u05F4": '"'})
+
+# Runs of Hebrew letters and marks (presentation forms included), that is, words.
+_WORD = re.compile("([\u0591-\u05BD\u05BF-\u05C2\u05C4-\u05C7\u05D0-\u05EA\uFB1D-\uFB4F]+)")
+
+
+class _Cluster:
+    """
+    A consonant with its marks, whatever order the marks were written in.
+    """
+    __slots__ = ("letter", "dagesh", "sin", "vowel")
+
+    def __init__(self, letter: str):
+        self.letter = letter
+        self.dagesh = False
+        self.sin = False
+        self.vowel: Optional[str] = None  # The vowel point, if any.
+
+    def is_bare(self, letter: str) -> bool:
+        # True if the cluster is the letter with no marks, as vowel letters are written.
+        return self.letter == letter and self.vowel is None and not self.dagesh
+
+
+def _clusters(word: str) -> List[_Cluster]:
+    # Normalises the word (presentation forms decomposed, ignored marks dropped), then groups each consonant with its marks.
+    clusters = []
+    for character in unicodedata.normalize("NFD", word).translate(_IGNORED_MARKS):
+        if character in _CONSONANTS:
+            clusters.append(_Cluster(character))
+        elif not clusters:
+            continue  # A mark with no consonant to bear it.
+        elif character == _DAGESH:
+            clusters[-1].dagesh = True
+        elif character == _SIN_DOT:
+            clusters[-1].sin = True
+        elif character in _VOWELS:
+            clusters[-1].vowel = character
+    return clusters
+
+
+def _shewa_is_vocal(clusters: List[_Cluster], index: int, doubled: bool, previous: Optional[str], previous_silent: bool) -> bool:
+    """
+    Tells a vocal shewa from a silent one, by the usual rules.
+
+    Args:
+        clusters (List[_Cluster]): The clusters of the word.
+        index (int): The index of the cluster bearing the shewa.
+        doubled (bool): True if the consonant is doubled (dagesh forte).
+        previous (Optional[str]): The vowel of the preceding syllable, as transliterated, if any.
+        previous_silent (bool): True if the preceding consonant bears a silent shewa.
+
+    Returns:
+        bool: True if the shewa is vocal.
+    """
+    if index == len(clusters) - 1:
+        return False  # Word-final.
+    if index == 0 or doubled:
+        return True
+    following = clusters[index + 1]
+    if following.vowel == _SHEWA:
+        return False  # The first of two shewas closes the syllable.
+    if previous_silent or following.letter == clusters[index].letter:
+        return True
+    return previous in _LONG_VOWELS
+
+
+@lru_cache(maxsize=65536)
+def _transliterate_word(word: str) -> str:
+    """
+    Transliterates a single word, in one pass over its consonants, each rule looking only at the neighbouring consonants.
+
+    Args:
+        word (str): The Hebrew word, with any marks.
+
+    Returns:
+        str: The transliterated word.
+    """
+    clusters = _clusters(word)
+    last = len(clusters) - 1
+    parts = []
+    previous = None  # The vowel of the preceding consonant, as transliterated, if it has one.
+    previous_silent = False  # True if the preceding consonant bears a silent shewa.
+    index = 0
+    while index <= last:
+        cluster = clusters[index]
+        letter = cluster.letter
+        vowel = cluster.vowel
+
+        # Vav as a vowel: shureq (with the dot, after a consonant with no vowel or at the start) or holam male.
+        if letter == "ו" and previous is None and not previous_silent:
+            if cluster.dagesh and vowel is None:
+                parts.append("û")
+                previous, previous_silent, index = "û", False, index + 1
+                continue
+            if vowel == _HOLAM and not cluster.dagesh and index > 0:
+                parts.append("ô")
+                previous, previous_silent, index = "ô", False, index + 1
+                continue
+
+        consonant = "ś" if cluster.sin else _CONSONANTS[letter]
+        if letter == "ה" and cluster.dagesh and index == last:
+            doubled = False  # Mappiq: the he is a consonant, not a vowel letter.
+        else:
+            # Dagesh forte after a vowel, else dagesh lene (or no dagesh), which does not double the consonant.
+            doubled = cluster.dagesh and previous is not None and previous not in _REDUCED_VOWELS
+
+        if vowel is None:
+            transliterated = ""
+        elif vowel == _SHEWA:
+            transliterated = "ə" if _shewa_is_vocal(clusters, index, doubled, previous, previous_silent) else ""
+        elif vowel == _PATAH and index == last and index > 0 and (letter in _GUTTURALS or (letter == "ה" and cluster.dagesh)):
+            parts.append("a")  # Furtive patah, pronounced before its consonant.
+            transliterated = ""
+        else:
+            transliterated = _VOWELS[vowel]
+            following = clusters[index + 1] if index < last else None
+            if following is not None:
+                if vowel in _YOD_MATRES and following.is_bare("י"):
+                    transliterated = _YOD_MATRES[vowel]
+                    index += 1
+                elif vowel in _HE_MATRES and index + 1 == last and following.is_bare("ה"):
+                    transliterated = _HE_MATRES[vowel]
+                    index += 1
+
+        parts.append(consonant + consonant if doubled else consonant)
+        parts.append(transliterated)
+        previous_silent = vowel == _SHEWA and not transliterated
+        previous = transliterated or None
+        index += 1
+    return "".join(parts)
 
 
 def transliterate(text: str) -> str:
     """
     Transliterates an input string of Hebrew into a scientific transliteration schema (cf. SBL).
+    Marks may come in any order, and presentation forms are decomposed; cantillation is dropped.
+    Other characters (spaces, punctuation, Latin text) are kept as they are.
 
     Args:
         text (str): The string of input Hebrew characters.
@@ -10,4 +186,25 @@ def transliterate(text: str) -> str:
     Returns:
         str: The transliterated string corresponding to the Hebrew characters.
     """
-    
\ No newline at end of file
+    pieces = _WORD.split(text)
+    # Split on a capturing group, the words are at the odd indexes, between the runs of other characters.
+    for index in range(1, len(pieces), 2):
+        pieces[index] = _transliterate_word(pieces[index])
+    for index in range(0, len(pieces), 2):
+        pieces[index] = pieces[index].translate(_PUNCTUATION)
+    return "".join(pieces)
+
+
+def transliterate_many(texts: Iterable[str]) -> Iterator[str]:
+    """
+    Transliterates a stream of texts, such as the lines of a corpus file opened in text mode, one at a time.
+    Words are transliterated once and cached, since corpora repeat most of their words.
+
+    Args:
+        texts (Iterable[str]): The texts (or lines) to transliterate.
+
+    Yields:
+        str: The transliteration of each text, in order. Line endings are kept.
+    """
+    for text in texts:
+        yield transliterate(text)
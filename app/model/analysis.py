@@ -0,0 +1,9 @@
+from typing import Any, NamedTuple, Tuple
+
+
+class Analysis(NamedTuple):
+    # Compact result of one end trail: cheap to pickle, cache or store, unlike the Situation chain.
+    states: Tuple[str, ...]  # Names of the states of the trail, from the start through the end.
+    transitions: Tuple[str, ...]  # Names of the transitions taken.
+    spans: Tuple[Tuple[int, int], ...]  # (start, end) offsets in the input of the match of each transition taken.
+    data: Any  # Data of the end situation.
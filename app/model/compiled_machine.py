@@ -0,0 +1,51 @@
+from re import Pattern
+from typing import Callable, FrozenSet, Mapping, NamedTuple, Optional, Tuple
+from app.model.lexicon import Lexicon
+from app.model.state import State
+from app.model.transition import Transition
+
+
+class CompiledTransition(NamedTuple):
+    name: str  # Unique.
+    position: int  # Position among the transitions of the source state.
+    pattern: str
+    regex: Optional[Pattern]  # The pattern, compiled once when the machine is created. None for literals, which are matched as strings.
+    source: int  # Index of the source state in CompiledMachine.states.
+    target: int  # Index of the destination state in CompiledMachine.states.
+    transform: Optional[Callable]
+    pure: bool  # True if there is no transform, or it is declared pure.
+    literal: bool  # True if the pattern is a plain string (see pattern_service.is_literal).
+    min_width: int  # Minimum length of a match.
+    max_width: Optional[int]  # Maximum length of a match, None if unbounded.
+    looks_back: bool  # True if the pattern must be matched on the remainder rather than at an offset (see pattern_service.looks_back).
+    transition: Transition  # The declared transition, as handed to transform(Situation, Transition).
+    lexicon: Optional[Lexicon] = None  # The terms matched in place of the pattern (see Transition.lexicon).
+    cost: float = 0.0  # Cost of the transition plus that of its destination state.
+
+
+class CompiledState(NamedTuple):
+    index: int  # Position in CompiledMachine.states.
+    name: str
+    start: bool
+    end: bool
+    transitions: Tuple[CompiledTransition, ...]  # Outgoing transitions, in declaration order.
+    dispatch: Mapping[str, Tuple[CompiledTransition, ...]]  # Maps a first character to the transitions whose match can start with it.
+    always: Tuple[CompiledTransition, ...]  # Transitions tried whatever the next character: empty patterns, wildcards, ...
+    literals: Mapping[str, Tuple[CompiledTransition, ...]]  # Fused index of the literal transitions of states with many of them, by pattern.
+    literal_lengths: Tuple[int, ...]  # The lengths of the patterns in literals, ascending.
+    epsilon: Tuple[CompiledTransition, ...]  # Transitions with an empty pattern, taken without matching.
+    closure: FrozenSet[int]  # Indexes of the states reachable through empty patterns only, this one included.
+    live: bool  # True if some trail leads from this state to an end state.
+    min_remaining: int  # Least input that trails from this state consume to reach an end state (0 if not live).
+    max_remaining: Optional[int]  # Most input they can consume, None if unbounded (or not live).
+    transform_free: bool  # True if no trail from this state runs a transform.
+    pure: bool  # True if every transform on the trails from this state is pure.
+    state: State  # The declared state, shared (read-only) by every visit.
+
+
+class CompiledMachine(NamedTuple):
+    # Read-only runtime form of a Machine, built once by create_machine and shared by all situations.
+    states: Tuple[CompiledState, ...]
+    state_index: Mapping[str, int]  # Maps state name to its index in states.
+    start: int  # Index of the start state.
+    literal: bool  # True if every pattern is a literal, so that recognition can run as a DFA.
@@ -0,0 +1,101 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+
+
+class ForestNode:
+    """
+    One item of the chart: a state at an input offset (and, where transforms need it, matched text and data).
+    Only the first record arriving at the item is expanded; every arrival is kept, since each one is a distinct trail.
+    """
+    __slots__ = ("record", "arrivals")
+
+    def __init__(self, record: SituationRecord):
+        self.record = record  # The record expanded for the item. Later arrivals have the same future.
+        self.arrivals = [record]  # Every record arriving at the item, each one's parent being the record of another node.
+
+
+class Forest:
+    """
+    Packed forest of the end trails found by a chart search.
+    Trails share their nodes, so the forest stays polynomial in the input even when the number of trails is not.
+    """
+
+    def __init__(self, start_situation: Situation, nodes: Dict[SituationRecord, ForestNode], ends: List[ForestNode]):
+        self.start_situation = start_situation
+        self.nodes = nodes  # Maps the expanded record of each node to the node.
+        self.ends = ends  # The nodes at an end state with no more input.
+
+    def count(self) -> int:
+        """
+        Counts the end trails packed in the forest, without enumerating them.
+
+        Returns:
+            int: The number of end trails.
+        """
+        counts: Dict[ForestNode, int] = dict()
+        total = 0
+        for end in self.ends:
+            # Depth-first, post-order: a node is counted once the nodes of all its arrivals' parents are.
+            stack = [end]
+            while stack:
+                node = stack[-1]
+                if node in counts:
+                    stack.pop()
+                    continue
+                missing = [self.nodes[arrival.parent] for arrival in node.arrivals
+                           if arrival.parent is not None and self.nodes[arrival.parent] not in counts]
+                if missing:
+                    stack.extend(missing)
+                    continue
+                stack.pop()
+                counts[node] = sum(1 if arrival.parent is None else counts[self.nodes[arrival.parent]] for arrival in node.arrivals)
+            total += counts[end]
+        return total
+
+    def trails(self) -> Iterator[List[SituationRecord]]:
+        """
+        Enumerates the end trails lazily, as lists of records from the start through the end.
+
+        Yields:
+            List[SituationRecord]: The records of one end trail.
+        """
+        for end in self.ends:
+            # Each stack item is an arrival to follow back, with the trail (a linked list) after it.
+            stack: List[Tuple[SituationRecord, Optional[tuple]]] = [(arrival, None) for arrival in reversed(end.arrivals)]
+            while stack:
+                record, after = stack.pop()
+                after = (record, after)
+                if record.parent is None:
+                    trail = []
+                    while after is not None:
+                        trail.append(after[0])
+                        after = after[1]
+                    yield trail
+                else:
+                    stack.extend((arrival, after) for arrival in reversed(self.nodes[record.parent].arrivals))
+
+    def situations(self) -> Iterator[Situation]:
+        """
+        Enumerates the end trails lazily, as accepted end situations (as run_machine returns them).
+        Situations of a prefix shared by consecutive trails are shared too.
+
+        Yields:
+            Situation: The end situation of one trail.
+        """
+        previous: List[Tuple[SituationRecord, Situation]] = []  # The previous trail, with its situations.
+        for trail in self.trails():
+            shared = 0
+            while shared < len(previous) and shared < len(trail) and previous[shared][0] is trail[shared]:
+                shared += 1
+            converted = previous[:shared]
+            for record in trail[shared:]:
+                if record.origin is not None:
+                    situation = record.origin
+                else:
+                    situation = record.as_situation(converted[-1][1] if converted else None)
+                converted.append((record, situation))
+            previous = converted
+            end_situation = converted[-1][1]
+            end_situation.accepted = True
+            yield end_situation
@@ -0,0 +1,28 @@
+from collections import deque
+from typing import Iterable
+from app.model.situation_record import SituationRecord
+
+
+class Frontier:
+    """
+    The records of a search still to expand, with the counts of the search so far.
+    A caller may hand one to the search to read the counts afterwards.
+    """
+    __slots__ = ("records", "expanded", "pruned", "max_size")
+
+    def __init__(self):
+        self.records = deque()
+        self.expanded = 0  # Records taken out of the frontier to expand.
+        self.pruned = 0  # Records dropped before being queued, since they could not reach an end state.
+        self.max_size = 0  # Largest number of records held at once.
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def push(self, records: Iterable[SituationRecord]):
+        self.records.extend(records)
+        if len(self.records) > self.max_size:
+            self.max_size = len(self.records)
+
+    def pop(self) -> SituationRecord:
+        return self.records.popleft()
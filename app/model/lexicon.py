@@ -0,0 +1,274 @@
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+_STRIDE = 0x110000  # Edges are keyed by node * _STRIDE + code point, so the whole automaton is one dict of ints.
+_CHILD_MASK = (1 << 32) - 1  # Edge values pack the child (low bits) with the rank skip (high bits).
+
+
+class Lexicon:
+    """
+    A set of terms, each with an optional payload, stored as a minimised DAWG (acyclic automaton sharing prefixes and suffixes),
+    built once from a term list. prefixes() finds every term starting at an input offset in one walk.
+    Payloads are kept apart from the automaton, by the rank of the term in sorted order (perfect hashing),
+    so terms sharing a suffix share its nodes even when their payloads differ.
+    Lexicons compare and hash by identity, so that comparing transitions or machines does not walk their terms.
+    """
+    __slots__ = ("_edges", "_labels", "_final", "_payloads", "min_length", "max_length", "_size")
+
+    def __init__(self, entries: Union[Iterable[Union[str, Tuple[str, Any]]], Mapping[str, Any]]):
+        """
+        Builds the lexicon.
+
+        Args:
+            entries (Union[Iterable[Union[str, Tuple[str, Any]]], Mapping[str, Any]]): The terms, alone or with their payloads.
+                For a term listed more than once, the first payload is kept.
+
+        Raises:
+            ValueError: Raised if a term is empty.
+        """
+        terms = dict()
+        for entry in (entries.items() if isinstance(entries, Mapping) else entries):
+            term, payload = (entry, None) if isinstance(entry, str) else entry
+            if not term:
+                raise ValueError("Lexicon terms cannot be empty.")
+            terms.setdefault(term, payload)
+        ordered = sorted(terms)
+
+        children, final = _build_dawg(ordered)
+        self._size = len(ordered)
+        self.min_length = min(map(len, ordered), default=0)
+        self.max_length = max(map(len, ordered), default=0)
+        self._payloads = None if all(payload is None for payload in terms.values()) else [terms[term] for term in ordered]
+        self._labels, self._final, self._edges = _pack(children, final)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]], term_column: str, payload_column: Optional[str] = None) -> "Lexicon":
+        """
+        Builds a lexicon from table rows, such as those streamed from the terms table by data.terms.iter_terms.
+
+        Args:
+            rows (Iterable[Mapping[str, Any]]): The rows.
+            term_column (str): The column holding the terms.
+            payload_column (Optional[str]): The column holding the payloads, if any; else the payload is the whole row.
+
+        Returns:
+            Lexicon: The lexicon.
+        """
+        return cls((row[term_column], row if payload_column is None else row[payload_column]) for row in rows)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, term: str) -> bool:
+        return self._rank(term) is not None
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def _rank(self, term: str) -> Optional[int]:
+        node = 0
+        rank = 0
+        edges = self._edges
+        for character in term:
+            value = edges.get(node * _STRIDE + ord(character))
+            if value is None:
+                return None
+            rank += value >> 32
+            node = value & _CHILD_MASK
+        return rank if self._final[node] else None
+
+    def get(self, term: str, default: Any = None) -> Any:
+        """
+        Gets the payload of a term.
+
+        Args:
+            term (str): The term.
+            default (Any): The value to return if the term is not in the lexicon.
+
+        Returns:
+            Any: The payload of the term (None if it has none), or the default.
+        """
+        rank = self._rank(term)
+        if rank is None:
+            return default
+        return None if self._payloads is None else self._payloads[rank]
+
+    def prefixes(self, text: str, offset: int = 0) -> List[Tuple[int, Any]]:
+        """
+        Finds every term of the lexicon that the text has at the offset, in one walk of the automaton.
+
+        Args:
+            text (str): The text.
+            offset (int): The offset at which the terms start.
+
+        Returns:
+            List[Tuple[int, Any]]: The offset at which each term ends, with its payload, shortest first.
+        """
+        found = []
+        node = 0
+        rank = 0
+        edges = self._edges
+        final = self._final
+        payloads = self._payloads
+        for index in range(offset, len(text)):
+            value = edges.get(node * _STRIDE + ord(text[index]))
+            if value is None:
+                break
+            rank += value >> 32
+            node = value & _CHILD_MASK
+            if final[node]:
+                found.append((index + 1, None if payloads is None else payloads[rank]))
+        return found
+
+    def ends(self, text: str, offset: int = 0) -> List[int]:
+        """
+        Finds the offsets at which the terms that the text has at the offset end (see prefixes), shortest first.
+
+        Args:
+            text (str): The text.
+            offset (int): The offset at which the terms start.
+
+        Returns:
+            List[int]: The end offsets.
+        """
+        found = []
+        node = 0
+        edges = self._edges
+        final = self._final
+        for index in range(offset, len(text)):
+            value = edges.get(node * _STRIDE + ord(text[index]))
+            if value is None:
+                break
+            node = value & _CHILD_MASK
+            if final[node]:
+                found.append(index + 1)
+        return found
+
+    def first_characters(self) -> FrozenSet[str]:
+        """
+        Gets the characters the terms start with.
+
+        Returns:
+            FrozenSet[str]: The first characters.
+        """
+        return frozenset(self._labels[0]) if self._labels else frozenset()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """
+        Lists the terms with their payloads, in sorted order.
+
+        Yields:
+            Tuple[str, Any]: Each term with its payload.
+        """
+        rank = 0
+        stack = [(0, "")]
+        while stack:
+            node, term = stack.pop()
+            if self._final[node]:
+                yield term, None if self._payloads is None else self._payloads[rank]
+                rank += 1
+            for character in reversed(self._labels[node]):
+                stack.append((self._edges[node * _STRIDE + ord(character)] & _CHILD_MASK, term + character))
+
+
+def _build_dawg(terms: List[str]) -> Tuple[List[Dict[str, int]], List[bool]]:
+    """
+    Builds the minimal acyclic automaton of sorted terms incrementally (Daciuk et al.):
+    once a term is added, the nodes of the previous term beyond their common prefix are final, and are merged with equivalent ones.
+
+    Args:
+        terms (List[str]): The terms, sorted, without duplicates.
+
+    Returns:
+        Tuple[List[Dict[str, int]], List[bool]]: The children (by character) and finality of the nodes, the root first.
+            Nodes replaced by an equivalent one are left unreachable.
+    """
+    children = [dict()]
+    final = [False]
+    register = dict()
+    unchecked = []  # (parent, character, child) along the path of the last term, not yet merged.
+
+    def minimise(down_to: int):
+        while len(unchecked) > down_to:
+            parent, character, child = unchecked.pop()
+            signature = (final[child], tuple(children[child].items()))
+            existing = register.get(signature)
+            if existing is None:
+                register[signature] = child
+            else:
+                children[parent][character] = existing
+
+    previous = ""
+    for term in terms:
+        common = 0
+        limit = min(len(term), len(previous))
+        while common < limit and term[common] == previous[common]:
+            common += 1
+        minimise(common)
+
+        node = unchecked[-1][2] if unchecked else 0
+        for character in term[common:]:
+            children.append(dict())
+            final.append(False)
+            child = len(children) - 1
+            children[node][character] = child
+            unchecked.append((node, character, child))
+            node = child
+        final[node] = True
+        previous = term
+    minimise(0)
+    return children, final
+
+
+def _pack(children: List[Dict[str, int]], final: List[bool]) -> Tuple[List[str], bytearray, Dict[int, int]]:
+    """
+    Renumbers the reachable nodes and packs the automaton into flat structures:
+    the edge labels of each node, the finality of each node, and one dict of the edges.
+    Each edge also holds its rank skip: the number of terms ending at its source or below its earlier siblings,
+    which a walk adds up to get the rank of the term it reads.
+
+    Args:
+        children (List[Dict[str, int]]): The children of the nodes, by character.
+        final (List[bool]): The finality of the nodes.
+
+    Returns:
+        Tuple[List[str], bytearray, Dict[int, int]]: The labels, the finality and the edges of the renumbered nodes.
+    """
+    # Number the reachable nodes, the root first.
+    number = {0: 0}
+    order = [0]
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        for child in children[node].values():
+            if child not in number:
+                number[child] = len(order)
+                order.append(child)
+                stack.append(child)
+
+    # Terms ending at or below each node, counted after those of its children (post-order).
+    counts = dict()
+    stack = [(0, False)]
+    while stack:
+        node, counted_children = stack.pop()
+        if counted_children:
+            counts[node] = final[node] + sum(counts[child] for child in children[node].values())
+        elif node not in counts:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children[node].values() if child not in counts)
+
+    labels = []
+    packed_final = bytearray(len(order))
+    edges = dict()
+    for node in order:
+        source = number[node]
+        packed_final[source] = final[node]
+        labels.append("".join(children[node]))
+        skip = final[node]
+        for character, child in children[node].items():
+            edges[source * _STRIDE + ord(character)] = (skip << 32) | number[child]
+            skip += counts[child]
+    return labels, packed_final, edges
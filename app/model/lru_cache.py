@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LruCache:
+    """
+    Results by key, with at most maxsize of them kept, the least recently used being evicted first,
+    and the counts of lookups that found a result (hits) or not (misses).
+    """
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_results")
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Creates an empty cache.
+
+        Args:
+            maxsize (int): The most results kept.
+
+        Raises:
+            ValueError: Raised if maxsize is not positive.
+        """
+        if maxsize <= 0:
+            raise ValueError(f"The cache size must be positive, not {maxsize}.")
+        self.maxsize = maxsize
+        self.hits = 0  # Lookups that found a result.
+        self.misses = 0  # Lookups that did not.
+        self.evictions = 0  # Results dropped to keep the cache within maxsize.
+        self._results = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @property
+    def hit_rate(self) -> float:
+        # Share of the lookups that found a result (0 before any lookup).
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def lookup(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets the result cached for the key, counting the hit or miss.
+
+        Args:
+            key (Hashable): The key.
+            default (Any): The value to return if no result is cached.
+
+        Returns:
+            Any: The cached result, or the default.
+        """
+        results = self._results
+        if key in results:
+            results.move_to_end(key)
+            self.hits += 1
+            return results[key]
+        self.misses += 1
+        return default
+
+    def store(self, key: Hashable, result: Any):
+        """
+        Caches a result, evicting the least recently used one if the cache is full.
+
+        Args:
+            key (Hashable): The key.
+            result (Any): The result.
+        """
+        results = self._results
+        results[key] = result
+        results.move_to_end(key)
+        if len(results) > self.maxsize:
+            results.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        # Drops the results, keeping the counts.
+        self._results.clear()
+
+    def to_dict(self) -> dict:
+        """
+        Exports the counts as plain data (JSON-able).
+
+        Returns:
+            dict: The counts, by name.
+        """
+        return {
+            "size": len(self._results),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Any, Callable, Dict, List
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Callable, Dict, List, Optional
+from app.model.compiled_machine import CompiledMachine
 from app.model.state import State
 from app.model.transition import Transition
 
@@ -8,3 +9,21 @@ class Machine(BaseModel):
     # The key to the inner dict is the name (unique) of the transition.
     graph: Dict[str, Dict[str, Transition]]
     states: Dict[str, State]
+    _compiled: Optional[CompiledMachine] = PrivateAttr(default=None)  # Runtime form, see machine_service.compile_machine.
+    _dfa: Optional[Any] = PrivateAttr(default=None)  # dfa_service.LazyDfa, built on first use by literal machines.
+    _transform_cache: Optional[Any] = PrivateAttr(default=None)  # transform_cache.TransformCache of pure transforms, if attached.
+    _result_cache: Optional[Any] = PrivateAttr(default=None)  # result_cache.ResultCache of cached_analyse_text, if attached.
+
+    class Config:
+        allow_mutation = False
+        copy_on_model_validation = "none"  # Situations share one reference to the machine rather than copies.
+
+    def __deepcopy__(self, memo: dict) -> "Machine":
+        # The machine is read-only once created, so copies of situations can keep sharing it.
+        return self
+
+    def __getstate__(self) -> dict:
+        # The compiled forms are rebuilt on first use rather than pickled (and caches are left behind).
+        state = super().__getstate__()
+        state["__private_attribute_values__"] = {name: None for name in state["__private_attribute_values__"]}
+        return state
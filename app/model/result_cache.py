@@ -0,0 +1,28 @@
+from typing import Optional
+from app.model.compiled_machine import CompiledMachine
+from app.model.lru_cache import LruCache
+
+
+class ResultCache(LruCache):
+    """
+    Analyses of input texts by a machine (see result_cache_service.cached_analyse_text), keyed on the text, so that the texts met again
+    (words of a corpus follow a Zipf distribution) are not parsed again. Once attached to a machine (result_cache_service.cache_results),
+    it holds compact Analysis tuples rather than situations, at most maxsize texts of them, the least recently used being evicted first.
+    It belongs to the compiled form it was filled with: when the machine is compiled again, the cache is emptied.
+    """
+    __slots__ = ("compiled",)
+
+    def __init__(self, maxsize: int = 4096):
+        super().__init__(maxsize)
+        self.compiled: Optional[CompiledMachine] = None  # The compiled form of the machine the analyses come from.
+
+    def bind(self, compiled: CompiledMachine):
+        """
+        Ties the cache to the compiled form of its machine, emptying it if it was filled with another.
+
+        Args:
+            compiled (CompiledMachine): The current compiled form of the machine.
+        """
+        if self.compiled is not compiled:
+            self.clear()
+            self.compiled = compiled
@@ -0,0 +1,24 @@
+from typing import List, NamedTuple, Optional
+from app.model.situation import Situation
+
+BEAM_WIDTH = "beam_width"  # Records were dropped at an input offset that already had beam_width of them.
+MAX_FRONTIER = "max_frontier"  # Records were dropped since the frontier held max_frontier of them.
+MAX_EXPANDED = "max_expanded"  # The search stopped after expanding max_expanded records.
+MAX_SECONDS = "max_seconds"  # The search stopped after running for max_seconds.
+
+
+class SearchLimits(NamedTuple):
+    # Bounds of a search (see run_machine_bounded); None leaves a bound off.
+    beam_width: Optional[int] = None  # Most records queued at each input offset; the ones found later are dropped.
+    max_frontier: Optional[int] = None  # Most records waiting to be expanded at once; the ones found beyond are dropped.
+    max_expanded: Optional[int] = None  # Most records expanded, after which the search stops.
+    max_seconds: Optional[float] = None  # Most wall-clock time the search runs for, after which it stops.
+    depth_first: bool = False  # If true, the latest record found is expanded first (memory grows with trail length), else the earliest.
+
+
+class BoundedResult(NamedTuple):
+    # Result of a bounded search: the end situations found, and whether a limit made the search miss some.
+    situations: List[Situation]  # Situations stopped at an end state.
+    truncated: bool  # True if a limit dropped records or stopped the search, so end situations may be missing.
+    reason: Optional[str]  # The first limit hit (BEAM_WIDTH, MAX_FRONTIER, MAX_EXPANDED or MAX_SECONDS), if any.
+    dropped: int  # Records dropped by the beam or the frontier cap.
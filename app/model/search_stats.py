@@ -0,0 +1,57 @@
+from collections import Counter
+from typing import Callable, Optional
+from app.model.frontier import Frontier
+
+
+class SearchStats:
+    """
+    Opt-in collector of what a search did, per transition and in total. A caller hands one to run_machine (stats=...)
+    to find which states and transitions a slow parse spends its time on; searches without one are not instrumented.
+    With a collector, the events of the transitions taken and of the states entered are called too, as event(record, stats).
+    """
+    __slots__ = ("created", "pruned", "expanded", "max_frontier", "attempts", "hits", "match_seconds", "transform_seconds",
+                 "trail_lengths", "hook")
+
+    def __init__(self, hook: Optional[Callable[["SearchStats"], None]] = None):
+        self.created = 0  # Records created (situations, before they are converted).
+        self.pruned = 0  # Records dropped before being created, since they could not reach an end state.
+        self.expanded = 0  # Records expanded.
+        self.max_frontier = 0  # Largest number of records waiting to be expanded.
+        self.attempts = Counter()  # Maps Transition.name to the number of times its pattern was tried.
+        self.hits = Counter()  # Maps Transition.name to the number of times its pattern matched.
+        self.match_seconds = 0.0  # Time spent matching patterns (regexes and literals).
+        self.transform_seconds = 0.0  # Time spent in transforms.
+        self.trail_lengths = Counter()  # Maps trail length (situations, start and end included) to the number of end trails found.
+        self.hook = hook  # Called with the collector when a search finishes.
+
+    def finish(self, frontier: Frontier):
+        """
+        Adds the counts of the search's frontier, then calls the hook, if any.
+
+        Args:
+            frontier (Frontier): The frontier the search ran with.
+        """
+        self.pruned += frontier.pruned
+        self.expanded += frontier.expanded
+        self.max_frontier = max(self.max_frontier, frontier.max_size)
+        if self.hook is not None:
+            self.hook(self)
+
+    def to_dict(self) -> dict:
+        """
+        Exports the counts as plain data (JSON-able).
+
+        Returns:
+            dict: The counts, by name.
+        """
+        return {
+            "created": self.created,
+            "pruned": self.pruned,
+            "expanded": self.expanded,
+            "max_frontier": self.max_frontier,
+            "attempts": dict(self.attempts),
+            "hits": dict(self.hits),
+            "match_seconds": self.match_seconds,
+            "transform_seconds": self.transform_seconds,
+            "trail_lengths": {str(length): count for length, count in sorted(self.trail_lengths.items())},
+        }
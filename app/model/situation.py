@@ -1,13 +1,69 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
+from typing import List, Optional
 from app.model.machine import Machine
 from app.model.state import State
 
 class Situation(BaseModel):
     id: str  # Unique.
     input_complete: str
-    input_remainder: str
+    offset: int  # Position in input_complete up to which the input has been consumed.
     matched: str  # The actual string piece that was the match from the transition pattern.
     state: State
     machine: Machine
-    history: list  # Previous situations (as Situations) of this trail. Cannot use List[Situation], because of a circular reference: undefined Situation.
+    parent: Optional["Situation"]  # Previous situation of this trail. Shared by sibling trails; the history is the chain of parents.
+    cost: float = 0.0  # Costs of the transitions taken and the states entered along the trail up to this situation.
+    accepted: bool = False  # Set by run_machine when the trail ends at this situation, which then belongs to its own history.
 
+    class Config:
+        copy_on_model_validation = "none"  # Children keep a reference to their parent, not a copy.
+
+    @root_validator(pre=True)
+    def _history_to_parent(cls, values: dict) -> dict:
+        # A list of previous situations (the former history field) is accepted: its last situation is the parent.
+        history = values.pop("history", None)
+        if history and values.get("parent") is None:
+            values["parent"] = history[-1]
+        return values
+
+    @root_validator(pre=True)
+    def _remainder_to_offset(cls, values: dict) -> dict:
+        # The remainder (the former input_remainder field) is accepted in place of the offset.
+        remainder = values.pop("input_remainder", None)
+        if remainder is not None and values.get("offset") is None:
+            input_complete = values.get("input_complete", "")
+            if not input_complete.endswith(remainder):
+                raise ValueError(f"Input remainder '{remainder}' is not the end of the complete input '{input_complete}'.")
+            values["offset"] = len(input_complete) - len(remainder)
+        return values
+
+    @property
+    def input_remainder(self) -> str:
+        # The input not yet consumed, as a view on the complete input.
+        return self.input_complete[self.offset:]
+
+    def trail(self) -> List["Situation"]:
+        """
+        Builds the list of situations of this trail, by following the parent pointers.
+
+        Returns:
+            List[Situation]: The situations of the trail, from the first one through this one.
+        """
+        trail = []
+        situation = self
+        while situation is not None:
+            trail.append(situation)
+            situation = situation.parent
+        trail.reverse()
+        return trail
+
+    @property
+    def history(self) -> List["Situation"]:
+        """
+        Previous situations of this trail, built on request from the parent chain.
+        Once the situation is accepted by run_machine, it is the last item of its own history.
+        """
+        trail = self.trail()
+        return trail if self.accepted else trail[:-1]
+
+
+Situation.update_forward_refs()
@@ -0,0 +1,144 @@
+from itertools import count
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+from app.model.analysis import Analysis
+from app.model.compiled_machine import CompiledMachine, CompiledState, CompiledTransition
+from app.model.machine import Machine
+from app.model.situation import Situation
+from app.model.state import State
+
+_ids = count()  # Cheap ids, unique within the process.
+
+
+class SituationRecord:
+    """
+    Runtime form of a Situation, used by the search loop in place of the pydantic model.
+    It is built without validation and shares the input, the machine and its parent with the rest of its trail.
+    It answers the attributes of a Situation that transforms read (state, matched, input_remainder, history, ...),
+    and is turned into a Situation only when handed back to a caller.
+    """
+    __slots__ = ("id", "node", "input_complete", "start", "offset", "data", "parent", "transition", "machine", "origin")
+
+    def __init__(self, node: CompiledState, input_complete: str, start: int, offset: int, data: Any,
+                 parent: Optional["SituationRecord"], transition: Optional[CompiledTransition], machine: Machine,
+                 origin: Optional[Situation] = None):
+        self.id = next(_ids)
+        self.node = node  # The compiled state of this visit.
+        self.input_complete = input_complete  # Shared by every record of the search, never sliced.
+        self.start = start  # Offset at which the match of the preceding transition starts.
+        self.offset = offset  # Offset up to which the input has been consumed.
+        self.data = data  # Data of this visit, from the preceding transition's transform (else the declared state data).
+        self.parent = parent
+        self.transition = transition  # The transition taken from the parent to this record.
+        self.machine = machine
+        self.origin = origin  # For the first record of a search: the Situation it was started from.
+
+    @classmethod
+    def from_situation(cls, situation: Situation, compiled: CompiledMachine) -> "SituationRecord":
+        """
+        Starts a record from a public situation, which stays the origin of the trail.
+
+        Args:
+            situation (Situation): The situation to start from.
+            compiled (CompiledMachine): The compiled form of the situation's machine.
+
+        Raises:
+            LookupError: Raised if the situation's state is not in the machine.
+
+        Returns:
+            SituationRecord: The record standing for the situation.
+        """
+        if situation.state.name not in compiled.state_index:
+            raise LookupError(f"State name not found in machine graph: '{situation.state.name}'. Available state names: '{list(compiled.state_index.keys())}'.")
+        node = compiled.states[compiled.state_index[situation.state.name]]
+        return cls(node, situation.input_complete, situation.offset, situation.offset, situation.state.data,
+                   None, None, situation.machine, situation)
+
+    @property
+    def matched(self) -> str:
+        # The actual string piece that was the match from the transition pattern.
+        return self.origin.matched if self.origin is not None else self.input_complete[self.start:self.offset]
+
+    @property
+    def input_remainder(self) -> str:
+        return self.input_complete[self.offset:]
+
+    @property
+    def state(self) -> State:
+        # The visit's view of the state: the shared declared state, or a shallow copy carrying this visit's data.
+        state = self.node.state
+        return state if self.data is state.data else state.copy(update={"data": self.data})
+
+    def trail(self) -> List["SituationRecord"]:
+        trail = []
+        record = self
+        while record is not None:
+            trail.append(record)
+            record = record.parent
+        trail.reverse()
+        return trail
+
+    @property
+    def history(self) -> list:
+        trail = self.trail()
+        return trail[0].origin.history + trail[:-1] if trail[0].origin else trail[:-1]
+
+    def to_analysis(self) -> Analysis:
+        """
+        Summarises the trail of the record, without building situations.
+
+        Returns:
+            Analysis: The states, transitions and spans of the trail, and the data of this record.
+        """
+        trail = self.trail()
+        return Analysis(
+            states=tuple(record.node.name for record in trail),
+            transitions=tuple(record.transition.name for record in trail[1:]),
+            spans=tuple((record.start, record.offset) for record in trail[1:]),
+            data=self.data,
+        )
+
+    def to_situation(self, memo: Optional[Dict["SituationRecord", Situation]] = None) -> Situation:
+        """
+        Turns the record, and those of its trail not yet converted, into public situations.
+
+        Args:
+            memo (Optional[Dict[SituationRecord, Situation]]): Records already converted, shared between calls so that trails keep sharing their prefixes.
+
+        Returns:
+            Situation: The situation standing for the record.
+        """
+        memo = {} if memo is None else memo
+        pending = []
+        record = self
+        while record is not None and record not in memo:
+            if record.origin is not None:
+                memo[record] = record.origin
+                break
+            pending.append(record)
+            record = record.parent
+
+        for record in reversed(pending):
+            memo[record] = record.as_situation(memo[record.parent] if record.parent is not None else None)
+        return memo[self]
+
+    def as_situation(self, parent: Optional[Situation]) -> Situation:
+        """
+        Turns this record alone into a public situation, under the given parent situation.
+
+        Args:
+            parent (Optional[Situation]): The situation standing for the previous record of the trail.
+
+        Returns:
+            Situation: The situation standing for the record.
+        """
+        return Situation(
+            id=str(uuid4()),
+            input_complete=self.input_complete,
+            offset=self.offset,
+            matched=self.matched,
+            state=self.state,
+            machine=self.machine,
+            parent=parent,
+            cost=(parent.cost if parent is not None else 0.0) + (self.transition.cost if self.transition is not None else 0.0),
+        )
@@ -7,4 +7,9 @@ class State(BaseModel):
     end: bool
     data: Optional[Any]  # Destination storage location for result of the preceding transition's transform function.
     process: Optional[Callable]
-    event: Optional[List[Callable]]
\ No newline at end of file
+    event: Optional[List[Callable]]
+    cost: float = 0.0  # Cost of entering the state (non-negative), added to the cost of the transition into it.
+
+    class Config:
+        allow_mutation = False  # Shared by every visit; per-visit data goes on a copy held by the situation.
+        copy_on_model_validation = "none"
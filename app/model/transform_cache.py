@@ -0,0 +1,11 @@
+from app.model.lru_cache import LruCache
+
+
+class TransformCache(LruCache):
+    """
+    Results of pure transforms (see Transition.pure), keyed on their inputs: the transition, and the matched text and data
+    of the situation it is taken from (with the payload, for lexicon transitions). Once attached to a machine
+    (machine_service.cache_transforms), identical expansions skip the transform, within a search and across searches.
+    At most maxsize results are kept, the least recently used being evicted first. Cached results are shared, so must not be mutated.
+    """
+    __slots__ = ()
@@ -1,10 +1,26 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
 from typing import Any, Callable, List, Optional
+from app.model.lexicon import Lexicon
 
 class Transition(BaseModel):
     name: str  # Unique.
-    pattern: str
+    pattern: str  # With a lexicon, only a label (default "<lexicon>"): the lexicon is matched instead.
     state1_name: str
     state2_name: str
-    transform: Optional[Callable]  # transform(Situation, Transition) -> Any (data, stored in next Situation's state)
+    transform: Optional[Callable]  # transform(Situation, Transition) -> Any (data, stored in next Situation's state). With a lexicon: transform(Situation, Transition, payload).
     event: Optional[List[Callable]]
+    pure: bool = False  # True if transform depends only on the transition and the previous situation's matched and data, so its results can be shared.
+    cost: float = 0.0  # Cost of taking the transition (non-negative), added up along trails by the k-best search (see weighted_service).
+    lexicon: Optional[Lexicon] = None  # Terms to match in place of the pattern, every one that the input has at once. Without a transform, the data is the term's payload.
+
+    class Config:
+        allow_mutation = False
+        copy_on_model_validation = "none"
+        arbitrary_types_allowed = True  # For the lexicon.
+
+    @root_validator(pre=True)
+    def _lexicon_pattern(cls, values: dict) -> dict:
+        # A lexicon transition needs no pattern, and an empty one would make it an epsilon transition.
+        if values.get("lexicon") is not None and not values.get("pattern"):
+            values["pattern"] = "<lexicon>"
+        return values
@@ -0,0 +1,189 @@
+import asyncio
+from inspect import isawaitable
+from time import perf_counter
+from typing import Dict, List, Optional
+from app.model.compiled_machine import CompiledMachine, CompiledTransition
+from app.model.frontier import Frontier
+from app.model.machine import Machine
+from app.model.search_stats import SearchStats
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+from app.service.machine_service import compile_machine, instrumented_moves, is_hopeless, transition_data, transition_moves
+
+
+class _Step:
+    """
+    A transition taken from a record, whose transform result (data) may still have to be awaited.
+    """
+    __slots__ = ("parent", "transition", "match_end", "data")
+
+    def __init__(self, parent: SituationRecord, transition: CompiledTransition, match_end: int, data):
+        self.parent = parent
+        self.transition = transition
+        self.match_end = match_end
+        self.data = data  # The transform's result: data, or an awaitable of the data.
+
+
+def _steps(record: SituationRecord, moves: list, compiled: CompiledMachine, frontier: Frontier,
+           stats: Optional[SearchStats]) -> List[_Step]:
+    # Prunes the moves as expand_record does, and calls the transforms of the others, without awaiting them.
+    steps = []
+    length = len(record.input_complete)
+    for transition, match_end in moves:
+        node = compiled.states[transition.target]
+        if is_hopeless(node, length - match_end):
+            frontier.pruned += 1
+            continue
+        started = perf_counter() if stats is not None else 0.0
+        data = transition_data(record, transition, node, match_end)
+        if stats is not None:
+            stats.transform_seconds += perf_counter() - started  # The synchronous part: awaited time overlaps other branches.
+        steps.append(_Step(record, transition, match_end, data))
+    return steps
+
+
+async def _take_steps(steps: List[_Step], compiled: CompiledMachine, stats: Optional[SearchStats]) -> List[SituationRecord]:
+    """
+    Awaits the transforms of the steps concurrently, then creates their records (and, with a collector, awaits their events).
+
+    Args:
+        steps (List[_Step]): The steps to take, from any number of records.
+        compiled (CompiledMachine): The compiled form of the machine.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any.
+
+    Returns:
+        List[SituationRecord]: The record of each step, in the order of the steps.
+    """
+    pending = [step for step in steps if isawaitable(step.data)]
+    if pending:
+        for step, data in zip(pending, await asyncio.gather(*(step.data for step in pending))):
+            step.data = data
+
+    records = []
+    events = []
+    for step in steps:
+        parent = step.parent
+        record = SituationRecord(compiled.states[step.transition.target], parent.input_complete, parent.offset, step.match_end,
+                                 step.data, parent, step.transition, parent.machine)
+        records.append(record)
+        if stats is not None:
+            stats.created += 1
+            for event in (step.transition.transition.event or []) + (record.node.state.event or []):
+                result = event(record, stats)
+                if isawaitable(result):
+                    events.append(result)
+    if events:
+        await asyncio.gather(*events)
+    return records
+
+
+async def _with_closures(records: List[SituationRecord], compiled: CompiledMachine, frontier: Frontier,
+                         stats: Optional[SearchStats]) -> List[SituationRecord]:
+    """
+    Follows each record with its epsilon closure, as expand_record(closure=True) does,
+    taking the empty patterns of all the records a level at a time so their transforms are awaited together.
+
+    Args:
+        records (List[SituationRecord]): The records whose closures to add.
+        compiled (CompiledMachine): The compiled form of the machine.
+        frontier (Frontier): The frontier that counts the pruned records.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any.
+
+    Returns:
+        List[SituationRecord]: The records, each followed by its closure, in the order epsilon_records lists it.
+    """
+    closures: Dict[SituationRecord, List[SituationRecord]] = dict()
+    level = [record for record in records if record.node.epsilon]
+    while level:
+        steps = []
+        for record in level:
+            if stats is not None:
+                for transition in record.node.epsilon:
+                    stats.attempts[transition.name] += 1
+                    stats.hits[transition.name] += 1
+            steps.extend(_steps(record, [(transition, record.offset) for transition in record.node.epsilon], compiled, frontier, stats))
+        level = await _take_steps(steps, compiled, stats)
+        for record in level:
+            closures.setdefault(record.parent, []).append(record)
+        level = [record for record in level if record.node.epsilon]
+
+    # Each record, then (depth first) the closure of each of its children.
+    ordered = []
+    stack = list(reversed(records))
+    while stack:
+        record = stack.pop()
+        ordered.append(record)
+        stack.extend(reversed(closures.get(record, ())))
+    return ordered
+
+
+async def _expand_batch(records: List[SituationRecord], compiled: CompiledMachine, frontier: Frontier,
+                        stats: Optional[SearchStats]) -> List[SituationRecord]:
+    # Expands the records as expand_record(closure=True) does, awaiting the transforms of every record of the batch together.
+    steps = []
+    for record in records:
+        text = record.input_complete
+        if stats is None:
+            moves = transition_moves(record.node, text, record.offset, True)
+        else:
+            moves = instrumented_moves(record.node, text, record.offset, True, stats)
+        steps.extend(_steps(record, moves, compiled, frontier, stats))
+    return await _with_closures(await _take_steps(steps, compiled, stats), compiled, frontier, stats)
+
+
+async def arun_machine(machine: Machine, start_situation: Situation, yield_every: int = 64, timeout: Optional[float] = None,
+                       frontier: Optional[Frontier] = None, stats: Optional[SearchStats] = None) -> List[Situation]:
+    """
+    Run the provided machine on the specified starting situation, as run_machine does, without blocking the event loop.
+    Transforms (and, with a collector, events) may be coroutine functions: the transforms of the records expanded together
+    are awaited concurrently, so branches waiting on I/O proceed at the same time.
+    The search goes back to the event loop after each batch of expansions, and stops when the task is cancelled.
+
+    Args:
+        machine (Machine): The machine that will process the situations.
+        start_situation (Situation): The starting situation.
+        yield_every (int): The number of records expanded together, between returns to the event loop.
+        timeout (Optional[float]): The time in seconds after which the search is abandoned, if any.
+        frontier (Optional[Frontier]): The (empty) frontier to search with, to read its counts (expanded, pruned, max_size) afterwards.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any (see SearchStats).
+
+    Raises:
+        TimeoutError: Raised if the search takes longer than the timeout.
+
+    Returns:
+        List[Situation]: The list of situations stopped at an end state, in the order run_machine lists them.
+    """
+    compiled = compile_machine(machine)
+    frontier = Frontier() if frontier is None else frontier
+    start_record = SituationRecord.from_situation(start_situation, compiled)
+    end_records = []
+
+    try:
+        async with asyncio.timeout(timeout):
+            frontier.push(await _with_closures([start_record], compiled, frontier, stats))
+
+            while len(frontier) > 0:
+                batch = []
+                while len(frontier) > 0 and len(batch) < yield_every:
+                    record = frontier.pop()
+                    if record.node.end and record.offset == len(record.input_complete):
+                        end_records.append(record)
+                        if stats is not None:
+                            stats.trail_lengths[len(record.trail())] += 1
+                    else:
+                        batch.append(record)
+
+                frontier.expanded += len(batch)
+                frontier.push(await _expand_batch(batch, compiled, frontier, stats))
+                await asyncio.sleep(0)  # Let the other tasks of the loop run.
+    finally:
+        if stats is not None:
+            stats.finish(frontier)
+
+    memo = {}
+    end_situations = []
+    for record in end_records:
+        situation = record.to_situation(memo)
+        situation.accepted = True
+        end_situations.append(situation)
+    return end_situations
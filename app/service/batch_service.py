@@ -0,0 +1,102 @@
+import os
+import pickle
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from app.model.analysis import Analysis
+from app.model.machine import Machine
+from app.service.machine_service import analyse_text, compile_machine
+from app.service.result_cache_service import cache_results, cached_analyse_text
+
+_batch_machine: Optional[Machine] = None  # The machine of a batch worker process, shipped once by _init_batch_worker.
+
+
+def _init_batch_worker(machine: Machine, cache_size: Optional[int]):
+    global _batch_machine
+    _batch_machine = machine
+    compile_machine(machine)
+    if cache_size is not None:
+        cache_results(machine, cache_size)  # Caches are not pickled: each worker fills its own.
+
+
+def _analyser(machine: Machine) -> Callable[[Machine, str], List[Analysis]]:
+    # The machine's result cache is used if one is attached (see result_cache_service.cache_results).
+    return analyse_text if machine._result_cache is None else cached_analyse_text
+
+
+def _run_batch_chunk(texts: List[str]) -> List[List[Analysis]]:
+    analyse = _analyser(_batch_machine)
+    return [analyse(_batch_machine, text) for text in texts]
+
+
+def _chunks(inputs: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    chunk = []
+    for text in inputs:
+        chunk.append(text)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_machine_batch(machine: Machine, inputs: Iterable[str], workers: Optional[int] = None, chunksize: int = 256,
+                      ordered: bool = True) -> Iterator[Union[List[Analysis], Tuple[int, List[Analysis]]]]:
+    """
+    Runs the machine on every input of a corpus, spread over a pool of worker processes.
+    The machine is shipped once to each worker (and compiled there), then the inputs are streamed in chunks,
+    with a bounded number of chunks in flight, so that the inputs may be a generator over a corpus of any size.
+    Transforms and events must pickle: module-level functions, or callables registered with callable_service.register_callable.
+    If the machine has a result cache (see result_cache_service.cache_results), each worker keeps one of the same size.
+
+    Args:
+        machine (Machine): The machine to run.
+        inputs (Iterable[str]): The complete inputs.
+        workers (Optional[int]): The number of worker processes (by default, the number of CPUs). With 1, the inputs are run in this process.
+        chunksize (int): The number of inputs sent to a worker at a time.
+        ordered (bool): If true, the results come in the order of the inputs; otherwise, as they complete, with the index of their input.
+
+    Raises:
+        TypeError: Raised if the machine cannot be shipped to the workers.
+
+    Yields:
+        Union[List[Analysis], Tuple[int, List[Analysis]]]: The analyses of each input (with the input index, if not ordered).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        analyse = _analyser(machine)
+        for index, text in enumerate(inputs):
+            analyses = analyse(machine, text)
+            yield analyses if ordered else (index, analyses)
+        return
+
+    try:
+        pickle.dumps(machine)
+    except Exception as error:
+        raise TypeError(f"The machine cannot be shipped to worker processes: {error}. Use module-level functions, or callables registered with register_callable, for transforms and events.") from error
+
+    max_pending = workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(machine, None if machine._result_cache is None else machine._result_cache.maxsize)) as executor:
+        pending = deque()  # (index of the first input, future), in submission order.
+        first_index = 0
+        for chunk in _chunks(inputs, chunksize):
+            pending.append((first_index, executor.submit(_run_batch_chunk, chunk)))
+            first_index += len(chunk)
+            if len(pending) >= max_pending:
+                yield from _drain_batch(pending, ordered, max_pending // 2)
+        yield from _drain_batch(pending, ordered, 0)
+
+
+def _drain_batch(pending: deque, ordered: bool, keep: int) -> Iterator[Union[List[Analysis], Tuple[int, List[Analysis]]]]:
+    # Yields the results of the pending chunks until no more than keep chunks remain in flight.
+    while len(pending) > keep:
+        if ordered:
+            _, future = pending.popleft()
+            yield from future.result()
+            continue
+        done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+        for first_index, future in [item for item in pending if item[1] in done]:
+            pending.remove((first_index, future))
+            for offset, analyses in enumerate(future.result()):
+                yield (first_index + offset, analyses)
@@ -0,0 +1,82 @@
+from collections import Counter
+from time import perf_counter
+from typing import List, Optional
+from app.model.frontier import Frontier
+from app.model.machine import Machine
+from app.model.search_limits import BEAM_WIDTH, MAX_EXPANDED, MAX_FRONTIER, MAX_SECONDS, BoundedResult, SearchLimits
+from app.model.search_stats import SearchStats
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+from app.service.machine_service import compile_machine, epsilon_records, expand_record
+
+
+def run_machine_bounded(machine: Machine, start_situation: Situation, limits: SearchLimits, frontier: Optional[Frontier] = None,
+                        stats: Optional[SearchStats] = None) -> BoundedResult:
+    """
+    Run the provided machine on the specified starting situation, as run_machine does, within fixed bounds of memory and time,
+    for input that may make the search blow up (untrusted or pathological text).
+    The frontier is capped by max_frontier and by beam_width records per input offset: records found beyond are dropped.
+    The search stops after max_expanded expansions or max_seconds. Either way the result says it was truncated, and why.
+
+    Args:
+        machine (Machine): The machine that will process the situations.
+        start_situation (Situation): The starting situation.
+        limits (SearchLimits): The bounds of the search, and its order.
+        frontier (Optional[Frontier]): The (empty) frontier to search with, to read its counts (expanded, pruned, max_size) afterwards.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any (see SearchStats).
+
+    Returns:
+        BoundedResult: The situations stopped at an end state (in the order run_machine lists them, searching breadth first),
+            whether the search was truncated, the first limit hit, and the number of records dropped.
+    """
+    compiled = compile_machine(machine)
+    frontier = Frontier() if frontier is None else frontier
+    deadline = None if limits.max_seconds is None else perf_counter() + limits.max_seconds
+    queued = Counter()  # Records queued by input offset, for the beam.
+    hits = Counter()  # Times each limit was hit, in the order first hit.
+
+    def push(records: List[SituationRecord]):
+        admitted = []
+        for record in records:
+            if limits.beam_width is not None and queued[record.offset] >= limits.beam_width:
+                hits[BEAM_WIDTH] += 1
+            elif limits.max_frontier is not None and len(frontier) + len(admitted) >= limits.max_frontier:
+                hits[MAX_FRONTIER] += 1
+            else:
+                queued[record.offset] += 1
+                admitted.append(record)
+        # Depth first pops from the right, so the first record found is queued last.
+        frontier.push(reversed(admitted) if limits.depth_first else admitted)
+
+    start_record = SituationRecord.from_situation(start_situation, compiled)
+    end_records = []
+    try:
+        push([start_record] + epsilon_records(start_record, compiled, frontier, stats=stats))
+
+        while len(frontier) > 0:
+            record = frontier.records.pop() if limits.depth_first else frontier.pop()
+            if record.node.end and record.offset == len(record.input_complete):
+                end_records.append(record)
+                if stats is not None:
+                    stats.trail_lengths[len(record.trail())] += 1
+                continue
+
+            if limits.max_expanded is not None and frontier.expanded >= limits.max_expanded:
+                hits[MAX_EXPANDED] += 1
+                break
+            if deadline is not None and perf_counter() >= deadline:
+                hits[MAX_SECONDS] += 1
+                break
+            frontier.expanded += 1
+            push(expand_record(record, compiled, closure=True, frontier=frontier, stats=stats))
+    finally:
+        if stats is not None:
+            stats.finish(frontier)
+
+    memo = {}
+    end_situations = []
+    for record in end_records:
+        situation = record.to_situation(memo)
+        situation.accepted = True
+        end_situations.append(situation)
+    return BoundedResult(end_situations, bool(hits), next(iter(hits), None), hits[BEAM_WIDTH] + hits[MAX_FRONTIER])
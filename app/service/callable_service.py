@@ -0,0 +1,124 @@
+import importlib
+from typing import Callable, Dict, Optional
+
+_registry: Dict[str, "NamedCallable"] = dict()
+
+
+class NamedCallable:
+    """
+    A callable (transform, event, ...) registered under a name.
+    It pickles as its name, so machines using it can be shipped to worker processes or saved,
+    even when the function itself is a lambda or a closure.
+    """
+    __slots__ = ("name", "module", "function")
+
+    def __init__(self, name: str, module: Optional[str], function: Callable):
+        self.name = name
+        self.module = module  # Module that registers the callable, imported to resolve the name in a fresh process.
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def __reduce__(self):
+        return (resolve_callable, (self.name, self.module))
+
+    def __repr__(self) -> str:
+        return f"NamedCallable('{self.name}')"
+
+
+def register_callable(name: str, function: Optional[Callable] = None, module: Optional[str] = None):
+    """
+    Registers a callable under a name, directly or as a decorator (@register_callable("name")).
+
+    Args:
+        name (str): The unique name of the callable.
+        function (Optional[Callable]): The callable, or None to get a decorator.
+        module (Optional[str]): The module that registers the callable (by default, the module of the function).
+
+    Raises:
+        ValueError: Raised if another callable is already registered under the name.
+
+    Returns:
+        NamedCallable: The registered callable (or, without function, a decorator returning it).
+    """
+    def _register(function: Callable) -> NamedCallable:
+        registered = _registry.get(name)
+        if registered is not None and registered.function is not function:
+            raise ValueError(f"A callable is already registered under the name '{name}'.")
+        named = NamedCallable(name, module or getattr(function, "__module__", None), function)
+        _registry[name] = named
+        return named
+
+    return _register if function is None else _register(function)
+
+
+def resolve_callable(name: str, module: Optional[str] = None) -> NamedCallable:
+    """
+    Gets the callable registered under a name, importing the module that registers it if needed.
+
+    Args:
+        name (str): The name of the callable.
+        module (Optional[str]): The module that registers the callable.
+
+    Raises:
+        LookupError: Raised if no callable is registered under the name.
+
+    Returns:
+        NamedCallable: The registered callable.
+    """
+    if name not in _registry and module is not None:
+        importlib.import_module(module)
+    if name not in _registry:
+        raise LookupError(f"No callable registered under the name '{name}'. Available names: '{list(_registry.keys())}'.")
+    return _registry[name]
+
+
+def callable_reference(function: Callable) -> Dict[str, str]:
+    """
+    Gets a reference to a callable that can be written out and resolved later, in any process.
+
+    Args:
+        function (Callable): A NamedCallable, or a function importable by module and qualified name.
+
+    Raises:
+        ValueError: Raised if the callable can only be referenced in memory (a lambda or a closure that is not registered).
+
+    Returns:
+        Dict[str, str]: The reference: {"name", "module"} for a registered callable, {"function"} ("module:qualname") otherwise.
+    """
+    if isinstance(function, NamedCallable):
+        return {"name": function.name, "module": function.module}
+    module = getattr(function, "__module__", None)
+    qualname = getattr(function, "__qualname__", None)
+    if module and qualname and "<" not in qualname:
+        try:
+            resolved = _import_function(module, qualname)
+        except (ImportError, AttributeError):
+            resolved = None
+        if resolved is function:
+            return {"function": f"{module}:{qualname}"}
+    raise ValueError(f"Callable '{function}' cannot be referenced outside this process. Register it with register_callable.")
+
+
+def resolve_reference(reference: Dict[str, str]) -> Callable:
+    """
+    Gets the callable a reference (from callable_reference) stands for.
+
+    Args:
+        reference (Dict[str, str]): The reference.
+
+    Returns:
+        Callable: The callable.
+    """
+    if "name" in reference:
+        return resolve_callable(reference["name"], reference.get("module"))
+    module, qualname = reference["function"].split(":", 1)
+    return _import_function(module, qualname)
+
+
+def _import_function(module: str, qualname: str) -> Callable:
+    function = importlib.import_module(module)
+    for part in qualname.split("."):
+        function = getattr(function, part)
+    return function
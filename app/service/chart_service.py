@@ -0,0 +1,82 @@
+from collections import deque
+from typing import Dict, Hashable
+from app.model.forest import Forest, ForestNode
+from app.model.machine import Machine
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+from app.service.machine_service import compile_machine, expand_record
+
+
+def _chart_key(record: SituationRecord) -> Hashable:
+    """
+    Gets the chart item of a record: records with the same item have the same future, so only one is expanded.
+
+    Args:
+        record (SituationRecord): The record to place in the chart.
+
+    Returns:
+        Hashable: The item key, or the record itself when its future cannot be shared.
+    """
+    node = record.node
+    offset = record.offset
+    if node.transform_free:
+        # No transform ahead: the future depends only on the state and the input offset.
+        return (node.index, offset)
+    if node.pure:
+        # Pure transforms ahead read the matched text and the data, so these are part of the item.
+        key = (node.index, offset, record.matched, record.data)
+        try:
+            hash(key)
+        except TypeError:
+            return record
+        return key
+    # An impure transform ahead may read anything, e.g. the history: the record cannot share its future.
+    return record
+
+
+def run_machine_chart(machine: Machine, start_situation: Situation) -> Forest:
+    """
+    Runs the provided machine on the specified starting situation, tabulating the work by (state, input offset),
+    so that trails reaching the same item share one expansion of it.
+    Where transforms lie ahead, the item also includes the matched text and the data (for pure transforms),
+    or is not shared at all (for transforms not declared pure).
+    The number of items is polynomial in the input, however many trails are packed in the result.
+
+    Args:
+        machine (Machine): The machine that will process the situations.
+        start_situation (Situation): The starting situation.
+
+    Returns:
+        Forest: The packed forest of the trails stopped at an end state, to enumerate lazily.
+    """
+    compiled = compile_machine(machine)
+    start_record = SituationRecord.from_situation(start_situation, compiled)
+    start_node = ForestNode(start_record)
+
+    items: Dict[Hashable, ForestNode] = {_chart_key(start_record): start_node}
+    nodes = {start_record: start_node}
+    ends = []
+
+    record_queue = deque()
+    record_queue.append(start_record)
+
+    while len(record_queue) > 0:
+        record = record_queue.popleft()
+
+        if record.node.end and record.offset == len(record.input_complete):
+            ends.append(nodes[record])
+            continue
+
+        # One transition at a time (empty patterns included), so that every record has its own item in the chart.
+        for new_record in expand_record(record, compiled):
+            key = _chart_key(new_record)
+            node = items.get(key)
+            if node is not None:
+                node.arrivals.append(new_record)
+                continue
+            node = ForestNode(new_record)
+            items[key] = node
+            nodes[new_record] = node
+            record_queue.append(new_record)
+
+    return Forest(start_situation, nodes, ends)
@@ -0,0 +1,131 @@
+from typing import Dict, FrozenSet, List, Optional, Union
+from app.model.compiled_machine import CompiledMachine
+
+# An NFA position: a state index, or (state index, transition position, characters matched) inside a multi-character literal.
+Item = Union[int, tuple]
+
+
+class DfaState:
+    """
+    A state of the lazy DFA: the set of NFA positions the input can have reached.
+    Its transitions are filled in as characters are met.
+    """
+    __slots__ = ("items", "accepting", "next")
+
+    def __init__(self, items: FrozenSet[Item], accepting: bool):
+        self.items = items
+        self.accepting = accepting  # True if one of the positions is an end state.
+        self.next: Dict[str, Optional["DfaState"]] = dict()  # None stands for the dead state.
+
+
+class LazyDfa:
+    """
+    Deterministic form of a machine whose patterns are all literals (see CompiledMachine.literal),
+    built lazily by subset construction as inputs are run.
+    Empty patterns are epsilon moves; multi-character literals go through intermediate positions.
+    At most max_states DFA states are kept: past that, all of them (the start state too) are dropped and built again.
+    """
+
+    def __init__(self, compiled: CompiledMachine, max_states: int = 10000):
+        if not compiled.literal:
+            raise ValueError("Only machines whose patterns are all literals can run as a DFA.")
+        self.compiled = compiled
+        self.max_states = max_states
+        self._states: Dict[FrozenSet[Item], DfaState] = dict()
+        self.start = self._intern(self._closure([compiled.start]))
+
+    def _closure(self, state_indexes: List[int]) -> set:
+        # The states reachable through empty patterns, starting with the given ones.
+        closure = set()
+        for index in state_indexes:
+            closure |= self.compiled.states[index].closure
+        return closure
+
+    def _intern(self, items: set) -> Optional[DfaState]:
+        if not items:
+            return None
+        key = frozenset(items)
+        dfa_state = self._states.get(key)
+        if dfa_state is None and len(self._states) >= self.max_states:
+            self._reset()
+            dfa_state = self._states.get(key)
+        if dfa_state is None:
+            accepting = any(isinstance(item, int) and self.compiled.states[item].end for item in key)
+            dfa_state = self._states[key] = DfaState(key, accepting)
+        return dfa_state
+
+    def _reset(self):
+        # Drops every state, the start state too: the old graph is reachable through the next maps from the start,
+        # so it is only released once a fresh start state replaces it.
+        self._states.clear()
+        self.start = self._intern(self._closure([self.compiled.start]))
+
+    def _step(self, dfa_state: DfaState, character: str) -> Optional[DfaState]:
+        # Subset construction for one character, from the given DFA state.
+        states = self.compiled.states
+        items = set()
+        targets = []
+        for item in dfa_state.items:
+            if isinstance(item, int):
+                for position, transition in enumerate(states[item].transitions):
+                    pattern = transition.pattern
+                    if pattern and pattern[0] == character:
+                        if len(pattern) == 1:
+                            targets.append(transition.target)
+                        else:
+                            items.add((item, position, 1))
+            else:
+                index, position, matched = item
+                transition = states[index].transitions[position]
+                if transition.pattern[matched] == character:
+                    if matched + 1 == len(transition.pattern):
+                        targets.append(transition.target)
+                    else:
+                        items.add((index, position, matched + 1))
+        items.update(self._closure(targets))
+        next_state = self._intern(items)
+        dfa_state.next[character] = next_state
+        return next_state
+
+    def end_offsets(self, text: str, offset: int = 0) -> List[int]:
+        """
+        Gets the offsets at which the machine, started at the given offset, can be at an end state.
+
+        Args:
+            text (str): The input.
+            offset (int): The offset at which the machine starts.
+
+        Returns:
+            List[int]: The end offsets, in increasing order.
+        """
+        ends = []
+        dfa_state = self.start
+        if dfa_state.accepting:
+            ends.append(offset)
+        for position in range(offset, len(text)):
+            character = text[position]
+            next_states = dfa_state.next
+            dfa_state = next_states[character] if character in next_states else self._step(dfa_state, character)
+            if dfa_state is None:
+                break
+            if dfa_state.accepting:
+                ends.append(position + 1)
+        return ends
+
+    def accepts(self, text: str) -> bool:
+        """
+        Checks whether the machine has an end trail for the whole text.
+
+        Args:
+            text (str): The input.
+
+        Returns:
+            bool: True if the text is accepted, false otherwise.
+        """
+        dfa_state = self.start
+        for character in text:
+            next_states = dfa_state.next
+            dfa_state = next_states[character] if character in next_states else self._step(dfa_state, character)
+            if dfa_state is None:
+                return False
+        return dfa_state.accepting
@@ -0,0 +1,307 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+import re
+from typing import Any, Dict, List, Optional, Union
+from app.model.compiled_machine import CompiledMachine, CompiledState, CompiledTransition
+from app.model.lexicon import Lexicon
+from app.model.machine import Machine
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.callable_service import callable_reference, resolve_reference
+from app.service.machine_service import compile_machine, create_machine
+
+FORMAT = "escriba-machine"
+FORMAT_VERSION = 4  # Bump on any change to the artifact layout: artifacts of other versions are cache misses.
+
+
+def _reference(function: Optional[Any]) -> Optional[Dict[str, str]]:
+    return None if function is None else callable_reference(function)
+
+
+def _references(functions: Optional[List[Any]]) -> Optional[List[Dict[str, str]]]:
+    return None if functions is None else [callable_reference(function) for function in functions]
+
+
+def _resolve(reference: Optional[Dict[str, str]]) -> Optional[Any]:
+    return None if reference is None else resolve_reference(reference)
+
+
+def _resolve_all(references: Optional[List[Dict[str, str]]]) -> Optional[List[Any]]:
+    return None if references is None else [resolve_reference(reference) for reference in references]
+
+
+def _canonical(value: Any) -> Any:
+    # JSON form of state data and lexicon payloads for the fingerprint, tagged by type so that values that would save
+    # differently (a tuple and a list, 1 and 1.0, a dict and its items) never share a fingerprint.
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, int, float)):
+        return [type(value).__name__, value]
+    if isinstance(value, bytes):
+        return ["bytes", value.hex()]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [_canonical(item) for item in value]]
+    if isinstance(value, dict):
+        items = [[_canonical(key), _canonical(item)] for key, item in value.items()]
+        return ["dict", sorted(items, key=_canonical_text)]
+    if isinstance(value, (set, frozenset)):
+        return [type(value).__name__, sorted((_canonical(item) for item in value), key=_canonical_text)]
+    raise ValueError(
+        f"Cannot fingerprint a value of type '{type(value).__name__}': "
+        "state data and lexicon payloads of cached machines must be built from None, bool, int, float, str, bytes, "
+        "list, tuple, dict, set and frozenset."
+    )
+
+
+def _canonical_text(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+def _lexicon_items(lexicon: Optional[Lexicon]) -> Optional[List[list]]:
+    return None if lexicon is None else [[term, _canonical(payload)] for term, payload in lexicon.items()]
+
+
+def _transition_spec(transition: Union[Transition, dict]) -> list:
+    values = transition if isinstance(transition, dict) else transition.__dict__
+    transform = values.get("transform")
+    event = values.get("event")
+    lexicon = values.get("lexicon")
+    return [
+        values.get("name"),
+        values.get("pattern"),
+        values.get("state1_name"),
+        values.get("state2_name"),
+        None if transform is None else callable_reference(transform),
+        None if event is None else _references(event),
+        values.get("pure", False),
+        values.get("cost", 0.0),
+        None if lexicon is None else _lexicon_items(lexicon),
+    ]
+
+
+def _state_spec(state: Union[State, dict]) -> list:
+    values = state if isinstance(state, dict) else state.__dict__
+    return [
+        values.get("name"),
+        values.get("start"),
+        values.get("end"),
+        _canonical(values.get("data")),
+        _reference(values.get("process")),
+        _references(values.get("event")),
+        values.get("cost", 0.0),
+    ]
+
+
+def machine_fingerprint(transitions: List[Union[Transition, dict]], states: Dict[str, Union[State, dict]]) -> str:
+    """
+    Computes the content hash of the inputs of create_machine, which identifies the artifact saved for them.
+    Plain dicts are accepted, as well as models, so that a cache hit needs no model to be built.
+
+    Args:
+        transitions (List[Union[Transition, dict]]): The transitions of the machine.
+        states (Dict[str, Union[State, dict]]): The states of the machine.
+
+    Raises:
+        ValueError: Raised if some state data or lexicon payload is of a type that has no canonical form (see _canonical).
+
+    Returns:
+        str: The hexadecimal SHA-256 of the canonical form of the inputs (callables by reference, data tagged by type).
+    """
+    spec = [
+        FORMAT_VERSION,
+        [_transition_spec(transition) for transition in transitions],
+        [[name, _state_spec(state)] for name, state in states.items()],
+    ]
+    return hashlib.sha256(json.dumps(spec, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _pack_state(state: CompiledState) -> tuple:
+    # One row per state, with one row per outgoing transition; the indexes refer to transitions by position.
+    declared = state.state
+    return (
+        state.name, state.start, state.end, declared.data, _reference(declared.process), _references(declared.event), declared.cost,
+        state.transform_free, state.pure, state.live, state.min_remaining, state.max_remaining, tuple(sorted(state.closure)),
+        {character: tuple(t.position for t in candidates) for character, candidates in state.dispatch.items()},
+        tuple(t.position for t in state.always),
+        {pattern: tuple(t.position for t in candidates) for pattern, candidates in state.literals.items()},
+        state.literal_lengths,
+        tuple(t.position for t in state.epsilon),
+        tuple(
+            (
+                t.name, t.pattern, t.target, _reference(t.transform), _references(t.transition.event), t.transition.pure,
+                t.transition.cost, t.lexicon, t.literal, t.min_width, t.max_width, t.looks_back,
+            )
+            for t in state.transitions
+        ),
+    )
+
+
+def save_machine(machine: Machine, path: str, fingerprint: Optional[str] = None):
+    """
+    Saves the machine and its compiled form (graph, pattern sources, dispatch indexes, closures, bounds) as a pickle artifact:
+    a small header (format, version, fingerprint), then the states and transitions packed in rows of plain values.
+    Callables are saved as references (see callable_service.callable_reference), lexicons as they are (packed DAWG),
+    and state data and lexicon payloads with their types (a tuple loads as a tuple).
+
+    Args:
+        machine (Machine): The machine to save.
+        path (str): The path of the artifact. It is written to a temporary file first, then moved in place.
+        fingerprint (Optional[str]): The fingerprint of the inputs the machine was created from (see machine_fingerprint).
+
+    Raises:
+        ValueError: Raised if some state data or lexicon payload cannot be pickled.
+    """
+    compiled = compile_machine(machine)
+    payload = (compiled.start, compiled.literal, tuple(_pack_state(state) for state in compiled.states))
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as file:
+            pickle.dump((FORMAT, FORMAT_VERSION, fingerprint), file, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as error:
+        os.remove(temporary_path)
+        raise ValueError(f"Cannot save the machine: {error}.") from error
+    os.replace(temporary_path, path)
+
+
+def load_machine(path: str, fingerprint: Optional[str] = None) -> Optional[Machine]:
+    """
+    Loads a machine saved by save_machine, with its compiled form, without validating or compiling anything again
+    (models are built from their saved values directly, and only the regex patterns are compiled).
+    The header is read first, so that an artifact of another format, version or fingerprint is rejected without reading the rest.
+    Artifacts are pickles: only load those written by save_machine, from a trusted location.
+
+    Measured on a 50,000-transition machine (one state with 50,000 literals): a 2.8 MB artifact, loaded in about 0.2 s
+    (0.4 s for a cache hit of cached_create_machine, fingerprint included), against about 2 s to create the machine.
+
+    Args:
+        path (str): The path of the artifact.
+        fingerprint (Optional[str]): If given, the fingerprint the artifact must have been saved with.
+
+    Returns:
+        Optional[Machine]: The machine, or None if there is no artifact, or it has another format, version or fingerprint.
+    """
+    try:
+        with open(path, "rb") as file:
+            header = pickle.load(file)
+            if not isinstance(header, tuple) or header[:2] != (FORMAT, FORMAT_VERSION) or (fingerprint is not None and header[2] != fingerprint):
+                return None
+            start, literal, packed_states = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+
+    # The rebuild allocates a few objects per transition, none of them garbage: collecting while it runs only costs time.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        machine = _unpack_machine(start, literal, packed_states)
+    finally:
+        if collecting:
+            gc.enable()
+    return machine
+
+
+def _unpack_machine(start: int, literal: bool, packed_states: tuple) -> Machine:
+    # Rebuilds the machine and its compiled form from the rows of save_machine.
+    # Models are built as construct() does, from values known to be valid, without its per-field defaults and copies.
+    new = object.__new__
+    set_attribute = object.__setattr__
+    transition_fields = set(Transition.__fields__)
+    state_fields = set(State.__fields__)
+
+    states = dict()
+    for name, state_start, end, data, process, event, cost, *_ in packed_states:
+        state = new(State)
+        set_attribute(state, "__dict__", {
+            "name": name, "start": state_start, "end": end, "data": data, "process": _resolve(process), "event": _resolve_all(event), "cost": cost,
+        })
+        set_attribute(state, "__fields_set__", state_fields.copy())
+        states[name] = state
+    names = [packed[0] for packed in packed_states]
+    costs = [states[name].cost for name in names]
+
+    graph = dict()
+    compiled_states = []
+    for index, packed in enumerate(packed_states):
+        (name, state_start, end, _, _, _, _, transform_free, pure, live, min_remaining, max_remaining, closure,
+         dispatch, always, literals, literal_lengths, epsilon, packed_transitions) = packed
+        transitions = dict()
+        compiled_transitions = []
+        for position, (
+            transition_name, pattern, target, transform, event, transition_pure, cost, lexicon, transition_literal, min_width, max_width, looks_back,
+        ) in enumerate(packed_transitions):
+            if transform is not None:
+                transform = resolve_reference(transform)
+            transition = new(Transition)
+            set_attribute(transition, "__dict__", {
+                "name": transition_name, "pattern": pattern, "state1_name": name, "state2_name": names[target], "transform": transform,
+                "event": None if event is None else _resolve_all(event), "pure": transition_pure, "cost": cost, "lexicon": lexicon,
+            })
+            set_attribute(transition, "__fields_set__", transition_fields.copy())
+            transitions[transition_name] = transition
+            compiled_transitions.append(tuple.__new__(CompiledTransition, (
+                transition_name, position, pattern,
+                None if transition_literal or lexicon is not None else re.compile(pattern),
+                index, target, transform, transform is None or transition_pure, transition_literal, min_width, max_width, looks_back,
+                transition, lexicon, cost + costs[target],
+            )))
+        graph[name] = transitions
+
+        compiled_transitions = tuple(compiled_transitions)
+        compiled_states.append(CompiledState(
+            index=index,
+            name=name,
+            start=state_start,
+            end=end,
+            transitions=compiled_transitions,
+            dispatch={character: tuple(map(compiled_transitions.__getitem__, positions)) for character, positions in dispatch.items()},
+            always=tuple(map(compiled_transitions.__getitem__, always)),
+            literals={pattern: tuple(map(compiled_transitions.__getitem__, positions)) for pattern, positions in literals.items()},
+            literal_lengths=literal_lengths,
+            epsilon=tuple(map(compiled_transitions.__getitem__, epsilon)),
+            closure=frozenset(closure),
+            live=live,
+            min_remaining=min_remaining,
+            max_remaining=max_remaining,
+            transform_free=transform_free,
+            pure=pure,
+            state=states[name],
+        ))
+
+    machine = Machine.construct(graph=graph, states=states)
+    machine._compiled = CompiledMachine(
+        states=tuple(compiled_states),
+        state_index={state.name: state.index for state in compiled_states},
+        start=start,
+        literal=literal,
+    )
+    return machine
+
+
+def cached_create_machine(transitions: List[Union[Transition, dict]], states: Dict[str, Union[State, dict]], path: str) -> Machine:
+    """
+    Creates the machine (as create_machine), or loads it from the artifact at the path if it was saved for the same inputs.
+    A new artifact is saved when the inputs changed.
+
+    Args:
+        transitions (List[Union[Transition, dict]]): The transitions of the machine, as models or dicts.
+        states (Dict[str, Union[State, dict]]): The states of the machine, as models or dicts.
+        path (str): The path of the artifact.
+
+    Returns:
+        Machine: The machine, compiled.
+    """
+    fingerprint = machine_fingerprint(transitions, states)
+    machine = load_machine(path, fingerprint)
+    if machine is not None:
+        return machine
+
+    machine = create_machine(
+        [Transition(**transition) if isinstance(transition, dict) else transition for transition in transitions],
+        {name: State(**state) if isinstance(state, dict) else state for name, state in states.items()},
+    )
+    save_machine(machine, path, fingerprint)
+    return machine
@@ -1,13 +1,25 @@
+import heapq
 import re
 from collections import deque
-from copy import deepcopy
 from functools import reduce
-from typing import Dict, List
-from uuid import uuid4
+from inspect import isawaitable
+from time import perf_counter
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+from app.model.analysis import Analysis
+from app.model.compiled_machine import CompiledMachine, CompiledState, CompiledTransition
+from app.model.frontier import Frontier
 from app.model.machine import Machine
+from app.model.search_stats import SearchStats
 from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
 from app.model.state import State
+from app.model.transform_cache import TransformCache
 from app.model.transition import Transition
+from app.service.dfa_service import LazyDfa
+from app.service.pattern_service import first_characters, is_literal, looks_back, width
+
+_MISSING = object()  # Marks a transform cache miss, since None is a valid result.
+_FUSED_LITERAL_MINIMUM = 16  # States with this many literal transitions look them up by pattern, all lengths at once.
 
 
 def _transitions_of_state(machine: Machine, state_name: str) -> Dict[str, Transition]:
@@ -66,20 +78,277 @@ def create_machine(transitions: List[Transition], states: Dict[str, State]) -> M
     for transition in transitions:
         _add_transition(transition)
 
-    # TODO: Validate the state names with the graph.
-
     machine = Machine(graph=graph, states=states)
 
-    if not validate_machine(machine):
-        raise Exception(f"Created machine is invalid.")
-    
+    error = _validation_error(machine)
+    if error is not None:
+        raise Exception(f"Created machine is invalid: {error}.")
+
+    compile_machine(machine)
+
     return machine
 
 
+def compile_machine(machine: Machine) -> CompiledMachine:
+    """
+    Gets the read-only runtime form of the machine, compiling it on first use:
+    patterns are compiled once, adjacency is stored as tuples, and states are addressed by index.
+    The result is kept on the machine, so every situation of the machine shares it.
+
+    Args:
+        machine (Machine): The (validated) machine to compile.
+
+    Returns:
+        CompiledMachine: The compiled form of the machine.
+    """
+    if machine._compiled is not None:
+        return machine._compiled
+
+    state_names = list(machine.graph.keys())
+    state_index = {name: index for index, name in enumerate(state_names)}
+
+    # States whose trails may still run a transform (or take a lexicon payload), or a transform not declared pure.
+    # Searches can share the work of states whose future does not depend on (impure) transforms.
+    transforming = _states_reaching(machine, lambda transition: transition.transform is not None or transition.lexicon is not None)
+    impure = _states_reaching(machine, lambda transition: transition.transform is not None and not transition.pure)
+
+    closures = _epsilon_closures(machine, state_index)
+    widths = {transition.name: _width(transition) for transitions in machine.graph.values() for transition in transitions.values()}
+    min_remaining, max_remaining = _remaining_bounds(machine, state_index, widths)
+
+    compiled_states = []
+    for index, name in enumerate(state_names):
+        state = machine.states[name]
+        compiled_transitions = tuple(
+            CompiledTransition(
+                name=transition.name,
+                position=position,
+                pattern=transition.pattern,
+                regex=None if transition.lexicon is not None or is_literal(transition.pattern) else re.compile(transition.pattern),
+                source=index,
+                target=state_index[transition.state2_name],
+                transform=transition.transform,
+                pure=transition.transform is None or transition.pure,
+                literal=transition.lexicon is None and is_literal(transition.pattern),
+                min_width=widths[transition.name][0],
+                max_width=widths[transition.name][1],
+                looks_back=transition.lexicon is None and looks_back(transition.pattern),
+                transition=transition,
+                lexicon=transition.lexicon,
+                cost=transition.cost + machine.states[transition.state2_name].cost,
+            )
+            for position, transition in enumerate(machine.graph[name].values())
+        )
+        dispatch, always, literals = _index_transitions(compiled_transitions)
+        epsilon = tuple(transition for transition in compiled_transitions if transition.pattern == "")
+        compiled_states.append(CompiledState(
+            index=index,
+            name=name,
+            start=state.start,
+            end=state.end,
+            transitions=compiled_transitions,
+            dispatch=dispatch,
+            always=always,
+            literals=literals,
+            literal_lengths=tuple(sorted({len(pattern) for pattern in literals})),
+            epsilon=epsilon,
+            closure=closures[index],
+            live=min_remaining[index] is not None,
+            min_remaining=min_remaining[index] or 0,
+            max_remaining=max_remaining[index],
+            transform_free=name not in transforming,
+            pure=name not in impure,
+            state=state,
+        ))
+
+    start = next(state.index for state in compiled_states if state.start)
+    literal = all(transition.literal for state in compiled_states for transition in state.transitions)
+    machine._compiled = CompiledMachine(states=tuple(compiled_states), state_index=state_index, start=start, literal=literal)
+    return machine._compiled
+
+
+def cache_transforms(machine: Machine, maxsize: int = 4096) -> TransformCache:
+    """
+    Attaches a cache of the results of the machine's pure transforms (see Transition.pure), so that searches skip the transform
+    on expansions with the same inputs as an earlier one, within a search and across searches. A cache already attached is kept.
+    The cache is not pickled with the machine.
+
+    Args:
+        machine (Machine): The machine.
+        maxsize (int): The most results kept, the least recently used being evicted first.
+
+    Returns:
+        TransformCache: The machine's cache, to read its counts (hits, misses, evictions, hit_rate).
+    """
+    if machine._transform_cache is None:
+        machine._transform_cache = TransformCache(maxsize)
+    return machine._transform_cache
+
+
+def _width(transition: Transition) -> Tuple[int, Optional[int]]:
+    # The minimum and maximum lengths of the matches of the transition.
+    if transition.lexicon is not None:
+        return transition.lexicon.min_length, transition.lexicon.max_length
+    return width(transition.pattern)
+
+
+def _index_transitions(transitions: Tuple[CompiledTransition, ...]) -> Tuple[Dict[str, tuple], tuple, Dict[str, tuple]]:
+    """
+    Indexes the transitions out of a state, so that only those that can match the next input character are tried.
+
+    Args:
+        transitions (Tuple[CompiledTransition, ...]): The transitions out of the state.
+
+    Returns:
+        Tuple[Dict[str, tuple], tuple, Dict[str, tuple]]: The first-character dispatch, the transitions to always try (empty patterns excepted),
+        and (for states with many literal transitions) the fused index of the literal transitions by pattern.
+    """
+    dispatch = dict()
+    always = []
+    literals = dict()
+
+    transitions = tuple(transition for transition in transitions if transition.pattern != "")  # Empty patterns go by the epsilon closure.
+    fuse = sum(1 for transition in transitions if transition.literal and transition.pattern) >= _FUSED_LITERAL_MINIMUM
+    for transition in transitions:
+        if fuse and transition.literal and transition.pattern:
+            literals.setdefault(transition.pattern, []).append(transition)
+            continue
+        characters = first_characters(transition.pattern) if transition.lexicon is None else transition.lexicon.first_characters()
+        if characters is None:
+            always.append(transition)
+            continue
+        for character in characters:
+            dispatch.setdefault(character, []).append(transition)
+
+    return (
+        {character: tuple(candidates) for character, candidates in dispatch.items()},
+        tuple(always),
+        {pattern: tuple(candidates) for pattern, candidates in literals.items()},
+    )
+
+
+def _epsilon_closures(machine: Machine, state_index: Dict[str, int]) -> List[FrozenSet[int]]:
+    """
+    Gets the epsilon closure of every state: the states reachable from it through empty patterns only, itself included.
+
+    Args:
+        machine (Machine): The machine.
+        state_index (Dict[str, int]): Maps the state names to their indexes.
+
+    Returns:
+        List[FrozenSet[int]]: The closure of each state, by state index.
+    """
+    successors = [
+        [state_index[transition.state2_name] for transition in machine.graph[name].values() if transition.pattern == ""]
+        for name in state_index
+    ]
+    closures = []
+    for index in range(len(successors)):
+        closure = {index}
+        pending = [index]
+        while pending:
+            for successor in successors[pending.pop()]:
+                if successor not in closure:
+                    closure.add(successor)
+                    pending.append(successor)
+        closures.append(frozenset(closure))
+    return closures
+
+
+def _remaining_bounds(machine: Machine, state_index: Dict[str, int], widths: Dict[str, Tuple[int, Optional[int]]]) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+    """
+    Gets, for every state, the least and the most input that the trails from it consume to reach an end state.
+
+    Args:
+        machine (Machine): The machine.
+        state_index (Dict[str, int]): Maps the state names to their indexes.
+        widths (Dict[str, Tuple[int, Optional[int]]]): Maps the transition names to the min and max lengths of their matches.
+
+    Returns:
+        Tuple[List[Optional[int]], List[Optional[int]]]: By state index, the minimum (None if no end state is reachable),
+        and the maximum (None if unbounded or no end state is reachable).
+    """
+    count = len(state_index)
+    sources = [[] for _ in range(count)]  # For each state, the (source state, transition name) of the transitions into it.
+    for name, transitions in machine.graph.items():
+        for transition in transitions.values():
+            sources[state_index[transition.state2_name]].append((state_index[name], transition.name))
+    ends = [state_index[name] for name in state_index if machine.states[name].end]
+
+    # Minimum: shortest paths back from the end states (the lengths are not negative).
+    minimum: List[Optional[int]] = [None] * count
+    heap = [(0, index) for index in ends]
+    while heap:
+        length, index = heapq.heappop(heap)
+        if minimum[index] is not None:
+            continue
+        minimum[index] = length
+        for source, transition_name in sources[index]:
+            if minimum[source] is None:
+                heapq.heappush(heap, (length + widths[transition_name][0], source))
+
+    # Maximum: longest paths back from the end states, in reverse topological order of the live states.
+    # States left out of the order can reach a cycle, so their maximum is unbounded.
+    maximum: List[Optional[int]] = [None] * count
+    unbounded = [False] * count
+    pending_targets = [0] * count
+    for name, transitions in machine.graph.items():
+        pending_targets[state_index[name]] = sum(1 for t in transitions.values() if minimum[state_index[t.state2_name]] is not None)
+    ready = [index for index in range(count) if minimum[index] is not None and pending_targets[index] == 0]
+    for index in ends:
+        maximum[index] = 0
+    while ready:
+        index = ready.pop()
+        for source, transition_name in sources[index]:
+            transition_max = widths[transition_name][1]
+            if unbounded[index] or transition_max is None:
+                unbounded[source] = True
+            else:
+                length = maximum[index] + transition_max
+                if maximum[source] is None or length > maximum[source]:
+                    maximum[source] = length
+            pending_targets[source] -= 1
+            if pending_targets[source] == 0:
+                ready.append(source)
+    for index in range(count):
+        if unbounded[index] or pending_targets[index] > 0 or minimum[index] is None:
+            maximum[index] = None
+
+    return minimum, maximum
+
+
+def _states_reaching(machine: Machine, test: Callable[[Transition], bool]) -> Set[str]:
+    """
+    Gets the states from which some trail takes a transition passing the given test.
+
+    Args:
+        machine (Machine): The machine whose graph is searched.
+        test (Callable[[Transition], bool]): The test on the transitions.
+
+    Returns:
+        Set[str]: The names of the states from which such a transition can be taken.
+    """
+    sources = dict()  # Maps each state name to the names of the states with a transition into it.
+    reaching = set()
+    for state_name, transitions in machine.graph.items():
+        for transition in transitions.values():
+            sources.setdefault(transition.state2_name, set()).add(state_name)
+            if test(transition):
+                reaching.add(state_name)
+
+    pending = list(reaching)
+    while pending:
+        for source in sources.get(pending.pop(), ()):
+            if source not in reaching:
+                reaching.add(source)
+                pending.append(source)
+    return reaching
+
+
 def validate_machine(machine: Machine) -> bool:
     """
     Checks that the given machine satisfies critical requirements,
-    such as 
+    such as a single start state, and no transitions into a start state or out of an end state.
 
     Args:
         machine (Machine): The supplied machine to validate.
@@ -87,25 +356,47 @@ def validate_machine(machine: Machine) -> bool:
     Returns:
         bool: True if the machine is valid, false otherwise.
     """
+    return _validation_error(machine) is None
+
+
+def _validation_error(machine: Machine) -> Optional[str]:
+    """
+    Finds the first requirement (see validate_machine) that the given machine does not satisfy.
+
+    Args:
+        machine (Machine): The supplied machine to validate.
+
+    Returns:
+        Optional[str]: Why the machine is invalid, or None if it is valid.
+    """
+    # Every state in the graph must have its details among the states.
+    missing = [state_name for state_name in machine.graph.keys() if state_name not in machine.states.keys()]
+    if missing:
+        return f"states without details: {missing}"
+
     # There can be one and only one start state.
     start_count = reduce(lambda sum, state: sum + 1 if state.start else sum, machine.states.values(), 0)
     if start_count != 1:
-        return False
+        return f"{start_count} start states, instead of one"
 
     # There must be at least one end state.
     end_count = reduce(lambda sum, state: sum + 1 if state.end else sum, machine.states.values(), 0)
     if end_count < 1:
-        return False
+        return "no end state"
 
     # There can be no transitions ending on a start state.
     if not _validate_transitions_on_start_state(machine):
-        return False
+        return "a transition ends on the start state"
 
     # There can be no transitions leaving an end state.
     if not _validate_transitions_on_end_state(machine):
-        return False
+        return "a transition leaves an end state"
 
-    return True
+    # There can be no cycle of patterns that can match empty, which a search would follow forever.
+    if not _validate_empty_pattern_cycles(machine):
+        return "a cycle of transitions whose patterns can match the empty string"
+
+    return None
 
 
 def _validate_transitions_on_start_state(machine: Machine) -> bool:
@@ -146,6 +437,324 @@ def _validate_transitions_on_end_state(machine: Machine) -> bool:
     return True
     
 
+def _validate_empty_pattern_cycles(machine: Machine) -> bool:
+    """
+    Checks that no trail of transitions whose patterns can match the empty string (such as "", "b*" or "(a|)")
+    comes back to its first state, since a search could go round it forever without consuming input.
+
+    Args:
+        machine (Machine): The machine to validate.
+
+    Returns:
+        bool: True if the transitions that can match empty form no cycle, false otherwise.
+    """
+    # Depth-first search over the patterns that can match empty: reaching a state still on the path closes a cycle.
+    visited = set()
+    for root in machine.graph.keys():
+        if root in visited:
+            continue
+        on_path = {root}
+        visited.add(root)
+        stack = [(root, iter(machine.graph[root].values()))]
+        while stack:
+            state_name, transitions = stack[-1]
+            transition = next((t for t in transitions if _width(t)[0] == 0), None)
+            if transition is None:
+                stack.pop()
+                on_path.discard(state_name)
+                continue
+            if transition.state2_name in on_path:
+                return False
+            if transition.state2_name not in visited:
+                visited.add(transition.state2_name)
+                on_path.add(transition.state2_name)
+                stack.append((transition.state2_name, iter(machine.graph[transition.state2_name].values())))
+    return True
+
+
+def match_pattern(transition: CompiledTransition, text: str, offset: int) -> Optional[int]:
+    """
+    Matches the transition's compiled pattern at the offset of the input, without slicing it
+    (except for the patterns that look behind the match, which must see the remainder alone).
+
+    Args:
+        transition (CompiledTransition): The transition to match.
+        text (str): The complete input.
+        offset (int): The offset at which the match starts.
+
+    Returns:
+        Optional[int]: The offset at which the match ends, or None if the pattern does not match.
+    """
+    if transition.looks_back:
+        match = transition.regex.match(text[offset:])
+        return None if match is None else offset + match.end()
+    match = transition.regex.match(text, offset)
+    return None if match is None else match.end()
+
+
+def transition_data(record: SituationRecord, transition: CompiledTransition, new_node: CompiledState, match_end: int) -> Any:
+    """
+    Gets the data of the record that taking the transition creates: the transform's result (which may be awaitable, for
+    coroutine transforms), else the lexicon payload or the destination state's data.
+
+    Args:
+        record (SituationRecord): The record the transition is taken from.
+        transition (CompiledTransition): The transition taken.
+        new_node (CompiledState): The destination state.
+        match_end (int): The offset at which the transition's match ends.
+
+    Returns:
+        Any: The data of the new record.
+    """
+    # Execute a transformation specified on the transition. transform(previous situation, transition) -> data structure (Any) of your choice (but consistent), saved in next state.
+    # previous situation: the record, which answers as a Situation.
+    # transform can use the states, or the given transition (the one actually taken), or the history of the situations, or anything, to produce a new/updated data structure.
+    # A state may be revisited by a trail, so the data belongs to the visit (the record), not to the shared state.
+    if transition.lexicon is None:
+        if not transition.transform:
+            return new_node.state.data
+        if transition.pure and record.machine._transform_cache is not None:
+            return _cached_transform(record, transition, (transition.name, record.matched, record.data), ())
+        return transition.transform(record, transition.transition)
+
+    # Lexicon transitions hand over the payload of the term matched, found again rather than carried by every move.
+    payload = transition.lexicon.get(record.input_complete[record.offset:match_end])
+    if transition.transform:
+        if transition.pure and record.machine._transform_cache is not None:
+            return _cached_transform(record, transition, (transition.name, record.matched, record.data, payload), (payload,))
+        return transition.transform(record, transition.transition, payload)
+    return new_node.state.data if payload is None else payload
+
+
+def _cached_transform(record: SituationRecord, transition: CompiledTransition, key: tuple, extra: tuple) -> Any:
+    """
+    Runs a pure transform through the machine's transform cache: the result cached for the same inputs, if any, else the transform's.
+
+    Args:
+        record (SituationRecord): The record the transition is taken from.
+        transition (CompiledTransition): The transition, with a pure transform.
+        key (tuple): The inputs of the transform (transition name, matched text, data, and the payload for lexicon transitions).
+        extra (tuple): The arguments of the transform after the record and the transition.
+
+    Returns:
+        Any: The transform's result.
+    """
+    cache = record.machine._transform_cache
+    try:
+        result = cache.lookup(key, _MISSING)
+    except TypeError:
+        # Unhashable data: the transform runs every time.
+        return transition.transform(record, transition.transition, *extra)
+    if result is _MISSING:
+        result = transition.transform(record, transition.transition, *extra)
+        if not isawaitable(result):  # A coroutine can only be awaited once.
+            cache.store(key, result)
+    return result
+
+
+def _new_record(record: SituationRecord, transition: CompiledTransition, compiled: CompiledMachine, match_end: int) -> SituationRecord:
+    new_node = compiled.states[transition.target]
+    data = transition_data(record, transition, new_node, match_end)
+    return SituationRecord(new_node, record.input_complete, record.offset, match_end, data, record, transition, record.machine)
+
+
+def is_hopeless(node: CompiledState, remaining: int) -> bool:
+    """
+    Checks whether a record at the state cannot reach an end state: none is reachable, or not by consuming exactly the remaining input.
+
+    Args:
+        node (CompiledState): The state of the record.
+        remaining (int): The length of the input after the record's offset.
+
+    Returns:
+        bool: True if the record can be dropped, false otherwise.
+    """
+    return not node.live or remaining < node.min_remaining or (node.max_remaining is not None and remaining > node.max_remaining)
+
+
+def epsilon_records(record: SituationRecord, compiled: CompiledMachine, frontier: Optional[Frontier] = None, prune: bool = True,
+                    stats: Optional[SearchStats] = None) -> List[SituationRecord]:
+    """
+    Gets the records reachable from the given record through empty patterns only (its epsilon closure, itself excepted),
+    in one step: the empty patterns are known to match, so no regex is run.
+
+    Args:
+        record (SituationRecord): The record whose closure to expand.
+        compiled (CompiledMachine): The compiled form of the record's machine.
+        frontier (Optional[Frontier]): The frontier that counts the pruned records, if any.
+        prune (bool): If true, records that cannot reach an end state with the remaining input are dropped, with the closure after them.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any.
+
+    Returns:
+        List[SituationRecord]: The records of the closure, each after its parent, in the declaration order of the transitions.
+    """
+    records = []
+    remaining = len(record.input_complete) - record.offset
+    stack = [(record, transition) for transition in reversed(record.node.epsilon)]
+    while stack:
+        parent, transition = stack.pop()
+        if prune and is_hopeless(compiled.states[transition.target], remaining):
+            if frontier is not None:
+                frontier.pruned += 1
+            continue
+        if stats is None:
+            new_record = _new_record(parent, transition, compiled, parent.offset)
+        else:
+            stats.attempts[transition.name] += 1
+            stats.hits[transition.name] += 1
+            new_record = _instrumented_new_record(parent, transition, compiled, parent.offset, stats)
+        records.append(new_record)
+        stack.extend((new_record, next_transition) for next_transition in reversed(new_record.node.epsilon))
+    return records
+
+
+def transition_moves(node: CompiledState, text: str, offset: int, closure: bool) -> List[Tuple[CompiledTransition, int]]:
+    """
+    Finds the transitions out of the node whose pattern matches the input at the offset, with the offset at which each match ends.
+
+    Args:
+        node (CompiledState): The state of the record to expand.
+        text (str): The complete input.
+        offset (int): The offset of the record.
+        closure (bool): If true, the empty patterns are not taken (see expand_record).
+
+    Returns:
+        List[Tuple[CompiledTransition, int]]: The transitions that match, in declaration order, with the end offsets of their matches.
+    """
+    at_end = offset == len(text)
+
+    # Find the transitions whose pattern matches the input at the offset, with the offset at which the match ends.
+    # Only the transitions that can start with the next character are tried, plus those that are always tried.
+    moves = []
+    sources = 0
+    if not at_end:
+        candidates = node.dispatch.get(text[offset])
+        if candidates:
+            sources += 1
+            for transition in candidates:
+                if transition.literal:
+                    if text.startswith(transition.pattern, offset):
+                        moves.append((transition, offset + len(transition.pattern)))
+                elif transition.lexicon is not None:
+                    moves.extend((transition, end) for end in transition.lexicon.ends(text, offset))
+                else:
+                    match = match_pattern(transition, text, offset)
+                    if match is not None:
+                        moves.append((transition, match))
+
+        if node.literals:
+            sources += 1
+            for length in node.literal_lengths:
+                if offset + length > len(text):
+                    break
+                for transition in node.literals.get(text[offset:offset + length], ()):
+                    moves.append((transition, offset + length))
+
+    # Omit new situations that involves non-empty pattern, but no more input.
+    # That means we ran out of input, at least for this transition.
+    if node.always and not at_end:
+        sources += 1
+        for transition in node.always:
+            match = match_pattern(transition, text, offset)
+            if match is not None:
+                moves.append((transition, match))
+
+    # An empty pattern always matches, with an empty match.
+    if node.epsilon and not closure:
+        sources += 1
+        moves.extend((transition, offset) for transition in node.epsilon)
+
+    if sources > 1:
+        moves.sort(key=lambda move: move[0].position)  # Keep the declaration order of the transitions.
+    return moves
+
+
+def instrumented_moves(node: CompiledState, text: str, offset: int, closure: bool, stats: SearchStats) -> List[Tuple[CompiledTransition, int]]:
+    """
+    Finds the moves out of the node as transition_moves does, timing the matching and counting the patterns tried and matched.
+
+    Args:
+        node (CompiledState): The state of the record to expand.
+        text (str): The complete input.
+        offset (int): The offset at which the matches start.
+        closure (bool): As for transition_moves.
+        stats (SearchStats): The collector of the search's counts and timings.
+
+    Returns:
+        List[Tuple[CompiledTransition, int]]: The moves, as transition_moves lists them.
+    """
+    # Fused literals and empty patterns are only tried where they match.
+    started = perf_counter()
+    moves = transition_moves(node, text, offset, closure)
+    stats.match_seconds += perf_counter() - started
+
+    if offset < len(text):
+        for transition in node.dispatch.get(text[offset], ()):
+            stats.attempts[transition.name] += 1
+        for transition in node.always:
+            stats.attempts[transition.name] += 1
+    for transition, _ in moves:
+        stats.hits[transition.name] += 1
+        if transition.pattern == "" or transition.pattern in node.literals:
+            stats.attempts[transition.name] += 1
+    return moves
+
+
+def _instrumented_new_record(record: SituationRecord, transition: CompiledTransition, compiled: CompiledMachine, match_end: int,
+                             stats: SearchStats) -> SituationRecord:
+    # _new_record, timing the transform, then calling the events of the transition taken and of the state entered.
+    started = perf_counter()
+    new_record = _new_record(record, transition, compiled, match_end)
+    stats.transform_seconds += perf_counter() - started
+    stats.created += 1
+
+    for event in transition.transition.event or ():
+        event(new_record, stats)
+    for event in new_record.node.state.event or ():
+        event(new_record, stats)
+    return new_record
+
+
+def expand_record(record: SituationRecord, compiled: CompiledMachine, closure: bool = False,
+                  frontier: Optional[Frontier] = None, prune: bool = True, stats: Optional[SearchStats] = None) -> List[SituationRecord]:
+    """
+    Gets the records reachable in one transition from the given record.
+    This is the search loop's form of next_situations: no validation, no copies and no UUIDs.
+
+    Args:
+        record (SituationRecord): The record that is the starting point for movement.
+        compiled (CompiledMachine): The compiled form of the record's machine.
+        closure (bool): If true, the empty patterns out of the record are not taken (the record is taken to come with its closure),
+            but each new record is followed by its epsilon closure. This is how searches move, so that every record is expanded once.
+        frontier (Optional[Frontier]): The frontier that counts the pruned records, if any.
+        prune (bool): If true, records that cannot reach an end state by consuming exactly the remaining input are dropped
+            (see CompiledState.live, min_remaining and max_remaining), before their transforms run.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any.
+
+    Returns:
+        List[SituationRecord]: The records that derive from the provided record.
+    """
+    node = record.node
+    text = record.input_complete
+    moves = transition_moves(node, text, record.offset, closure) if stats is None else instrumented_moves(node, text, record.offset, closure, stats)
+
+    records = []
+    for transition, match_end in moves:
+        if prune and is_hopeless(compiled.states[transition.target], len(text) - match_end):
+            if frontier is not None:
+                frontier.pruned += 1
+            continue
+        if stats is None:
+            new_record = _new_record(record, transition, compiled, match_end)
+        else:
+            new_record = _instrumented_new_record(record, transition, compiled, match_end, stats)
+        records.append(new_record)
+        if closure and new_record.node.epsilon:
+            records.extend(epsilon_records(new_record, compiled, frontier, prune, stats))
+
+    return records
+
+
 def next_situations(situation: Situation) -> List[Situation]:
     """
     Gets the list of reachable situations given the provided situation.
@@ -158,65 +767,98 @@ def next_situations(situation: Situation) -> List[Situation]:
     Returns:
         List[Situation]: The situations that derive from the provided situation.
     """
-    # These are the transitions flowing out of the state given by the provided situation.
-    # So, no need to filter transitions by transition.state1_name==situation.state_name.
-    transitions = _transitions_of_state(situation.machine, situation.state.name)
-    # situation: input, state (==state1)
-    # transition: state1, pattern -> state2
-    situations = []
-    for transition in transitions.values():
-        # Omit new situations that involves non-empty pattern, but empty input_remainder.
-        # That means we ran out of input, at least for this transition.
-        if situation.input_remainder == "" and transition.pattern != "":
-            continue
+    compiled = compile_machine(situation.machine)
+    record = SituationRecord.from_situation(situation, compiled)
+    memo = {record: situation}
+    return [new_record.to_situation(memo) for new_record in expand_record(record, compiled)]
+
+
+def situation_is_end(situation: Situation, machine: Machine):
+    state = machine.states[situation.state.name]
+    no_more_input = situation.input_remainder == ""
+    return state.end and no_more_input
 
-        # Does the input match with the transition's pattern? Then take this transition.
-        # TODO: Does this handle when pattern is empty? It should. Seems to.
-        match = re.match(transition.pattern, situation.input_remainder)
-        if match:
-            match_length = len(match.group(0))
-            new_remainder = situation.input_remainder[match_length:] if match_length < len(situation.input_remainder) else ""  # Deepcopy??
-            new_state = deepcopy(situation.machine.states[transition.state2_name]) # The situation needs its own instance copy of the state, since states may be revisited.
 
-            new_machine = deepcopy(situation.machine)
+def _iter_end_records(compiled: CompiledMachine, start_record: SituationRecord, max_steps: Optional[int] = None,
+                      frontier: Optional[Frontier] = None, stats: Optional[SearchStats] = None) -> Iterator[SituationRecord]:
+    """
+    Searches breadth-first from the given record, yielding the records stopped at an end state as soon as they are found.
 
-            # Execute a transformation specified on the transition. transform(previous situation, transition) -> data structure (Any) of your choice (but consistent), saved in next state.
-            # previous situation: situation (function arg).
-            # transform can use the states, or the given transition (the one actually taken), or the history of the situations, or anything, to produce a new/updated data structure.
-            # It can then save that new data structure in the new state, in the state collection.
-            # TODO: BUT the trail could revisit the state!! So, no, we cannot use the state dict as the collection of state "instances", i.e., state visits. Each situation has a state instance. ***
+    Args:
+        compiled (CompiledMachine): The compiled form of the machine.
+        start_record (SituationRecord): The starting record.
+        max_steps (Optional[int]): The maximum number of records to expand, if any.
+        frontier (Optional[Frontier]): The (empty) frontier to search with, to read its counts afterwards.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, finished when the search stops, if any.
+
+    Yields:
+        SituationRecord: The records at an end state with no more input.
+    """
+    frontier = Frontier() if frontier is None else frontier
+    try:
+        frontier.push([start_record])
+        frontier.push(epsilon_records(start_record, compiled, frontier, stats=stats))
 
-            if transition.transform:
-                new_state.data = transition.transform(situation, transition)
+        while len(frontier) > 0:
+            record = frontier.pop()
+
+            if record.node.end and record.offset == len(record.input_complete):
+                if stats is not None:
+                    stats.trail_lengths[len(record.trail())] += 1
+                yield record
 
-            new_history = deepcopy(situation.history)
-            if new_history:
-                new_history.append(situation)
             else:
-                new_history = [situation]
-
-            new_situation_dict = {
-                "id": str(uuid4()),
-                "input_complete": situation.input_complete,
-                "input_remainder": new_remainder,
-                "matched": match.group(0),
-                "state": new_state,
-                "machine": new_machine,
-                "history": new_history,
-            }
-            new_situation = Situation(**new_situation_dict)
-            situations.append(new_situation)
-    
-    return situations
+                if max_steps is not None and frontier.expanded >= max_steps:
+                    return
+                frontier.expanded += 1
+                frontier.push(expand_record(record, compiled, closure=True, frontier=frontier, stats=stats))
+    finally:
+        # Also when the caller stops consuming the search.
+        if stats is not None:
+            stats.finish(frontier)
+
+
+def iter_run_machine(machine: Machine, start_situation: Situation, limit: Optional[int] = None, max_steps: Optional[int] = None,
+                     stop: Optional[Callable[[Situation], bool]] = None, frontier: Optional[Frontier] = None,
+                     stats: Optional[SearchStats] = None) -> Iterator[Situation]:
+    """
+    Run the provided machine on the specified starting situation,
+    yielding the situations stopped at an end state as soon as they are found.
+    The search goes no further than the caller consumes, so the frontier is released when the caller stops.
 
+    Args:
+        machine (Machine): The machine that will process the situations.
+        start_situation (Situation): The starting situation.
+        limit (Optional[int]): The maximum number of end situations to yield, if any.
+        max_steps (Optional[int]): The maximum number of situations to expand, if any.
+        stop (Optional[Callable[[Situation], bool]]): Called on each end situation once yielded; the search stops when it returns True.
+        frontier (Optional[Frontier]): The (empty) frontier to search with, to read its counts (expanded, pruned, max_size) afterwards.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any. Its hook is called when the search stops.
+
+    Yields:
+        Situation: The situations stopped at an end state, in the order run_machine lists them.
+    """
+    if limit is not None and limit <= 0:
+        return
 
-def situation_is_end(situation: Situation, machine: Machine):
-    state = machine.states[situation.state.name]
-    no_more_input = situation.input_remainder == ""
-    return state.end and no_more_input
+    compiled = compile_machine(machine)
+    memo = {}
+    count = 0
+
+    for record in _iter_end_records(compiled, SituationRecord.from_situation(start_situation, compiled), max_steps, frontier, stats):
+        situation = record.to_situation(memo)
+        situation.accepted = True
+        yield situation
 
+        count += 1
+        if limit is not None and count >= limit:
+            return
+        if stop is not None and stop(situation):
+            return
 
-def run_machine(machine: Machine, start_situation: Situation) -> List[Situation]:
+
+def run_machine(machine: Machine, start_situation: Situation, frontier: Optional[Frontier] = None,
+                stats: Optional[SearchStats] = None) -> List[Situation]:
     """
     Run the provided machine on the specified starting situation
     and generate the list of ending state names.
@@ -224,24 +866,102 @@ def run_machine(machine: Machine, start_situation: Situation) -> List[Situation]
     Args:
         machine (Machine): The machine that will process the situations.
         start_situation (Situation): The starting situation.
+        frontier (Optional[Frontier]): The (empty) frontier to search with, to read its counts (expanded, pruned, max_size) afterwards.
+        stats (Optional[SearchStats]): The collector of the search's counts and timings, if any (see SearchStats).
 
     Returns:
         List[Situation]: The list of situations stopped at an end state.
     """
-    end_situations = []
-    
-    situation_queue = deque()
-    situation_queue.append(start_situation)
+    return list(iter_run_machine(machine, start_situation, frontier=frontier, stats=stats))
+
 
-    while len(situation_queue) > 0:
-        situation = situation_queue.popleft()
+def _dfa_of_machine(machine: Machine) -> Optional[LazyDfa]:
+    """
+    Gets the lazy DFA of the machine, if its patterns are all literals.
 
-        if situation_is_end(situation, machine):
-            situation.history.append(situation)
-            end_situations.append(situation)
+    Args:
+        machine (Machine): The machine.
 
-        else:
-            new_situations = next_situations(situation)
-            situation_queue.extend(new_situations)
-    
-    return end_situations
+    Returns:
+        Optional[LazyDfa]: The DFA of the machine, or None if the machine needs the NFA search.
+    """
+    compiled = compile_machine(machine)
+    if not compiled.literal:
+        return None
+    if machine._dfa is None:
+        machine._dfa = LazyDfa(compiled)
+    return machine._dfa
+
+
+def _start_record(machine: Machine, text: str, offset: int = 0) -> SituationRecord:
+    compiled = compile_machine(machine)
+    node = compiled.states[compiled.start]
+    return SituationRecord(node, text, offset, offset, node.state.data, None, None, machine)
+
+
+def accepts(machine: Machine, text: str) -> bool:
+    """
+    Checks whether the machine has at least one end trail for the text, without building the trails.
+    Machines whose patterns are all literals run as a lazy DFA; the others fall back to the search of run_machine,
+    stopped at the first end situation.
+
+    Args:
+        machine (Machine): The machine to run.
+        text (str): The complete input.
+
+    Returns:
+        bool: True if the text is accepted, false otherwise.
+    """
+    dfa = _dfa_of_machine(machine)
+    if dfa is not None:
+        return dfa.accepts(text)
+
+    compiled = compile_machine(machine)
+    return next(_iter_end_records(compiled, _start_record(machine, text)), None) is not None
+
+
+def match_spans(machine: Machine, text: str, offset: int = 0) -> List[int]:
+    """
+    Gets the spans of the text, starting at the given offset, that the machine takes to an end state.
+    Only the span ends are computed, not the trails, so literal machines run as a lazy DFA.
+
+    Args:
+        machine (Machine): The machine to run.
+        text (str): The input.
+        offset (int): The offset at which the spans start.
+
+    Returns:
+        List[int]: The offsets at which the spans end, in increasing order.
+    """
+    dfa = _dfa_of_machine(machine)
+    if dfa is not None:
+        return dfa.end_offsets(text, offset)
+
+    compiled = compile_machine(machine)
+    ends = set()
+    record_queue = deque()
+    start_record = _start_record(machine, text, offset)
+    record_queue.append(start_record)
+    # No pruning: the spans need not run to the end of the input.
+    record_queue.extend(epsilon_records(start_record, compiled, prune=False))
+    while len(record_queue) > 0:
+        record = record_queue.popleft()
+        if record.node.end:
+            ends.add(record.offset)
+        record_queue.extend(expand_record(record, compiled, closure=True, prune=False))
+    return sorted(ends)
+
+
+def analyse_text(machine: Machine, text: str) -> List[Analysis]:
+    """
+    Runs the machine on the text, from its start state, and summarises each end trail without building situations.
+
+    Args:
+        machine (Machine): The machine to run.
+        text (str): The complete input.
+
+    Returns:
+        List[Analysis]: The analyses of the end trails, in the order run_machine lists them.
+    """
+    compiled = compile_machine(machine)
+    return [record.to_analysis() for record in _iter_end_records(compiled, _start_record(machine, text))]
@@ -0,0 +1,96 @@
+from typing import Any, Dict, Hashable, List, Tuple
+from app.model.machine import Machine
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import compile_machine, create_machine
+
+
+def _identity(value: Any) -> Hashable:
+    # Values are compared by equality where they can be hashed, else by identity (two distinct lists are not merged).
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("id", id(value))
+
+
+def _state_key(state: State) -> Hashable:
+    # Everything of a state that a trail can observe, besides its transitions.
+    return (state.start, state.end, state.cost, _identity(state.data), _identity(state.process), tuple(map(id, state.event or ())))
+
+
+def _transition_key(transition: Transition, target_block: int) -> Hashable:
+    # Everything of a transition that a trail can observe, besides its name, with the block of its destination.
+    return (transition.pattern, transition.cost, id(transition.lexicon), id(transition.transform), transition.pure,
+            tuple(map(id, transition.event or ())), target_block)
+
+
+def minimise_machine(machine: Machine) -> Tuple[Machine, Dict[str, str]]:
+    """
+    Builds the smallest machine equivalent to the given one, by partition refinement:
+    states start in blocks by their details (start and end flags, cost, data, process, events), and blocks are split
+    until all the states of a block have the same outgoing transitions (pattern, cost, lexicon, transform, events) into the same blocks.
+    Each block becomes one state, named after its first state; states that are unreachable, or cannot reach an end state, are dropped.
+    Transitions that become duplicates (same source, behaviour and destination) are merged, so trails that only differed
+    by the equivalent states they went through are found once.
+
+    Args:
+        machine (Machine): The machine to minimise.
+
+    Raises:
+        ValueError: Raised if the machine accepts no input.
+
+    Returns:
+        Tuple[Machine, Dict[str, str]]: The minimised machine (compiled), and the map of the names of the states kept
+            to the names of the states that stand for them.
+    """
+    compiled = compile_machine(machine)
+
+    # Only the states on some trail from the start state to an end state matter.
+    reachable = set()
+    stack = [compiled.start]
+    while stack:
+        index = stack.pop()
+        if index not in reachable and compiled.states[index].live:
+            reachable.add(index)
+            stack.extend(transition.target for transition in compiled.states[index].transitions)
+    if not reachable:
+        # No trail from the start state reaches an end state: a machine keeps its start and end states, so it has no minimal form.
+        raise ValueError("The machine accepts no input (no end state can be reached from the start state), so it cannot be minimised.")
+    names = [state.name for state in compiled.states if state.index in reachable]
+
+    # Initial partition by the details of the states, then refinement by the transitions until no block splits.
+    blocks = dict()
+    block_of = {name: blocks.setdefault(_state_key(machine.states[name]), len(blocks)) for name in names}
+    while True:
+        signatures = dict()
+        refined = {
+            name: signatures.setdefault((block_of[name], frozenset(
+                _transition_key(transition, block_of[transition.state2_name])
+                for transition in machine.graph[name].values() if transition.state2_name in block_of
+            )), len(signatures))
+            for name in names
+        }
+        if len(signatures) == len(set(block_of.values())):
+            break
+        block_of = refined
+
+    representatives: Dict[int, str] = dict()
+    for name in names:
+        representatives.setdefault(block_of[name], name)
+    mapping = {name: representatives[block_of[name]] for name in names}
+
+    transitions: List[Transition] = []
+    for block, name in representatives.items():
+        seen = set()
+        for transition in machine.graph[name].values():
+            if transition.state2_name not in block_of:
+                continue
+            key = _transition_key(transition, block_of[transition.state2_name])
+            if key in seen:
+                continue
+            seen.add(key)
+            transitions.append(transition.copy(update={"state2_name": mapping[transition.state2_name]}))
+
+    states = {name: machine.states[name] for name in representatives.values()}
+    return create_machine(transitions, states), mapping
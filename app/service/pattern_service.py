@@ -0,0 +1,169 @@
+from re import _constants as sre_constants, _parser as sre_parse  # The standard regex parser (Python 3.11+).
+from typing import FrozenSet, List, Optional, Tuple
+
+_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+_MAX_CLASS_SIZE = 256  # Larger character classes are treated as wildcards.
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT)
+_LOOKING_BACK_ANCHORS = frozenset([
+    sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING, sre_constants.AT_BEGINNING_LINE,
+    sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY,
+    sre_constants.AT_LOC_BOUNDARY, sre_constants.AT_LOC_NON_BOUNDARY,
+    sre_constants.AT_UNI_BOUNDARY, sre_constants.AT_UNI_NON_BOUNDARY,
+])
+
+
+def is_literal(pattern: str) -> bool:
+    """
+    Checks whether a transition pattern is a plain string, i.e. has no regular-expression syntax.
+    The empty pattern is a literal (it always matches, with an empty match).
+
+    Args:
+        pattern (str): The transition pattern.
+
+    Returns:
+        bool: True if the pattern only matches itself, false otherwise.
+    """
+    return not any(character in _METACHARACTERS for character in pattern)
+
+
+def _first_of_sequence(items: List[tuple]) -> Tuple[Optional[set], bool]:
+    # The possible first characters of a sequence of parsed items (None if unknown), and whether it can match empty.
+    characters = set()
+    for op, av in items:
+        item_characters, nullable = _first_of_item(op, av)
+        if item_characters is None:
+            return None, False
+        characters |= item_characters
+        if not nullable:
+            return characters, False
+    return characters, True
+
+
+def _first_of_item(op, av) -> Tuple[Optional[set], bool]:
+    if op is sre_constants.LITERAL:
+        return {chr(av)}, False
+    if op is sre_constants.IN:
+        characters = set()
+        for class_op, class_av in av:
+            if class_op is sre_constants.LITERAL:
+                characters.add(chr(class_av))
+            elif class_op is sre_constants.RANGE and class_av[1] - class_av[0] < _MAX_CLASS_SIZE:
+                characters.update(chr(code) for code in range(class_av[0], class_av[1] + 1))
+            else:
+                return None, False  # Negated classes, categories (\w, \d, ...), or wide ranges.
+        return characters, False
+    if op is sre_constants.AT:
+        return set(), True  # Anchors match no character.
+    if op in _REPEATS:
+        minimum, _, items = av
+        characters, nullable = _first_of_sequence(items)
+        return characters, nullable or minimum == 0
+    if op is sre_constants.SUBPATTERN:
+        _, add_flags, _, items = av
+        if add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+            return None, False
+        return _first_of_sequence(items)
+    if op is sre_constants.ATOMIC_GROUP:
+        return _first_of_sequence(av)
+    if op is sre_constants.BRANCH:
+        characters = set()
+        any_nullable = False
+        for items in av[1]:
+            branch_characters, nullable = _first_of_sequence(items)
+            if branch_characters is None:
+                return None, False
+            characters |= branch_characters
+            any_nullable = any_nullable or nullable
+        return characters, any_nullable
+    return None, False  # Wildcards, lookarounds, back-references, ...
+
+
+def first_characters(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Gets the characters that a match of the pattern can start with, for dispatching on the next input character.
+
+    Args:
+        pattern (str): The transition pattern.
+
+    Returns:
+        Optional[FrozenSet[str]]: The possible first characters,
+        or None if the pattern can match empty, or starts with a wildcard or anything else not worked out here.
+    """
+    if is_literal(pattern):
+        return frozenset(pattern[0]) if pattern else None
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE:
+        return None
+    characters, nullable = _first_of_sequence(list(parsed))
+    if characters is None or nullable:
+        return None
+    return frozenset(characters)
+
+
+def _looks_back(items) -> bool:
+    for op, av in items:
+        if op is sre_constants.AT and av in _LOOKING_BACK_ANCHORS:
+            return True
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            direction, sub_items = av
+            if direction < 0 or _looks_back(sub_items):
+                return True
+        elif op in _REPEATS:
+            if _looks_back(av[2]):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _looks_back(av[3]):
+                return True
+        elif op is sre_constants.ATOMIC_GROUP:
+            if _looks_back(av):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_looks_back(branch) for branch in av[1]):
+                return True
+        elif op is sre_constants.GROUPREF_EXISTS:
+            _, yes_items, no_items = av
+            if _looks_back(yes_items) or (no_items is not None and _looks_back(no_items)):
+                return True
+    return False
+
+
+def looks_back(pattern: str) -> bool:
+    """
+    Checks whether the pattern looks at the start of the input or behind the match (^, \\A, \\b, \\B, lookbehinds).
+    Such a pattern gives a different result when matched at an offset of the complete input than on the remainder,
+    so it must be matched on the remainder.
+
+    Args:
+        pattern (str): The transition pattern.
+
+    Returns:
+        bool: True if the pattern must be matched on the remainder of the input, false otherwise.
+    """
+    if is_literal(pattern):
+        return False
+    try:
+        return _looks_back(sre_parse.parse(pattern))
+    except Exception:
+        return True
+
+
+def width(pattern: str) -> Tuple[int, Optional[int]]:
+    """
+    Gets the minimum and maximum lengths of the matches of the pattern.
+
+    Args:
+        pattern (str): The transition pattern.
+
+    Returns:
+        Tuple[int, Optional[int]]: The minimum length, and the maximum length (None if unbounded).
+    """
+    if is_literal(pattern):
+        return len(pattern), len(pattern)
+    try:
+        minimum, maximum = sre_parse.parse(pattern).getwidth()
+    except Exception:
+        return 0, None
+    return minimum, (None if maximum >= sre_constants.MAXREPEAT else maximum)
@@ -0,0 +1,46 @@
+from typing import List
+from app.model.analysis import Analysis
+from app.model.machine import Machine
+from app.model.result_cache import ResultCache
+from app.service.machine_service import analyse_text, compile_machine
+
+
+def cache_results(machine: Machine, maxsize: int = 4096) -> ResultCache:
+    """
+    Attaches a cache of the analyses of the texts the machine runs on, so that cached_analyse_text (and run_machine_batch)
+    returns the analyses of a text met before without running the search. A cache already attached is kept.
+    The cache is emptied if the machine is compiled again, and is not pickled with the machine
+    (batch worker processes get their own, of the same size).
+    Transforms should be pure, since the data of a text's analyses is computed once.
+
+    Args:
+        machine (Machine): The machine.
+        maxsize (int): The most texts whose analyses are kept, the least recently used being evicted first.
+
+    Returns:
+        ResultCache: The machine's cache, to read its counts (hits, misses, evictions, hit_rate).
+    """
+    if machine._result_cache is None:
+        machine._result_cache = ResultCache(maxsize)
+    return machine._result_cache
+
+
+def cached_analyse_text(machine: Machine, text: str) -> List[Analysis]:
+    """
+    Gets the analyses of the text from the machine's result cache (see cache_results), running analyse_text
+    only for the texts not met before, or since evicted.
+
+    Args:
+        machine (Machine): The machine to run, with a result cache attached (a default one is attached otherwise).
+        text (str): The complete input.
+
+    Returns:
+        List[Analysis]: The analyses of the end trails, in the order run_machine lists them.
+    """
+    cache = cache_results(machine)
+    cache.bind(compile_machine(machine))
+    analyses = cache.lookup(text)
+    if analyses is None:
+        analyses = tuple(analyse_text(machine, text))
+        cache.store(text, analyses)
+    return list(analyses)
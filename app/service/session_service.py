@@ -0,0 +1,152 @@
+from collections import deque
+from typing import Dict, List, Tuple
+from app.model.compiled_machine import CompiledState
+from app.model.machine import Machine
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+from app.service.machine_service import compile_machine, epsilon_records, expand_record, match_pattern
+
+
+class ParserSession:
+    """
+    Parses input that arrives in pieces (long documents, sockets) as a sequence of segments, each one accepted by the machine.
+    Segments are taken by maximal munch: a segment is final once no record of the search can still reach an end state further on,
+    and the next segment starts where it ends. The search is kept between calls to feed, and the buffer only holds the current segment,
+    so memory is bounded by the frontier and the longest segment, not by the length of the input.
+
+    A record is only expanded once the buffer decides every match out of its state, with lookahead characters past a match
+    for the assertions that look past it ($, \\b, lookaheads): bounded patterns need their longest match in the buffer,
+    and unbounded ones max_match characters (a match that stops short may still grow with the next chunk), or the end of the input.
+    So the segments do not depend on how the input is split into chunks.
+    max_match caps the memory held for one match: a match running past it raises an error rather than being cut short.
+    """
+
+    def __init__(self, machine: Machine, max_match: int = 1024, lookahead: int = 1):
+        self.machine = machine
+        self.compiled = compile_machine(machine)
+        self.max_match = max_match  # Longest match allowed for patterns of unbounded width (and the input needed to decide they fail).
+        self.lookahead = lookahead  # Input needed past a match to decide it.
+        self.offset = 0  # Offset in the whole input of the current segment (the start of the buffer).
+        self.closed = False
+        self._buffer = ""
+        self._reach: Dict[int, int] = dict()  # Maps state index to the input its bounded patterns need past a record's offset.
+        self._frontier = deque()
+        self._ends: List[SituationRecord] = []  # The records at an end state furthest into the segment so far.
+        self._start_segment()
+
+    def _start_segment(self):
+        node = self.compiled.states[self.compiled.start]
+        start = SituationRecord(node, self._buffer, 0, 0, node.state.data, None, None, self.machine)
+        self._frontier.append(start)
+        self._frontier.extend(record for record in epsilon_records(start, self.compiled, prune=False) if record.node.live)
+
+    def _needed(self, node: CompiledState) -> int:
+        reach = self._reach.get(node.index)
+        if reach is None:
+            widths = [self.max_match if transition.max_width is None else transition.max_width for transition in node.transitions]
+            reach = self._reach[node.index] = max(widths, default=0) + self.lookahead
+        return reach
+
+    def _ready(self, record: SituationRecord, buffer: str) -> bool:
+        """
+        Checks whether the buffer decides every match out of the record's state (see the class).
+
+        Args:
+            record (SituationRecord): The record to expand.
+            buffer (str): The input of the segment so far.
+
+        Raises:
+            ValueError: Raised if a match runs longer than max_match.
+
+        Returns:
+            bool: True if the record can be expanded, false if it must wait for more input.
+        """
+        if self._needed(record.node) > len(buffer) - record.offset:
+            return False
+        for transition in record.node.transitions:
+            if transition.max_width is None:
+                match_end = match_pattern(transition, buffer, record.offset)
+                if match_end is not None and match_end - record.offset > self.max_match:
+                    raise ValueError(f"A match of transition '{transition.name}' at offset {self.offset + record.offset} of the input "
+                                     f"runs longer than max_match ({self.max_match}).")
+        return True
+
+    def feed(self, chunk: str) -> List[Tuple[int, Situation]]:
+        """
+        Adds input, and runs the search as far as the input allows.
+
+        Args:
+            chunk (str): The next piece of input.
+
+        Raises:
+            ValueError: Raised if the session is closed, the input cannot be split into accepted segments, or a match runs longer than max_match.
+
+        Returns:
+            List[Tuple[int, Situation]]: The end situations of the segments made final by the input, with the offset of each segment
+                in the whole input. Situations are relative to their segment: input_complete is the segment's text.
+                Ambiguous segments have several end situations.
+        """
+        if self.closed:
+            raise ValueError("The parser session is closed.")
+        self._buffer += chunk
+        return self._advance()
+
+    def close(self) -> List[Tuple[int, Situation]]:
+        """
+        Ends the input, and runs the search to the end of it.
+
+        Raises:
+            ValueError: Raised if the rest of the input cannot be split into accepted segments.
+
+        Returns:
+            List[Tuple[int, Situation]]: The end situations of the remaining segments (see feed).
+        """
+        self.closed = True
+        return self._advance()
+
+    def _advance(self) -> List[Tuple[int, Situation]]:
+        emitted = []
+        while True:
+            buffer = self._buffer
+            waiting = deque()
+            while self._frontier:
+                record = self._frontier.popleft()
+                if record.node.end:
+                    # End states have no transitions: the record is a candidate end of the segment.
+                    if record.offset > 0 and (not self._ends or record.offset >= self._ends[0].offset):
+                        if self._ends and record.offset > self._ends[0].offset:
+                            self._ends = []
+                        self._ends.append(record)
+                elif self.closed or self._ready(record, buffer):
+                    record.input_complete = buffer  # Records were created on a shorter buffer.
+                    self._frontier.extend(child for child in expand_record(record, self.compiled, closure=True, prune=False) if child.node.live)
+                else:
+                    waiting.append(record)
+            self._frontier = waiting
+            if waiting or (not self._ends and not buffer):
+                return emitted  # Wait for more input (or, closed, there is no more).
+
+            if not self._ends:
+                raise ValueError(f"No segment accepted by the machine starts at offset {self.offset} of the input.")
+            emitted.extend(self._emit_segment())
+
+    def _emit_segment(self) -> List[Tuple[int, Situation]]:
+        # Emits the furthest end records (the segment is final), then starts the next segment where they end.
+        end = self._ends[0].offset
+        text = self._buffer[:end]
+        memo = {}
+        emitted = []
+        for record in self._ends:
+            trail_record = record
+            while trail_record is not None:
+                trail_record.input_complete = text
+                trail_record = trail_record.parent
+            situation = record.to_situation(memo)
+            situation.accepted = True
+            emitted.append((self.offset, situation))
+
+        self._ends = []
+        self._buffer = self._buffer[end:]
+        self.offset += end
+        self._start_segment()
+        return emitted
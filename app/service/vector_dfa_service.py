@@ -0,0 +1,145 @@
+import sys
+from typing import Dict, FrozenSet, List, NamedTuple, Sequence, Tuple
+from app.model.compiled_machine import CompiledMachine
+from app.service.dfa_service import DfaState, LazyDfa
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("The vectorised DFA needs numpy: pip install numpy (or the escriba[numpy] extra).") from error
+
+_DEAD = 0  # Id of the dead state, which every row of the table keeps to itself.
+_START = 1  # Id of the start state.
+
+
+class VectorDfaResult(NamedTuple):
+    # Outcome of a batch of inputs, by position in the batch.
+    accepted: "np.ndarray"  # bool: True if the input is accepted.
+    states: "np.ndarray"  # int32: The DFA state each input ends in (0, the dead state, once no pattern can match); see VectorDfa.end_states.
+
+
+def encode_batch(texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Encodes a batch of inputs as one array of code points, one row per input, padded with -1.
+
+    Args:
+        texts (Sequence[str]): The inputs.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The code points (int32, inputs by longest length), and the length of each input (int64).
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    width = int(lengths.max()) if len(texts) else 0
+    codes = np.full((len(texts), width), -1, dtype=np.int32)
+    if width:
+        flat = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.int32)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        columns = np.arange(len(flat)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        codes[rows, columns] = flat
+    return codes, lengths
+
+
+class VectorDfa:
+    """
+    Dense form of the DFA of a machine whose patterns are all literals (see CompiledMachine.literal), for classifying
+    large batches of short inputs: the characters of the patterns are mapped to integer classes, the DFA is built in full
+    (subset construction, as LazyDfa does lazily) into a table of state by class, and a batch advances one character
+    for all its inputs in each table lookup. Recognition only: trails, transforms and data are left to run_machine.
+    """
+
+    def __init__(self, compiled: CompiledMachine, max_states: int = 10000):
+        """
+        Builds the table of the machine's DFA.
+
+        Args:
+            compiled (CompiledMachine): The compiled form of the machine.
+            max_states (int): The most DFA states built (the dead state aside).
+
+        Raises:
+            ValueError: Raised if the machine has patterns other than literals, or its DFA has more than max_states states.
+        """
+        lazy = LazyDfa(compiled, max_states=sys.maxsize)
+        self.alphabet = sorted({character for state in compiled.states for transition in state.transitions for character in transition.pattern})
+        self._codes = np.array([ord(character) for character in self.alphabet], dtype=np.int32)
+
+        # Number the DFA states breadth first, each with its row of successors, by class.
+        # Class 0 stands for the characters of no pattern, classes 1 to len(alphabet) for the alphabet, and the last for padding.
+        ids: Dict[DfaState, int] = {lazy.start: _START}
+        dfa_states: List[DfaState] = [lazy.start]
+        rows = [[_DEAD] * (len(self.alphabet) + 2)]
+        for dfa_state in dfa_states:
+            row = [_DEAD]
+            for character in self.alphabet:
+                next_state = lazy._step(dfa_state, character)
+                if next_state is None:
+                    row.append(_DEAD)
+                    continue
+                if next_state not in ids:
+                    if len(dfa_states) >= max_states:
+                        raise ValueError(f"The DFA of the machine has more than {max_states} states.")
+                    ids[next_state] = len(dfa_states) + 1
+                    dfa_states.append(next_state)
+                row.append(ids[next_state])
+            rows.append(row + [_DEAD])
+
+        self.table = np.array(rows, dtype=np.int32)
+        self.table[:, -1] = np.arange(len(rows))  # Padding leaves every state as it is.
+        self.accepting = np.array([False] + [dfa_state.accepting for dfa_state in dfa_states])
+        self._end_states = [frozenset()] + [
+            frozenset(compiled.states[item].name for item in dfa_state.items if isinstance(item, int) and compiled.states[item].end)
+            for dfa_state in dfa_states
+        ]
+
+    def __len__(self) -> int:
+        # Number of DFA states, the dead state included.
+        return len(self.table)
+
+    def classes(self, codes: "np.ndarray") -> "np.ndarray":
+        """
+        Maps code points to character classes.
+
+        Args:
+            codes (np.ndarray): The code points (-1 for padding), of any shape.
+
+        Returns:
+            np.ndarray: The class of each code point, of the same shape.
+        """
+        found = np.searchsorted(self._codes, codes)
+        known = self._codes[np.minimum(found, len(self._codes) - 1)] == codes if len(self._codes) else np.zeros(codes.shape, dtype=bool)
+        classes = np.where(known, found + 1, 0)
+        classes[codes < 0] = len(self.alphabet) + 1
+        return classes
+
+    def run(self, texts: Sequence[str], batch_size: int = 65536) -> VectorDfaResult:
+        """
+        Runs a batch of inputs, each from the start state over its whole text, all inputs advancing together.
+        The batch is processed in slices of batch_size inputs, to bound the memory of the padded arrays.
+
+        Args:
+            texts (Sequence[str]): The inputs.
+            batch_size (int): The most inputs encoded at once.
+
+        Returns:
+            VectorDfaResult: Whether each input is accepted, and the DFA state it ends in.
+        """
+        states = np.empty(len(texts), dtype=np.int32)
+        for begin in range(0, len(texts), batch_size):
+            codes, _ = encode_batch(texts[begin:begin + batch_size])
+            columns = np.ascontiguousarray(self.classes(codes).T)  # One row per character position, read in turn.
+            batch_states = np.full(len(codes), _START, dtype=np.int32)
+            for classes in columns:
+                batch_states = self.table[batch_states, classes]
+            states[begin:begin + len(codes)] = batch_states
+        return VectorDfaResult(self.accepting[states], states)
+
+    def end_states(self, state: int) -> FrozenSet[str]:
+        """
+        Gets the names of the machine's end states that a DFA state stands for.
+
+        Args:
+            state (int): The DFA state, as in VectorDfaResult.states.
+
+        Returns:
+            FrozenSet[str]: The end states reached (empty if the state is not accepting).
+        """
+        return self._end_states[state]
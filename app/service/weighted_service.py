@@ -0,0 +1,115 @@
+import heapq
+from collections import Counter
+from itertools import count
+from typing import List, Optional
+from app.model.compiled_machine import CompiledMachine
+from app.model.frontier import Frontier
+from app.model.machine import Machine
+from app.model.situation import Situation
+from app.model.situation_record import SituationRecord
+from app.service.machine_service import compile_machine, epsilon_records, expand_record
+
+
+def _costs_to_end(compiled: CompiledMachine) -> List[Optional[float]]:
+    """
+    Computes the least cost from each state to an end state, whatever the input (Dijkstra's algorithm on the reversed graph).
+    It never exceeds the cost of the trails actually found, so it is an admissible (and consistent) heuristic for the search.
+
+    Args:
+        compiled (CompiledMachine): The compiled form of the machine.
+
+    Raises:
+        ValueError: Raised if a transition or state has a negative cost.
+
+    Returns:
+        List[Optional[float]]: The least cost to an end state, by state index; None for the states that cannot reach one.
+    """
+    incoming = [[] for _ in compiled.states]
+    for state in compiled.states:
+        for transition in state.transitions:
+            if transition.cost < 0:
+                raise ValueError(f"Transition '{transition.name}' (with its destination state) has a negative cost: {transition.cost}.")
+            incoming[transition.target].append(transition)
+
+    costs: List[Optional[float]] = [None] * len(compiled.states)
+    heap = [(0.0, state.index) for state in compiled.states if state.end]
+    while heap:
+        cost, index = heapq.heappop(heap)
+        if costs[index] is not None:
+            continue
+        costs[index] = cost
+        for transition in incoming[index]:
+            if costs[transition.source] is None:
+                heapq.heappush(heap, (cost + transition.cost, transition.source))
+    return costs
+
+
+def run_machine_k_best(machine: Machine, start_situation: Situation, k: int = 1, frontier: Optional[Frontier] = None) -> List[Situation]:
+    """
+    Run the provided machine on the specified starting situation, keeping only the k end trails of least cost
+    (see Transition.cost and State.cost), rather than every end trail as run_machine does.
+    The search is best first (A*, by cost so far plus the least cost to an end state), so end trails are found in cost order
+    and the search stops at the k-th. Each state is expanded at most k times at each input offset, since later arrivals
+    cost more than k others with the same future.
+
+    Args:
+        machine (Machine): The machine that will process the situations.
+        start_situation (Situation): The starting situation.
+        k (int): The number of end trails to find.
+        frontier (Optional[Frontier]): The frontier that counts the search (expanded, pruned, max_size); its records are not used.
+
+    Raises:
+        ValueError: Raised if a transition or state has a negative cost.
+
+    Returns:
+        List[Situation]: At most k situations stopped at an end state, by increasing cost (Situation.cost), ties in the order found.
+    """
+    compiled = compile_machine(machine)
+    costs_to_end = _costs_to_end(compiled)
+    frontier = Frontier() if frontier is None else frontier
+    if k <= 0:
+        return []
+
+    order = count()  # Breaks ties by the order in which records were found.
+    heap = []
+
+    def push(record: SituationRecord, cost: float):
+        cost_to_end = costs_to_end[record.node.index]
+        if cost_to_end is None:
+            frontier.pruned += 1
+            return
+        heapq.heappush(heap, (cost + cost_to_end, next(order), cost, record))
+        frontier.max_size = max(frontier.max_size, len(heap))
+
+    start_record = SituationRecord.from_situation(start_situation, compiled)
+    start_cost = start_situation.cost
+    push(start_record, start_cost)
+    closure_costs = {start_record: start_cost}
+    for record in epsilon_records(start_record, compiled, frontier):
+        closure_costs[record] = closure_costs[record.parent] + record.transition.cost
+        push(record, closure_costs[record])
+
+    expansions = Counter()  # Expansions by (state index, offset).
+    memo = {}
+    end_situations = []
+    while heap and len(end_situations) < k:
+        _, _, cost, record = heapq.heappop(heap)
+        if record.node.end and record.offset == len(record.input_complete):
+            situation = record.to_situation(memo)
+            situation.accepted = True
+            end_situations.append(situation)
+            continue
+
+        key = (record.node.index, record.offset)
+        if expansions[key] >= k:
+            frontier.pruned += 1
+            continue
+        expansions[key] += 1
+        frontier.expanded += 1
+
+        # Children come after their parents (each new record is followed by its closure).
+        child_costs = {record: cost}
+        for child in expand_record(record, compiled, closure=True, frontier=frontier):
+            child_costs[child] = child_costs[child.parent] + child.transition.cost
+            push(child, child_costs[child])
+    return end_situations
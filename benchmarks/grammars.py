@@ -0,0 +1,163 @@
+from itertools import product
+from string import ascii_lowercase
+from typing import Callable, Dict, List, NamedTuple
+from app.model.state import State
+from app.model.transition import Transition
+
+
+class Grammar(NamedTuple):
+    """
+    The inputs of create_machine for a synthetic machine, with a generator of texts the machine accepts.
+    Every grammar reads words separated by spaces, through a loop: start -> word -> ... -> hub -> (" " -> word | end),
+    so texts of any length can be generated.
+    """
+    name: str
+    size: int  # The parameter the grammar was generated with (fan-out, depth, ...).
+    transitions: List[Transition]
+    states: Dict[str, State]
+    word: Callable[[int], str]  # word(i) is the i-th word of a generated text.
+
+    def text(self, length: int) -> str:
+        """
+        Generates an accepted text of at least the given length (in characters), made of whole words.
+
+        Args:
+            length (int): The minimum length of the text.
+
+        Returns:
+            str: The text.
+        """
+        words = []
+        total = -1
+        while total < length:
+            words.append(self.word(len(words)))
+            total += len(words[-1]) + 1
+        return " ".join(words)
+
+
+def _state(name: str, start: bool = False, end: bool = False) -> State:
+    return State(name=name, start=start, end=end, data=None, process=None, event=None)
+
+
+def _transition(name: str, pattern: str, state1_name: str, state2_name: str) -> Transition:
+    return Transition(name=name, pattern=pattern, state1_name=state1_name, state2_name=state2_name, transform=None, event=None)
+
+
+def _grammar(name: str, size: int, transitions: List[Transition], word: Callable[[int], str]) -> Grammar:
+    # Adds the loop shared by every grammar, and the states named by the transitions.
+    transitions = [
+        _transition("start-transition", "", "start", "word"),
+        *transitions,
+        _transition("space-transition", " ", "hub", "word"),
+        _transition("end-transition", "", "hub", "end"),
+    ]
+    names = ["start", *dict.fromkeys(name for t in transitions for name in (t.state1_name, t.state2_name) if name not in ("start", "end"))]
+    states = {name: _state(name, start=name == "start") for name in names}
+    states["end"] = _state("end", end=True)
+    return Grammar(name, size, transitions, states, word)
+
+
+def _words(size: int) -> List[str]:
+    # The first size words of two or more letters, in order: "aa", "ab", ..., "zz", "aaa", ...
+    words = []
+    length = 2
+    while len(words) < size:
+        words.extend("".join(letters) for letters in product(ascii_lowercase, repeat=length))
+        length += 1
+    return words[:size]
+
+
+def wide_fan_out(size: int) -> Grammar:
+    """
+    A word state with one literal transition per word of a vocabulary of the given size.
+
+    Args:
+        size (int): The number of words (transitions out of the word state).
+
+    Returns:
+        Grammar: The grammar.
+    """
+    words = _words(size)
+    transitions = [_transition(f"word-{i}", word, "word", "hub") for i, word in enumerate(words)]
+    return _grammar("wide_fan_out", size, transitions, lambda i: words[(i * 7919) % size])
+
+
+def deep_chain(size: int) -> Grammar:
+    """
+    A chain of single-character transitions through the given number of states for each word.
+
+    Args:
+        size (int): The number of transitions in the chain (the length of the only word).
+
+    Returns:
+        Grammar: The grammar.
+    """
+    word = "".join(ascii_lowercase[i % len(ascii_lowercase)] for i in range(size))
+    names = ["word", *(f"chain-{i}" for i in range(1, size)), "hub"]
+    transitions = [_transition(f"chain-{i}", character, names[i], names[i + 1]) for i, character in enumerate(word)]
+    return _grammar("deep_chain", size, transitions, lambda i: word)
+
+
+def ambiguous_affixes(size: int) -> Grammar:
+    """
+    Words a^size b c^size, read as an optional prefix of up to size a's, the stem "ab", and an optional suffix of up to size c's.
+    Every prefix and suffix is tried, but only one reading of each word reaches the next word.
+
+    Args:
+        size (int): The longest prefix and suffix.
+
+    Returns:
+        Grammar: The grammar.
+    """
+    transitions = [
+        *(_transition(f"prefix-{i}", "a" * i, "word", "stem") for i in range(size + 1)),
+        _transition("stem", "ab", "stem", "suffix"),
+        *(_transition(f"suffix-{i}", "c" * i, "suffix", "hub") for i in range(size + 1)),
+    ]
+    word = "a" * size + "b" + "c" * size
+    return _grammar("ambiguous_affixes", size, transitions, lambda i: word)
+
+
+def epsilon_heavy(size: int) -> Grammar:
+    """
+    A chain of the given number of empty transitions before each word, each state of the chain also having an empty
+    transition to a dead end, so every step goes through a large epsilon closure.
+
+    Args:
+        size (int): The number of empty transitions in the chain.
+
+    Returns:
+        Grammar: The grammar.
+    """
+    names = ["word", *(f"epsilon-{i}" for i in range(1, size + 1))]
+    transitions = []
+    for i in range(size):
+        transitions.append(_transition(f"epsilon-{i}", "", names[i], names[i + 1]))
+        transitions.append(_transition(f"dead-end-{i}", "", names[i], f"dead-end-{i}"))
+        transitions.append(_transition(f"dead-{i}", "z", f"dead-end-{i}", "hub"))
+    transitions.append(_transition("letter", "x", names[-1], "hub"))
+    return _grammar("epsilon_heavy", size, transitions, lambda i: "x")
+
+
+def regex_heavy(size: int) -> Grammar:
+    """
+    A word state with the given number of regular expression transitions sharing their first characters:
+    every one is tried on every word, and the final digits tell which one matches.
+
+    Args:
+        size (int): The number of regular expression transitions.
+
+    Returns:
+        Grammar: The grammar.
+    """
+    transitions = [_transition(f"regex-{i}", rf"[a-z]+(?:-[a-z]+)*{i}\b", "word", "hub") for i in range(size)]
+    return _grammar("regex_heavy", size, transitions, lambda i: f"{ascii_lowercase[i % 26] * 3}-word{i % size}")
+
+
+GRAMMARS = {
+    "wide_fan_out": wide_fan_out,
+    "deep_chain": deep_chain,
+    "ambiguous_affixes": ambiguous_affixes,
+    "epsilon_heavy": epsilon_heavy,
+    "regex_heavy": regex_heavy,
+}
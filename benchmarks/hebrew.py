@@ -0,0 +1,48 @@
+import argparse
+import json
+import sys
+from time import perf_counter
+from typing import List, Optional
+from app.hebrew.hebrew_transliteration import _transliterate_word, transliterate_many
+
+# Genesis 1:1-2, with cantillation, as corpora carry it.
+_VERSES = [
+    "בְּרֵאשִׁ֖ית בָּרָ֣א אֱלֹהִ֑ים אֵ֥ת הַשָּׁמַ֖יִם וְאֵ֥ת הָאָֽרֶץ׃",
+    "וְהָאָ֗רֶץ הָיְתָ֥ה תֹ֙הוּ֙ וָבֹ֔הוּ וְחֹ֖שֶׁךְ עַל־פְּנֵ֣י תְה֑וֹם וְר֣וּחַ אֱלֹהִ֔ים מְרַחֶ֖פֶת עַל־פְּנֵ֥י הַמָּֽיִם׃",
+]
+
+
+def benchmark_transliteration(lines: int = 100000) -> dict:
+    """
+    Times transliterate_many on a corpus of the given number of lines, with an empty word cache and with a warm one.
+
+    Args:
+        lines (int): The number of lines (verses) of the corpus.
+
+    Returns:
+        dict: The characters of the corpus, and the throughput of each run in characters per second.
+    """
+    corpus = [_VERSES[index % len(_VERSES)] + "\n" for index in range(lines)]
+    characters = sum(len(line) for line in corpus)
+
+    _transliterate_word.cache_clear()
+    results = {"lines": lines, "characters": characters}
+    for run in ("cold", "warm"):
+        started = perf_counter()
+        for _ in transliterate_many(corpus):
+            pass
+        results[f"{run}_characters_per_second"] = characters / (perf_counter() - started)
+    return results
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.hebrew", description="Benchmarks the Hebrew transliteration of a large text.")
+    parser.add_argument("--lines", type=int, default=100000, help="Lines (verses) of the corpus.")
+    options = parser.parse_args(arguments)
+    json.dump(benchmark_transliteration(options.lines), sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from collections import deque
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+from app.model.frontier import Frontier
+from app.model.machine import Machine
+from app.model.situation import Situation
+from app.service.machine_service import create_machine, next_situations, run_machine
+from benchmarks.grammars import GRAMMARS, Grammar
+
+FORMAT = "escriba-benchmarks"
+FORMAT_VERSION = 1
+DEFAULT_SIZES = {"wide_fan_out": 500, "deep_chain": 200, "ambiguous_affixes": 20, "epsilon_heavy": 50, "regex_heavy": 30}
+DEFAULT_LENGTHS = [100, 1000, 5000]
+MAX_NEXT_SITUATIONS_CALLS = 2000  # next_situations is timed over the first calls of a breadth-first walk only.
+
+
+def _best_time(function: Callable[[], object], repeat: int) -> float:
+    # The fastest of the runs is the least disturbed by the rest of the system.
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _start_situation(machine: Machine, text: str) -> Situation:
+    start = next(state for state in machine.states.values() if state.start)
+    return Situation(id=str(uuid4()), input_complete=text, offset=0, matched="", state=start, machine=machine, parent=None)
+
+
+def _walk_next_situations(start_situation: Situation) -> int:
+    # Breadth-first walk with the public single-step function, as callers driving their own search do.
+    queue = deque([start_situation])
+    calls = 0
+    while queue and calls < MAX_NEXT_SITUATIONS_CALLS:
+        queue.extend(next_situations(queue.popleft()))
+        calls += 1
+    return calls
+
+
+def benchmark_grammar(grammar: Grammar, lengths: Iterable[int], repeat: int = 3) -> List[dict]:
+    """
+    Times create_machine, next_situations and run_machine on the machine of a grammar, for texts of each length,
+    and measures the peak memory and the situations explored by run_machine.
+
+    Args:
+        grammar (Grammar): The grammar.
+        lengths (Iterable[int]): The minimum lengths of the texts to run.
+        repeat (int): The number of runs of each measure; the fastest is kept.
+
+    Returns:
+        List[dict]: One result per length.
+    """
+    create_seconds = _best_time(lambda: create_machine(grammar.transitions, grammar.states), repeat)
+    machine = create_machine(grammar.transitions, grammar.states)
+
+    results = []
+    for length in lengths:
+        text = grammar.text(length)
+        start_situation = _start_situation(machine, text)
+
+        calls = _walk_next_situations(start_situation)
+        next_seconds = _best_time(lambda: _walk_next_situations(start_situation), repeat) / calls
+
+        run_seconds = _best_time(lambda: run_machine(machine, start_situation), repeat)
+
+        # Measured apart, since tracing slows the run down.
+        frontier = Frontier()
+        tracemalloc.start()
+        ends = run_machine(machine, start_situation, frontier)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            "grammar": grammar.name,
+            "size": grammar.size,
+            "length": len(text),
+            "create_seconds": create_seconds,
+            "next_situations_seconds": next_seconds,
+            "run_seconds": run_seconds,
+            "peak_bytes": peak_bytes,
+            "expanded": frontier.expanded,
+            "pruned": frontier.pruned,
+            "max_frontier": frontier.max_size,
+            "ends": len(ends),
+        })
+    return results
+
+
+def run_benchmarks(grammars: Optional[Dict[str, int]] = None, lengths: Optional[List[int]] = None, repeat: int = 3) -> dict:
+    """
+    Runs the benchmarks of the given grammars.
+
+    Args:
+        grammars (Optional[Dict[str, int]]): The names of the grammars (see grammars.GRAMMARS) to run, with their sizes.
+        lengths (Optional[List[int]]): The minimum lengths of the texts to run.
+        repeat (int): The number of runs of each measure; the fastest is kept.
+
+    Returns:
+        dict: The report, which can be written as JSON and compared to a baseline with compare_reports.
+    """
+    grammars = DEFAULT_SIZES if grammars is None else grammars
+    lengths = DEFAULT_LENGTHS if lengths is None else lengths
+    results = []
+    for name, size in grammars.items():
+        results.extend(benchmark_grammar(GRAMMARS[name](size), lengths, repeat))
+    return {
+        "format": FORMAT,
+        "version": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def _key(result: dict) -> Tuple[str, int, int]:
+    return result["grammar"], result["size"], result["length"]
+
+
+def compare_reports(report: dict, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """
+    Compares a report to a baseline report, listing the regressions:
+    timings or peak memory more than the tolerance above the baseline, and any increase of the situations explored.
+
+    Args:
+        report (dict): The report to check.
+        baseline (dict): The baseline report.
+        tolerance (float): The relative increase of timings and memory allowed (0.2 is 20%).
+
+    Returns:
+        List[str]: The regressions, described; empty if there are none.
+    """
+    baseline_results = {_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        expected = baseline_results.get(_key(result))
+        if expected is None:
+            continue
+        label = "{}(size={}, length={})".format(*_key(result))
+        for measure in ("create_seconds", "next_situations_seconds", "run_seconds", "peak_bytes"):
+            if result[measure] > expected[measure] * (1 + tolerance):
+                regressions.append(f"{label}: {measure} {result[measure]:.6g} > {expected[measure]:.6g} (+{tolerance:.0%} allowed)")
+        for measure in ("expanded", "max_frontier", "ends"):
+            if result[measure] != expected[measure] and (measure == "ends" or result[measure] > expected[measure]):
+                regressions.append(f"{label}: {measure} {result[measure]} != {expected[measure]}")
+    return regressions
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks the machine engine on synthetic grammars.")
+    parser.add_argument("--grammar", action="append", metavar="NAME[=SIZE]", help=f"Grammar to run (default: all). One of {list(GRAMMARS)}.")
+    parser.add_argument("--length", action="append", type=int, help=f"Minimum text length (default: {DEFAULT_LENGTHS}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each measure; the fastest is kept.")
+    parser.add_argument("--output", help="File to write the JSON report to (default: standard output).")
+    parser.add_argument("--baseline", help="JSON report to compare with; the exit status is 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative increase of timings and memory allowed.")
+    options = parser.parse_args(arguments)
+
+    grammars = None
+    if options.grammar:
+        grammars = dict()
+        for option in options.grammar:
+            name, _, size = option.partition("=")
+            grammars[name] = int(size) if size else DEFAULT_SIZES[name]
+    report = run_benchmarks(grammars, options.length, options.repeat)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            regressions = compare_reports(report, json.load(file), options.tolerance)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
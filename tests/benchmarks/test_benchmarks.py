@@ -0,0 +1,29 @@
+from benchmarks.grammars import GRAMMARS
+from benchmarks.runner import compare_reports, run_benchmarks
+
+
+def test_grammars_accept_their_texts():
+    # ARRANGE.
+    grammars = {name: 3 for name in GRAMMARS}
+
+    # ACT.
+    report = run_benchmarks(grammars, lengths=[20], repeat=1)
+
+    # ASSERT.
+    assert [result["grammar"] for result in report["results"]] == list(GRAMMARS)
+    assert all(result["ends"] == 1 for result in report["results"])
+    assert all(result["expanded"] > 0 and result["peak_bytes"] > 0 for result in report["results"])
+
+
+def test_compare_reports():
+    # ARRANGE.
+    baseline = run_benchmarks({"deep_chain": 3}, lengths=[20], repeat=1)
+    slower = {"results": [{**result, "run_seconds": result["run_seconds"] * 2, "expanded": result["expanded"] + 1} for result in baseline["results"]]}
+
+    # ACT.
+    regressions = compare_reports(slower, baseline, tolerance=0.5)
+
+    # ASSERT.
+    assert compare_reports(baseline, baseline) == []
+    assert len(regressions) == 2
+    assert "run_seconds" in regressions[0] and "expanded" in regressions[1]
@@ -0,0 +1,115 @@
+import pytest
+import sqlite3
+import threading
+import time
+from app.data.backend import Backend, SqliteBackend, SqlServerBackend
+from app.data.connection_pool import ConnectionPool
+from app.data.terms import iter_column, iter_term_chunks, iter_terms
+
+
+def _terms_database(path: str, count: int):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE AF_Terms (TermId INTEGER PRIMARY KEY, Term TEXT)")
+    connection.executemany("INSERT INTO AF_Terms (TermId, Term) VALUES (?, ?)", [(index, f"term{index}") for index in range(count)])
+    connection.commit()
+    connection.close()
+
+
+def test_iter_terms_streams_chunks(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "terms.db")
+    _terms_database(path, 25)
+    pool = ConnectionPool(SqliteBackend(path), size=2)
+
+    # ACT.
+    chunks = list(iter_term_chunks(pool, chunksize=10))
+    rows = list(iter_terms(pool, chunksize=7, columns=["Term"]))
+    terms = list(iter_column(pool, "Term", chunksize=4))
+
+    # ASSERT.
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[0][0] == {"TermId": 0, "Term": "term0"}
+    assert rows[-1] == {"Term": "term24"}
+    assert terms == [f"term{index}" for index in range(25)]
+    with pytest.raises(ValueError):
+        list(iter_terms(pool, table="AF_Terms; DROP TABLE AF_Terms"))
+
+
+def test_connection_pool_reuses_connections(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "terms.db")
+    _terms_database(path, 1)
+    pool = ConnectionPool(SqliteBackend(path), size=1)
+
+    # ACT.
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    with pytest.raises(ZeroDivisionError):
+        with pool.connection() as third:
+            1 / 0
+    pool.close()
+
+    # ASSERT.
+    assert first is second is third
+    with pytest.raises(ValueError):
+        with pool.connection():
+            pass
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT 1")  # Closed with the pool.
+
+
+def test_connection_pool_wakes_borrower_when_connection_fails():
+    # ARRANGE.
+    class FailingConnection:
+        def rollback(self):
+            raise sqlite3.OperationalError("The connection is broken.")
+
+        def close(self):
+            pass
+
+    class FailingBackend(Backend):
+        def connect(self):
+            return FailingConnection()
+
+    pool = ConnectionPool(FailingBackend(), size=1)
+    borrowed = []
+
+    def borrow():
+        with pool.connection() as connection:
+            borrowed.append(connection)
+
+    waiter = threading.Thread(target=borrow, daemon=True)
+
+    # ACT.
+    with pytest.raises(sqlite3.OperationalError):
+        with pool.connection():
+            waiter.start()
+            time.sleep(0.1)  # The waiter blocks: the pool is full.
+            raise ZeroDivisionError
+    waiter.join(timeout=5)
+
+    # ASSERT.
+    assert not waiter.is_alive()
+    assert len(borrowed) == 1
+
+
+def test_sql_server_backend_connection_string():
+    # ARRANGE.
+    trusted = SqlServerBackend("HIPLI-XASDO", "Boaz")
+    authenticated = SqlServerBackend("myserver,1433", "Boaz", encrypt=True, username="user", password="secret")
+
+    # ACT / ASSERT.
+    assert trusted.connection_string() == "DRIVER={ODBC Driver 18 for SQL Server};SERVER=HIPLI-XASDO;DATABASE=Boaz;ENCRYPT=no;Trusted_Connection=yes"
+    assert authenticated.connection_string().endswith("ENCRYPT=yes;UID=user;PWD=secret")
+
+
+def test_backend_requires_connect():
+    # ARRANGE.
+    class IncompleteBackend(Backend):
+        pass
+
+    # ACT / ASSERT.
+    with pytest.raises(TypeError):
+        IncompleteBackend()
@@ -0,0 +1,61 @@
+import io
+from app.hebrew.hebrew_transliteration import transliterate, transliterate_many
+
+
+def test_transliterate_verse():
+    # ARRANGE.
+    genesis = "בְּרֵאשִׁית בָּרָא אֱלֹהִים אֵת הַשָּׁמַיִם וְאֵת הָאָרֶץ׃"
+
+    # ACT.
+    transliterated = transliterate(genesis)
+
+    # ASSERT.
+    assert transliterated == "bərēʾšît bārāʾ ʾĕlōhîm ʾēt haššāmayim wəʾēt hāʾāreṣ."
+
+
+def test_transliterate_context_rules():
+    # ARRANGE.
+    words = {
+        "שַׁבָּת": "šabbāt",  # Dagesh forte after a vowel, lene at the start.
+        "מִדְבָּר": "midbār",  # Dagesh lene after a silent shewa.
+        "וְאֵת": "wəʾēt",  # Vocal shewa at the start.
+        "הִנְנִי": "hinənî",  # Vocal shewa between identical consonants; hireq yod.
+        "וַיֵּשְׁתְּ": "wayyēšt",  # Two silent shewas at the end.
+        "וּבְנֵי": "ûbənê",  # Shureq at the start; vocal shewa after a long vowel; tsere yod.
+        "רוּחַ": "rûaḥ",  # Shureq; furtive patah.
+        "שָׁלוֹם": "šālôm",  # Holam male.
+        "עָוֹן": "ʿāwōn",  # Consonantal vav with holam.
+        "יִשְׂרָאֵל": "yiśrāʾēl",  # Sin.
+        "תּוֹרָה": "tôrâ",  # Qamets he.
+        "לָהּ": "lāh",  # Mappiq.
+    }
+
+    # ACT.
+    transliterated = {word: transliterate(word) for word in words}
+
+    # ASSERT.
+    assert transliterated == words
+
+
+def test_transliterate_normalises_marks():
+    # ARRANGE.
+    ordered = "\u05E9\u05B8\u05BC\u05C1"  # Shin, qamets, dagesh, shin dot.
+    reordered = "\u05E9\u05BC\u05C1\u05B8"  # Shin, dagesh, shin dot, qamets.
+    presentation = "\uFB2C\u05B8"  # Shin with dagesh and shin dot (presentation form), qamets.
+    cantillated = "\u05D1\u05BC\u05B8\u0591\u05E8\u05B8\u05D0"  # With an etnahta.
+
+    # ACT / ASSERT.
+    assert transliterate(ordered) == transliterate(reordered) == transliterate(presentation) == "šā"
+    assert transliterate(cantillated) == "bārāʾ"
+    assert transliterate("אֶל־הָאָרֶץ (Gen 1)") == "ʾel-hāʾāreṣ (Gen 1)"
+
+
+def test_transliterate_many_streams_lines():
+    # ARRANGE.
+    corpus = io.StringIO("בָּרָא\nאֱלֹהִים\n")
+
+    # ACT.
+    lines = list(transliterate_many(corpus))
+
+    # ASSERT.
+    assert lines == ["bārāʾ\n", "ʾĕlōhîm\n"]
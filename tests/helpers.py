@@ -0,0 +1,31 @@
+from uuid import uuid4
+from app.model.situation import Situation
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import create_machine
+
+
+def start_situation(machine, text):
+    return Situation(id=str(uuid4()), input_complete=text, offset=0, matched="", state=machine.states["start"], machine=machine, parent=None)
+
+
+def trails(end_situations):
+    return [[(situation.state.name, situation.matched, situation.state.data) for situation in end.history] for end in end_situations]
+
+
+def compositions_machine(one_cost=0.0, two_cost=0.0, joint_cost=0.0):
+    # Splits a's into pieces of one or two, each piece with its cost; the trails are the compositions of the input (Fibonacci many).
+    transitions = [
+        Transition(name="start-transition", pattern="", state1_name="start", state2_name="piece"),
+        Transition(name="one-transition", pattern="a", state1_name="piece", state2_name="joint", cost=one_cost),
+        Transition(name="two-transition", pattern="aa", state1_name="piece", state2_name="joint", cost=two_cost),
+        Transition(name="next-transition", pattern="", state1_name="joint", state2_name="piece"),
+        Transition(name="end-transition", pattern="", state1_name="joint", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "piece": State(name="piece", start=False, end=False),
+        "joint": State(name="joint", start=False, end=False, cost=joint_cost),
+        "end": State(name="end", start=False, end=True),
+    }
+    return create_machine(transitions, states)
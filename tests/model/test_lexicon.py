@@ -0,0 +1,37 @@
+import pickle
+import pytest
+from app.model.lexicon import Lexicon
+
+
+def test_lexicon_finds_prefixes_with_payloads():
+    # ARRANGE.
+    lexicon = Lexicon([("cats", 2), ("cat", 1), "car", ("dogs", 5), ("dog", 4), ("do", 6), ("cat", 9)])
+
+    # ACT.
+    prefixes = lexicon.prefixes("xdogsled", 1)
+
+    # ASSERT.
+    assert prefixes == [(3, 6), (4, 4), (5, 5)]
+    assert lexicon.ends("cats") == [3, 4]
+    assert lexicon.get("cat") == 1  # The first payload of a duplicate term.
+    assert lexicon.get("car") is None and "car" in lexicon
+    assert lexicon.get("ca", "missing") == "missing" and "ca" not in lexicon
+    assert list(lexicon.items()) == [("car", None), ("cat", 1), ("cats", 2), ("do", 6), ("dog", 4), ("dogs", 5)]
+    assert (len(lexicon), lexicon.min_length, lexicon.max_length) == (6, 2, 4)
+    assert lexicon.first_characters() == frozenset("cd")
+    assert list(pickle.loads(pickle.dumps(lexicon)).items()) == list(lexicon.items())
+    assert Lexicon(lexicon.items()) != lexicon and lexicon == lexicon  # By identity.
+    with pytest.raises(ValueError):
+        Lexicon(["ok", ""])
+
+
+def test_lexicon_shares_suffixes():
+    # ARRANGE.
+    terms = [f"{prefix}ing" for prefix in ("walk", "talk", "sing", "ring", "bring")]
+
+    # ACT.
+    lexicon = Lexicon.from_rows(({"Term": term, "TermId": index} for index, term in enumerate(terms)), "Term", "TermId")
+
+    # ASSERT.
+    assert len(lexicon._labels) < sum(len(term) for term in terms) // 2
+    assert [lexicon.get(term) for term in terms] == list(range(len(terms)))
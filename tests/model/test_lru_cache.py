@@ -0,0 +1,26 @@
+import pytest
+from app.model.lru_cache import LruCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    # ARRANGE.
+    cache = LruCache(maxsize=2)
+    cache.store("a", 1)
+    cache.store("b", None)
+
+    # ACT.
+    found = cache.lookup("a")
+    cache.store("c", 3)
+
+    # ASSERT.
+    assert found == 1
+    assert cache.lookup("b", "missing") == "missing"  # Evicted: "a" was used more recently.
+    assert cache.lookup("a") == 1 and cache.lookup("c") == 3
+    assert len(cache) == 2
+    assert cache.to_dict() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1, "hit_rate": 0.75}
+
+
+def test_lru_cache_rejects_empty_size():
+    # ACT / ASSERT.
+    with pytest.raises(ValueError):
+        LruCache(maxsize=0)
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from app.model.search_stats import SearchStats
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.async_machine_service import arun_machine
+from app.service.machine_service import create_machine, run_machine
+from tests.helpers import start_situation, trails
+
+
+def test_arun_machine_matches_run_machine():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a+", state1_name="start", state2_name="a-state", transform=lambda s, t: len(s.input_remainder)),
+        Transition(name="ab-transition", pattern="a", state1_name="start", state2_name="b-state"),
+        Transition(name="loop-transition", pattern="b", state1_name="a-state", state2_name="a-state"),
+        Transition(name="b-transition", pattern="ab", state1_name="b-state", state2_name="a-state"),
+        Transition(name="skip-transition", pattern="", state1_name="a-state", state2_name="c-state"),
+        Transition(name="end-transition", pattern="", state1_name="c-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "b-state": State(name="b-state", start=False, end=False),
+        "c-state": State(name="c-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    for text in ("a", "aab", "aabbb", "b"):
+        # ACT.
+        expected = run_machine(machine, start_situation(machine, text))
+        actual = asyncio.run(arun_machine(machine, start_situation(machine, text), yield_every=2))
+
+        # ASSERT.
+        assert trails(actual) == trails(expected)
+
+
+def test_arun_machine_awaits_transforms_concurrently():
+    # ARRANGE.
+    running = []
+    most_running = []
+
+    async def lookup(situation, transition):
+        running.append(transition.name)
+        most_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(transition.name)
+        return transition.name
+
+    async def record_event(record, stats):
+        await asyncio.sleep(0)
+        events.append(record.state.name)
+
+    events = []
+    transitions = [Transition(name=f"word-{i}", pattern="w", state1_name="start", state2_name="end", transform=lookup) for i in range(5)]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True, event=[record_event]),
+    }
+    machine = create_machine(transitions, states)
+
+    # ACT.
+    end_situations = asyncio.run(arun_machine(machine, start_situation(machine, "w"), stats=SearchStats()))
+
+    # ASSERT.
+    assert [situation.state.data for situation in end_situations] == [f"word-{i}" for i in range(5)]
+    assert max(most_running) == 5
+    assert events == ["end"] * 5
+
+
+def test_arun_machine_times_out():
+    # ARRANGE.
+    async def slow(situation, transition):
+        await asyncio.sleep(10)
+
+    transitions = [Transition(name="a-transition", pattern="a", state1_name="start", state2_name="end", transform=slow)]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    # ACT / ASSERT.
+    with pytest.raises(TimeoutError):
+        asyncio.run(arun_machine(machine, start_situation(machine, "a"), timeout=0.05))
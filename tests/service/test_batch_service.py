@@ -0,0 +1,86 @@
+import pytest
+from typing import Any
+from app.model.analysis import Analysis
+from app.model.situation import Situation
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.batch_service import run_machine_batch
+from app.service.callable_service import register_callable
+from app.service.machine_service import analyse_text, create_machine
+from app.service.result_cache_service import cache_results
+
+
+@register_callable("test-batch-service-count")
+def _count_transform(situation: Situation, transition: Transition) -> Any:
+    return (situation.state.data or 0) + 1
+
+
+def test_run_machine_batch():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a+", state1_name="start", state2_name="a-state", transform=_count_transform),
+        Transition(name="b-transition", pattern="b", state1_name="a-state", state2_name="a-state", transform=_count_transform),
+        Transition(name="end-transition", pattern="", state1_name="a-state", state2_name="end", transform=_count_transform),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False, data=0),
+        "a-state": State(name="a-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    inputs = ["a", "ab", "abb", "b", "aab"] * 20
+
+    # ACT.
+    ordered = list(run_machine_batch(machine, iter(inputs), workers=2, chunksize=7))
+    unordered = dict(run_machine_batch(machine, iter(inputs), workers=2, chunksize=7, ordered=False))
+
+    # ASSERT.
+    expected = [analyse_text(machine, text) for text in inputs]
+    assert ordered == expected
+    assert [unordered[index] for index in range(len(inputs))] == expected
+    assert expected[2] == [Analysis(
+        states=("start", "a-state", "a-state", "a-state", "end"),
+        transitions=("a-transition", "b-transition", "b-transition", "end-transition"),
+        spans=((0, 1), (1, 2), (2, 3), (3, 3)),
+        data=4,
+    )]
+    assert expected[3] == []
+
+
+def test_run_machine_batch_rejects_unpicklable_transform():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="end", transform=lambda situation, transition: 1),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    # ACT / ASSERT.
+    with pytest.raises(TypeError):
+        list(run_machine_batch(machine, ["a"], workers=2))
+
+
+def test_run_machine_batch_uses_result_cache():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a+", state1_name="start", state2_name="end", transform=_count_transform),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False, data=0),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    cache = cache_results(machine, maxsize=8)
+    inputs = ["a", "aa", "a", "b", "aa"] * 4
+
+    # ACT.
+    in_process = list(run_machine_batch(machine, inputs, workers=1))
+    in_workers = list(run_machine_batch(machine, inputs, workers=2, chunksize=5))
+
+    # ASSERT.
+    expected = [analyse_text(machine, text) for text in inputs]
+    assert in_process == in_workers == expected
+    assert (cache.hits, cache.misses) == (17, 3)
@@ -0,0 +1,59 @@
+from app.model.frontier import Frontier
+from app.model.search_limits import BEAM_WIDTH, MAX_EXPANDED, MAX_FRONTIER, MAX_SECONDS, SearchLimits
+from app.service.bounded_service import run_machine_bounded
+from app.service.machine_service import run_machine
+from tests.helpers import compositions_machine, start_situation, trails
+
+
+def test_run_machine_bounded_within_limits_matches_run_machine():
+    # ARRANGE.
+    machine = compositions_machine()
+    text = "a" * 10
+
+    # ACT.
+    breadth = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(max_frontier=1000, max_expanded=10000))
+    depth = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(depth_first=True))
+    expected = run_machine(machine, start_situation(machine, text))
+
+    # ASSERT.
+    assert (breadth.truncated, breadth.reason, breadth.dropped) == (False, None, 0)
+    assert trails(breadth.situations) == trails(expected)
+    assert not depth.truncated
+    assert sorted(trails(depth.situations)) == sorted(trails(expected))
+
+
+def test_run_machine_bounded_caps_the_frontier():
+    # ARRANGE.
+    machine = compositions_machine()
+    text = "a" * 16
+    beam_frontier = Frontier()
+    capped_frontier = Frontier()
+
+    # ACT.
+    beam = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(beam_width=4), frontier=beam_frontier)
+    capped = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(max_frontier=8), frontier=capped_frontier)
+
+    # ASSERT.
+    assert (beam.truncated, beam.reason) == (True, BEAM_WIDTH)
+    assert beam.dropped > 0 and 0 < len(beam.situations) < 1597
+    assert beam_frontier.expanded <= 4 * (len(text) + 1)
+    assert (capped.truncated, capped.reason) == (True, MAX_FRONTIER)
+    assert capped_frontier.max_size <= 8
+    assert all(situation.offset == len(text) for situation in beam.situations + capped.situations)
+
+
+def test_run_machine_bounded_stops_on_budgets():
+    # ARRANGE.
+    machine = compositions_machine()
+    text = "a" * 16
+    frontier = Frontier()
+
+    # ACT.
+    steps = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(max_expanded=50, depth_first=True), frontier=frontier)
+    clock = run_machine_bounded(machine, start_situation(machine, text), SearchLimits(max_seconds=0.0))
+
+    # ASSERT.
+    assert (steps.truncated, steps.reason, steps.dropped) == (True, MAX_EXPANDED, 0)
+    assert frontier.expanded == 50
+    assert len(steps.situations) > 0  # Depth first reaches end states early.
+    assert (clock.truncated, clock.reason, clock.situations) == (True, MAX_SECONDS, [])
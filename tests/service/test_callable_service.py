@@ -0,0 +1,37 @@
+import pickle
+import pytest
+from app.service.callable_service import callable_reference, register_callable, resolve_callable, resolve_reference
+
+
+def test_registered_callable_pickles_by_name():
+    # ARRANGE.
+    named = register_callable("test-callable-service-double", lambda value: value * 2)
+
+    # ACT.
+    restored = pickle.loads(pickle.dumps(named))
+
+    # ASSERT.
+    assert restored is named
+    assert restored(21) == 42
+    assert resolve_callable("test-callable-service-double") is named
+    with pytest.raises(ValueError):
+        register_callable("test-callable-service-double", lambda value: value)
+    with pytest.raises(LookupError):
+        resolve_callable("test-callable-service-missing")
+
+
+def test_callable_reference_round_trip():
+    # ARRANGE.
+    named = register_callable("test-callable-service-reference", lambda value: value + 1)
+
+    # ACT.
+    named_reference = callable_reference(named)
+    function_reference = callable_reference(resolve_callable)
+
+    # ASSERT.
+    assert named_reference == {"name": "test-callable-service-reference", "module": __name__}
+    assert resolve_reference(named_reference) is named
+    assert function_reference == {"function": "app.service.callable_service:resolve_callable"}
+    assert resolve_reference(function_reference) is resolve_callable
+    with pytest.raises(ValueError):
+        callable_reference(lambda value: value)
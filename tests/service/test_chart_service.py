@@ -0,0 +1,66 @@
+from typing import Any
+from app.model.situation import Situation
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.chart_service import run_machine_chart
+from app.service.machine_service import create_machine, run_machine
+from tests.helpers import start_situation
+
+
+def _ambiguous_machine(count: int, transform=None, pure: bool = False):
+    # Each block has two ways through ("a" then "", or "" then "a"), so there are 2**count trails for "a" * count.
+    transitions = []
+    states = {
+        "start": State(name="start", start=True, end=False, data=""),
+        "end": State(name="end", start=False, end=True),
+    }
+    previous = "start"
+    for i in range(count):
+        middle1, middle2, after = f"m1-{i}", f"m2-{i}", f"s-{i}"
+        for name in [middle1, middle2, after]:
+            states[name] = State(name=name, start=False, end=False)
+        transitions += [
+            Transition(name=f"a1-{i}", pattern="a", state1_name=previous, state2_name=middle1, transform=transform, pure=pure),
+            Transition(name=f"e1-{i}", pattern="", state1_name=middle1, state2_name=after, transform=transform, pure=pure),
+            Transition(name=f"e2-{i}", pattern="", state1_name=previous, state2_name=middle2, transform=transform, pure=pure),
+            Transition(name=f"a2-{i}", pattern="a", state1_name=middle2, state2_name=after, transform=transform, pure=pure),
+        ]
+        previous = after
+    transitions.append(Transition(name="end-transition", pattern="", state1_name=previous, state2_name="end", transform=transform, pure=pure))
+    return create_machine(transitions, states)
+
+
+def test_run_machine_chart_packs_ambiguous_trails():
+    # ARRANGE.
+    machine = _ambiguous_machine(12)
+    first_situation = start_situation(machine, "a" * 12)
+
+    # ACT.
+    forest = run_machine_chart(machine, first_situation)
+
+    # ASSERT.
+    assert forest.count() == 2 ** 12
+    assert len(forest.nodes) < 5 * 12 * 13
+    first = next(forest.situations())
+    assert first.accepted
+    assert first.state.name == "end"
+    assert first.history[0] is first_situation
+    assert len(first.history) == 12 * 2 + 2
+
+
+def test_run_machine_chart_matches_run_machine():
+    # ARRANGE.
+    def _transform(situation: Situation, transition: Transition) -> Any:
+        return situation.state.data + transition.name[0]
+
+    machine = _ambiguous_machine(3, _transform, pure=True)
+    first_situation = start_situation(machine, "aaa")
+
+    # ACT.
+    chart_situations = list(run_machine_chart(machine, first_situation).situations())
+    end_situations = run_machine(machine, first_situation)
+
+    # ASSERT.
+    assert len(chart_situations) == len(end_situations) == 8
+    assert sorted(s.state.data for s in chart_situations) == sorted(s.state.data for s in end_situations)
+    assert sorted([h.state.name for h in s.history] for s in chart_situations) == sorted([h.state.name for h in s.history] for s in end_situations)
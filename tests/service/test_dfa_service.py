@@ -0,0 +1,92 @@
+import random
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.dfa_service import LazyDfa
+from app.service.machine_service import accepts, compile_machine, create_machine, match_spans
+
+
+def _lexicon_machine(patterns):
+    transitions = [
+        Transition(name="foo-transition", pattern="foo", state1_name="start", state2_name="word"),
+        Transition(name="fo-transition", pattern="fo", state1_name="start", state2_name="word"),
+        Transition(name="o-transition", pattern="o", state1_name="word", state2_name="word"),
+        Transition(name="bar-transition", pattern=patterns[0], state1_name="word", state2_name="suffix"),
+        Transition(name="empty-transition", pattern="", state1_name="word", state2_name="suffix"),
+        Transition(name="end-transition", pattern="", state1_name="suffix", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "word": State(name="word", start=False, end=False),
+        "suffix": State(name="suffix", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    return create_machine(transitions, states)
+
+
+def test_lazy_dfa_accepts_literal_machine():
+    # ARRANGE.
+    machine = _lexicon_machine(["bar"])
+    dfa = LazyDfa(compile_machine(machine), max_states=2)
+
+    # ACT / ASSERT.
+    assert compile_machine(machine).literal
+    for text, expected in [("foo", True), ("fo", True), ("fooobar", True), ("foob", False), ("", False), ("bar", False)]:
+        assert dfa.accepts(text) == expected
+        assert accepts(machine, text) == expected
+    assert dfa.end_offsets("xfoobarx", 1) == [3, 4, 7]
+    assert match_spans(machine, "xfoobarx", 1) == [3, 4, 7]
+
+
+def test_accepts_falls_back_for_regex_machine():
+    # ARRANGE.
+    machine = _lexicon_machine(["ba+r"])
+
+    # ACT / ASSERT.
+    assert not compile_machine(machine).literal
+    assert accepts(machine, "fooobaaar")
+    assert not accepts(machine, "fooobr")
+    assert match_spans(machine, "xfoobaarx", 1) == [3, 4, 8]
+
+
+def _reachable(dfa):
+    seen = {id(dfa.start)}
+    stack = [dfa.start]
+    while stack:
+        for next_state in stack.pop().next.values():
+            if next_state is not None and id(next_state) not in seen:
+                seen.add(id(next_state))
+                stack.append(next_state)
+    return len(seen)
+
+
+def test_lazy_dfa_keeps_at_most_max_states():
+    # ARRANGE.
+    # (a|b)*a(a|b){10}: the DFA needs a state per suffix of 11 characters, far more than kept.
+    transitions = [
+        Transition(name="start-transition", pattern="", state1_name="start", state2_name="loop"),
+        Transition(name="loop-a-transition", pattern="a", state1_name="loop", state2_name="loop"),
+        Transition(name="loop-b-transition", pattern="b", state1_name="loop", state2_name="loop"),
+        Transition(name="mark-transition", pattern="a", state1_name="loop", state2_name="count-0"),
+    ]
+    for index in range(10):
+        for character in "ab":
+            transitions.append(Transition(name=f"count-{index}-{character}-transition", pattern=character,
+                                          state1_name=f"count-{index}", state2_name=f"count-{index + 1}"))
+    transitions.append(Transition(name="end-transition", pattern="", state1_name="count-10", state2_name="end"))
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "loop": State(name="loop", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    states.update({f"count-{index}": State(name=f"count-{index}", start=False, end=False) for index in range(11)})
+    machine = create_machine(transitions, states)
+    dfa = LazyDfa(compile_machine(machine), max_states=50)
+    generator = random.Random(0)
+    texts = ["".join(generator.choice("ab") for _ in range(40)) for _ in range(300)]
+
+    # ACT.
+    results = [dfa.accepts(text) for text in texts]
+
+    # ASSERT.
+    assert results == [len(text) > 10 and text[-11] == "a" for text in texts]
+    assert _reachable(dfa) <= 50
@@ -0,0 +1,125 @@
+import pickle
+import pytest
+from app.model.lexicon import Lexicon
+from app.model.situation import Situation
+from app.service.callable_service import register_callable
+from app.service.machine_cache_service import FORMAT, FORMAT_VERSION, cached_create_machine, load_machine, machine_fingerprint
+from app.service.machine_service import analyse_text, run_machine
+
+
+upper = register_callable("test-machine-cache-upper", lambda situation, transition: situation.matched.upper())
+
+
+def _machine_spec():
+    transitions = [
+        {"name": "f-transition", "pattern": "f", "state1_name": "start", "state2_name": "f-state"},
+        {"name": "o-transition", "pattern": "o+", "state1_name": "f-state", "state2_name": "o-state", "transform": upper, "pure": True},
+        {"name": "end-transition", "pattern": "", "state1_name": "o-state", "state2_name": "end"},
+    ]
+    states = {
+        name: {"name": name, "start": name == "start", "end": name == "end", "data": None, "process": None, "event": None}
+        for name in ("start", "f-state", "o-state", "end")
+    }
+    return transitions, states
+
+
+def _results(machine, text):
+    return [[(s.state.name, s.matched, s.state.data) for s in end.history] for end in run_machine(machine, Situation(
+        id="0", input_complete=text, input_remainder=text, matched="", state=machine.states["start"], machine=machine, parent=None))]
+
+
+def test_cached_create_machine_round_trip(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "machine.pickle")
+    transitions, states = _machine_spec()
+
+    # ACT.
+    created = cached_create_machine(transitions, states, path)
+    loaded = cached_create_machine(transitions, states, path)
+
+    # ASSERT.
+    assert loaded is not created
+    assert loaded._compiled is not None  # Loaded compiled, no compile_machine needed.
+    assert _results(loaded, "foo") == _results(created, "foo")
+    assert analyse_text(loaded, "foo") == analyse_text(created, "foo")
+    assert loaded.graph["f-state"]["o-transition"].transform is upper
+    assert [t.regex is None for t in loaded._compiled.states[0].transitions] == [True]  # Literal "f" is never compiled.
+
+
+def test_load_machine_misses_on_changes(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "machine.pickle")
+    transitions, states = _machine_spec()
+    fingerprint = machine_fingerprint(transitions, states)
+    cached_create_machine(transitions, states, path)
+    changed_transitions = transitions[:1] + [{**transitions[1], "pattern": "o*"}] + transitions[2:]
+
+    # ACT.
+    hit = load_machine(path, fingerprint)
+    changed = load_machine(path, machine_fingerprint(changed_transitions, states))
+    with open(path, "rb") as file:
+        pickle.load(file)
+        payload = file.read()
+    with open(path, "wb") as file:
+        pickle.dump((FORMAT, FORMAT_VERSION + 1, fingerprint), file)
+        file.write(payload)
+    stale = load_machine(path)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{"format": "escriba-machine", "version": 3}')
+    json_artifact = load_machine(path)
+
+    # ASSERT.
+    assert hit is not None
+    assert changed is None
+    assert stale is None
+    assert json_artifact is None
+    assert load_machine(str(tmp_path / "missing.pickle")) is None
+
+
+def test_cached_create_machine_saves_lexicons(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "machine.pickle")
+    transitions = [
+        {"name": "word-transition", "lexicon": Lexicon({"do": "verb", "dog": "noun"}), "state1_name": "start", "state2_name": "end"},
+    ]
+    states = {
+        "start": {"name": "start", "start": True, "end": False, "data": None, "process": None, "event": None},
+        "end": {"name": "end", "start": False, "end": True, "data": None, "process": None, "event": None},
+    }
+
+    # ACT.
+    created = cached_create_machine(transitions, states, path)
+    loaded = cached_create_machine(transitions, states, path)
+
+    # ASSERT.
+    assert loaded is not created
+    assert analyse_text(loaded, "dog") == analyse_text(created, "dog")
+    assert analyse_text(loaded, "dog")[0].data == "noun"
+    assert loaded.graph["start"]["word-transition"].lexicon.__getstate__() == created.graph["start"]["word-transition"].lexicon.__getstate__()
+
+
+def test_cached_create_machine_keeps_data_types(tmp_path):
+    # ARRANGE.
+    path = str(tmp_path / "machine.pickle")
+    transitions, states = _machine_spec()
+    states["f-state"]["data"] = ("f", 1, {2: frozenset({"x"})})
+    listed_states = {**states, "f-state": {**states["f-state"], "data": ["f", 1, {2: frozenset({"x"})}]}}
+
+    # ACT.
+    cached_create_machine(transitions, states, path)
+    loaded = cached_create_machine(transitions, states, path)
+
+    # ASSERT.
+    assert loaded.states["f-state"].data == ("f", 1, {2: frozenset({"x"})})
+    assert machine_fingerprint(transitions, listed_states) != machine_fingerprint(transitions, states)
+    assert load_machine(path, machine_fingerprint(transitions, listed_states)) is None
+
+
+def test_machine_fingerprint_rejects_data_without_canonical_form():
+    # ARRANGE.
+    transitions, states = _machine_spec()
+    states["f-state"]["data"] = object()
+
+    # ACT / ASSERT.
+    with pytest.raises(ValueError, match="Cannot fingerprint a value of type 'object'"):
+        machine_fingerprint(transitions, states)
@@ -1,10 +1,14 @@
+import pytest
 from copy import deepcopy
 from typing import Any
 from uuid import uuid4
+from app.model.frontier import Frontier
+from app.model.lexicon import Lexicon
+from app.model.search_stats import SearchStats
 from app.model.situation import Situation
 from app.model.state import State
 from app.model.transition import Transition
-from app.service.machine_service import create_machine, next_situations, run_machine
+from app.service.machine_service import analyse_text, cache_transforms, compile_machine, create_machine, iter_run_machine, next_situations, run_machine
 
 
 def test_create_machine_valid():
@@ -527,3 +531,427 @@ def test_run_machine():
 
     assert final_situation.state.data == "CVVCVC"
 
+
+
+def test_next_situations_shares_compiled_machine():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state"),
+        Transition(name="end-transition", pattern="", state1_name="a-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False, data=""),
+        "a-state": State(name="a-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    initial_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "a",
+        "input_remainder": "a",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT.
+    situations = next_situations(initial_situation)
+
+    # ASSERT.
+    assert len(situations) == 1
+    assert situations[0].machine is machine
+    assert situations[0].state is states["a-state"]
+    assert compile_machine(machine) is compile_machine(situations[0].machine)
+    assert compile_machine(machine).states[compile_machine(machine).start].name == "start"
+
+
+def test_situation_history_follows_parent_chain():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state"),
+        Transition(name="b-transition", pattern="b", state1_name="a-state", state2_name="b-state"),
+        Transition(name="end-transition", pattern="", state1_name="b-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "b-state": State(name="b-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "ab",
+        "input_remainder": "ab",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT.
+    a_situation = next_situations(start_situation)[0]
+    b_situation = next_situations(a_situation)[0]
+    end_situations = run_machine(machine, start_situation)
+
+    # ASSERT.
+    assert b_situation.parent is a_situation
+    assert a_situation.parent is start_situation
+    assert [s.state.name for s in b_situation.history] == ["start", "a-state"]
+    assert [s.state.name for s in b_situation.trail()] == ["start", "a-state", "b-state"]
+    assert len(end_situations) == 1
+    assert [s.state.name for s in end_situations[0].history] == ["start", "a-state", "b-state", "end"]
+
+
+def test_run_machine_trails_share_converted_prefix():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state"),
+        Transition(name="b1-transition", pattern="b", state1_name="a-state", state2_name="end"),
+        Transition(name="b2-transition", pattern="b", state1_name="a-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "ab",
+        "input_remainder": "ab",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT.
+    end_situations = run_machine(machine, start_situation)
+
+    # ASSERT.
+    assert len(end_situations) == 2
+    assert isinstance(end_situations[0], Situation)
+    assert end_situations[0].id != end_situations[1].id
+    assert end_situations[0].parent is end_situations[1].parent
+    assert end_situations[0].history[0] is start_situation
+
+
+def test_run_machine_dispatches_wide_fan_out():
+    # ARRANGE.
+    words = [f"w{i}" for i in range(30)] + ["w1x", "w"]
+    transitions = [
+        Transition(name=f"{word}-transition", pattern=word, state1_name="start", state2_name="word")
+        for word in words
+    ]
+    transitions += [
+        Transition(name="regex-transition", pattern="w[0-9]+", state1_name="start", state2_name="word"),
+        Transition(name="any-transition", pattern=".*", state1_name="start", state2_name="word"),
+        Transition(name="end-transition", pattern="", state1_name="word", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "word": State(name="word", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    start_state = compile_machine(machine).states[compile_machine(machine).start]
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "w1",
+        "input_remainder": "w1",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT.
+    situations = next_situations(start_situation)
+
+    # ASSERT.
+    assert len(start_state.literals) == len(words)
+    assert [t.name for t in start_state.dispatch["w"]] == ["regex-transition"]
+    assert [t.name for t in start_state.always] == ["any-transition"]
+    # The "w" literal matches too, but leaves input that no trail from "word" can consume.
+    assert [s.history[-1].matched + "|" + s.matched for s in situations] == ["|w1", "|w1", "|w1"]
+    assert len(run_machine(machine, start_situation)) == 3
+
+
+def test_iter_run_machine_stops_early():
+    # ARRANGE.
+    transitions = [
+        Transition(name=f"a{i}-transition", pattern="a", state1_name="start", state2_name="end")
+        for i in range(5)
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "a",
+        "input_remainder": "a",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT / ASSERT.
+    assert len(list(iter_run_machine(machine, start_situation))) == 5
+    assert len(list(iter_run_machine(machine, start_situation, limit=2))) == 2
+    assert len(list(iter_run_machine(machine, start_situation, stop=lambda situation: True))) == 1
+    assert list(iter_run_machine(machine, start_situation, max_steps=0)) == []
+    first = next(iter_run_machine(machine, start_situation))
+    assert first.accepted
+    assert first.history[0] is start_situation
+
+
+def test_run_machine_matches_at_offsets():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a+", state1_name="start", state2_name="a-state"),
+        Transition(name="b-transition", pattern="^b", state1_name="a-state", state2_name="b-state"),
+        Transition(name="c-transition", pattern=r"\bc", state1_name="b-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "b-state": State(name="b-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "xaabc",
+        "input_remainder": "aabc",
+        "matched": "x",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+
+    # ACT.
+    end_situations = run_machine(machine, start_situation)
+
+    # ASSERT.
+    assert start_situation.offset == 1
+    assert len(end_situations) == 1
+    assert [(s.matched, s.offset, s.input_remainder) for s in end_situations[0].history] == [
+        ("x", 1, "aabc"), ("aa", 3, "bc"), ("b", 4, "c"), ("c", 5, "")
+    ]
+
+
+def test_create_machine_rejects_empty_pattern_cycle():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="x-state"),
+        Transition(name="xy-transition", pattern="", state1_name="x-state", state2_name="y-state"),
+        Transition(name="yx-transition", pattern="", state1_name="y-state", state2_name="x-state"),
+        Transition(name="end-transition", pattern="b", state1_name="y-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "x-state": State(name="x-state", start=False, end=False),
+        "y-state": State(name="y-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+
+    # ACT / ASSERT.
+    with pytest.raises(Exception):
+        create_machine(transitions, states)
+
+    machine = create_machine(transitions[:2] + transitions[3:], states)
+    compiled = compile_machine(machine)
+    assert compiled.states[compiled.state_index["x-state"]].closure == {compiled.state_index["x-state"], compiled.state_index["y-state"]}
+    assert [t.name for t in compiled.states[compiled.state_index["x-state"]].epsilon] == ["xy-transition"]
+
+
+def test_create_machine_rejects_cycle_of_patterns_matching_empty():
+    # ARRANGE.
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "x-state": State(name="x-state", start=False, end=False),
+        "y-state": State(name="y-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+
+    for patterns in (("b*", "b*"), ("b?", ""), ("(a|)", "b*")):
+        transitions = [
+            Transition(name="a-transition", pattern="a", state1_name="start", state2_name="x-state"),
+            Transition(name="xy-transition", pattern=patterns[0], state1_name="x-state", state2_name="y-state"),
+            Transition(name="yx-transition", pattern=patterns[1], state1_name="y-state", state2_name="x-state"),
+            Transition(name="end-transition", pattern="c", state1_name="y-state", state2_name="end"),
+        ]
+
+        # ACT / ASSERT.
+        with pytest.raises(Exception, match="cycle of transitions whose patterns can match the empty string"):
+            create_machine(transitions, states)
+
+    # A cycle that consumes input is valid.
+    transitions[2] = Transition(name="yx-transition", pattern="b+", state1_name="y-state", state2_name="x-state")
+    machine = create_machine(transitions, states)
+    assert len(run_machine(machine, Situation(id=str(uuid4()), input_complete="abbc", offset=0, matched="", state=states["start"],
+                                              machine=machine, parent=None))) > 0
+
+
+def test_run_machine_prunes_hopeless_situations():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state"),
+        Transition(name="dead-transition", pattern="a", state1_name="start", state2_name="dead-state"),
+        Transition(name="long-transition", pattern="a", state1_name="start", state2_name="long-state"),
+        Transition(name="bcd-transition", pattern="bcd", state1_name="long-state", state2_name="end"),
+        Transition(name="b-transition", pattern="b+", state1_name="a-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "dead-state": State(name="dead-state", start=False, end=False),
+        "long-state": State(name="long-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    compiled = compile_machine(machine)
+
+    start_situation = Situation(**{
+        "id": str(uuid4()),
+        "input_complete": "ab",
+        "input_remainder": "ab",
+        "matched": "",
+        "state": states["start"],
+        "machine": machine,
+        "history": [],
+    })
+    frontier = Frontier()
+
+    # ACT.
+    end_situations = run_machine(machine, start_situation, frontier=frontier)
+
+    # ASSERT.
+    assert not compiled.states[compiled.state_index["dead-state"]].live
+    assert compiled.states[compiled.state_index["start"]].min_remaining == 2
+    assert compiled.states[compiled.state_index["start"]].max_remaining is None
+    assert compiled.states[compiled.state_index["long-state"]].max_remaining == 3
+    assert len(end_situations) == 1
+    assert frontier.pruned == 2
+    assert frontier.expanded == 2
+
+
+def test_run_machine_collects_stats():
+    # ARRANGE.
+    events = []
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state", transform=lambda situation, transition: 1),
+        Transition(name="dead-transition", pattern="a", state1_name="start", state2_name="dead-state"),
+        Transition(name="b-transition", pattern="b+", state1_name="a-state", state2_name="end",
+                   event=[lambda record, stats: events.append(("transition", record.matched, stats.created))]),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False),
+        "dead-state": State(name="dead-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True, event=[lambda record, stats: events.append(("state", record.state.name, stats.created))]),
+    }
+    machine = create_machine(transitions, states)
+    start_situation = Situation(id=str(uuid4()), input_complete="abb", offset=0, matched="", state=states["start"], machine=machine, parent=None)
+    finished = []
+    stats = SearchStats(hook=finished.append)
+
+    # ACT.
+    end_situations = run_machine(machine, start_situation, stats=stats)
+
+    # ASSERT.
+    assert len(end_situations) == 1
+    assert finished == [stats]
+    exported = stats.to_dict()
+    assert exported["created"] == 2
+    assert exported["pruned"] == 1
+    assert exported["expanded"] == 2
+    assert exported["attempts"] == {"a-transition": 1, "dead-transition": 1, "b-transition": 1}
+    assert exported["hits"] == {"a-transition": 1, "dead-transition": 1, "b-transition": 1}
+    assert exported["trail_lengths"] == {"3": 1}
+    assert exported["match_seconds"] > 0 and exported["transform_seconds"] > 0
+    assert events == [("transition", "bb", 2), ("state", "end", 2)]
+
+
+def test_run_machine_matches_lexicon():
+    # ARRANGE.
+    lexicon = Lexicon({"do": "verb", "dog": "noun", "dogs": "noun-plural", "cat": "noun"})
+    transitions = [
+        Transition(name="word-transition", lexicon=lexicon, state1_name="start", state2_name="word-state"),
+        Transition(name="tagged-transition", lexicon=lexicon, state1_name="word-state", state2_name="end",
+                   transform=lambda situation, transition, payload: (situation.state.data, payload)),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "word-state": State(name="word-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    # ACT.
+    analyses = analyse_text(machine, "dogcat")
+    ambiguous = analyse_text(machine, "dogsdo")
+
+    # ASSERT.
+    assert transitions[0].pattern == "<lexicon>"
+    assert compile_machine(machine).states[0].dispatch["d"][0].lexicon is lexicon
+    assert [(analysis.spans, analysis.data) for analysis in analyses] == [(((0, 3), (3, 6)), ("noun", "noun"))]
+    assert [(analysis.spans, analysis.data) for analysis in ambiguous] == [(((0, 4), (4, 6)), ("noun-plural", "verb"))]
+    assert analyse_text(machine, "dogdog") != [] and analyse_text(machine, "dogx") == []
+
+
+def test_run_machine_caches_pure_transforms():
+    # ARRANGE.
+    calls = []
+
+    def count_pieces(situation, transition):
+        calls.append(transition.name)
+        return (situation.data or 0) + 1
+
+    def machine_of(pure):
+        # Splits a's into pieces of one or two, counting the pieces.
+        transitions = [
+            Transition(name="one-transition", pattern="a", state1_name="start", state2_name="joint", transform=count_pieces, pure=pure),
+            Transition(name="two-transition", pattern="aa", state1_name="start", state2_name="joint", transform=count_pieces, pure=pure),
+            Transition(name="next-one-transition", pattern="a", state1_name="joint", state2_name="joint", transform=count_pieces, pure=pure),
+            Transition(name="next-two-transition", pattern="aa", state1_name="joint", state2_name="joint", transform=count_pieces, pure=pure),
+            Transition(name="end-transition", pattern="", state1_name="joint", state2_name="end"),
+        ]
+        states = {
+            "start": State(name="start", start=True, end=False),
+            "joint": State(name="joint", start=False, end=False),
+            "end": State(name="end", start=False, end=True),
+        }
+        return create_machine(transitions, states)
+
+    plain = machine_of(pure=False)
+    cached = machine_of(pure=True)
+    cache = cache_transforms(cached, maxsize=64)
+
+    # ACT.
+    expected = analyse_text(plain, "a" * 10)
+    plain_calls = len(calls)
+    calls.clear()
+    first = analyse_text(cached, "a" * 10)
+    first_calls = len(calls)
+    second = analyse_text(cached, "a" * 10)
+
+    # ASSERT.
+    assert first == second == expected
+    assert len(expected) == 89
+    assert first_calls < plain_calls / 4
+    assert len(calls) == first_calls  # The second search ran no transform.
+    assert cache.misses == first_calls and cache.hits > 0 and 0 < cache.hit_rate < 1
+    assert cache_transforms(cached) is cache
+
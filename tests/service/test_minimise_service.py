@@ -0,0 +1,117 @@
+import pytest
+from uuid import uuid4
+from app.model.situation import Situation
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import analyse_text, create_machine
+from app.service.minimise_service import minimise_machine
+from app.service.weighted_service import run_machine_k_best
+
+
+def test_minimise_machine_merges_equivalent_suffixes():
+    # ARRANGE.
+    # One chain per word, each ending in its own (equivalent) "-ing" states.
+    transitions = []
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+        "dead": State(name="dead", start=False, end=False),
+    }
+    for word in ("walk", "talk", "sing"):
+        names = [f"{word}-{index}" for index in range(4)]
+        states.update({name: State(name=name, start=False, end=False) for name in names})
+        transitions += [
+            Transition(name=f"{word}-stem", pattern=word, state1_name="start", state2_name=names[0]),
+            Transition(name=f"{word}-i", pattern="i", state1_name=names[0], state2_name=names[1]),
+            Transition(name=f"{word}-n", pattern="n", state1_name=names[1], state2_name=names[2]),
+            Transition(name=f"{word}-g", pattern="g", state1_name=names[2], state2_name=names[3]),
+            Transition(name=f"{word}-end", pattern="", state1_name=names[3], state2_name="end"),
+        ]
+    transitions.append(Transition(name="dead-transition", pattern="x", state1_name="start", state2_name="dead"))
+    machine = create_machine(transitions, states)
+
+    # ACT.
+    minimised, mapping = minimise_machine(machine)
+
+    # ASSERT.
+    assert len(minimised.graph) == 6  # start, the four "-ing" states, end.
+    assert mapping["talk-2"] == mapping["sing-2"] == "walk-2"
+    assert mapping["start"] == "start" and mapping["end"] == "end"
+    assert "dead" not in mapping
+    for text in ("walking", "talking", "singing", "walk", "xing"):
+        expected = [(analysis.spans, analysis.data) for analysis in analyse_text(machine, text)]
+        actual = [(analysis.spans, analysis.data) for analysis in analyse_text(minimised, text)]
+        assert actual == expected
+    assert [tuple(mapping[name] for name in analysis.states) for analysis in analyse_text(machine, "singing")] == \
+        [analysis.states for analysis in analyse_text(minimised, "singing")]
+
+
+def test_minimise_machine_keeps_distinct_data():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="a-state"),
+        Transition(name="b-transition", pattern="b", state1_name="start", state2_name="b-state"),
+        Transition(name="a-end-transition", pattern="", state1_name="a-state", state2_name="end"),
+        Transition(name="b-end-transition", pattern="", state1_name="b-state", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "a-state": State(name="a-state", start=False, end=False, data="A"),
+        "b-state": State(name="b-state", start=False, end=False, data="B"),
+        "end": State(name="end", start=False, end=True),
+    }
+
+    # ACT.
+    minimised, mapping = minimise_machine(create_machine(transitions, states))
+
+    # ASSERT.
+    assert mapping == {"start": "start", "a-state": "a-state", "b-state": "b-state", "end": "end"}
+    assert len(minimised.graph) == 4
+
+
+def test_minimise_machine_keeps_costs_apart():
+    # ARRANGE.
+    # x-state and y-state differ only by the cost of their transition to the end.
+    transitions = [
+        Transition(name="bx-transition", pattern="b", state1_name="start", state2_name="x-state", cost=1.0),
+        Transition(name="by-transition", pattern="b", state1_name="start", state2_name="y-state", cost=1.0),
+        Transition(name="xc-transition", pattern="c", state1_name="x-state", state2_name="end"),
+        Transition(name="yc-transition", pattern="c", state1_name="y-state", state2_name="end", cost=50.0),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "x-state": State(name="x-state", start=False, end=False),
+        "y-state": State(name="y-state", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    def costs(machine):
+        start_situation = Situation(id=str(uuid4()), input_complete="bc", offset=0, matched="", state=machine.states["start"],
+                                    machine=machine, parent=None)
+        return [situation.cost for situation in run_machine_k_best(machine, start_situation, k=2)]
+
+    # ACT.
+    minimised, mapping = minimise_machine(machine)
+
+    # ASSERT.
+    assert mapping["x-state"] != mapping["y-state"]
+    assert costs(minimised) == costs(machine) == [1.0, 51.0]
+
+
+def test_minimise_machine_rejects_machine_accepting_nothing():
+    # ARRANGE.
+    transitions = [
+        Transition(name="a-transition", pattern="a", state1_name="start", state2_name="dead"),
+        Transition(name="b-transition", pattern="b", state1_name="dead", state2_name="dead"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "dead": State(name="dead", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+
+    # ACT / ASSERT.
+    with pytest.raises(ValueError, match="accepts no input"):
+        minimise_machine(machine)
@@ -0,0 +1,34 @@
+from app.model.analysis import Analysis
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import create_machine
+from app.service.result_cache_service import cache_results, cached_analyse_text
+
+
+def test_cached_analyse_text_caches_results():
+    # ARRANGE.
+    calls = []
+    transitions = [
+        Transition(name="word-transition", pattern="[a-z]+", state1_name="start", state2_name="end",
+                   transform=lambda situation, transition: calls.append(transition.name) or "word"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    cache = cache_results(machine, maxsize=2)
+
+    # ACT.
+    first = [cached_analyse_text(machine, text) for text in ("the", "cat", "the", "the", "sat", "cat")]
+    first[0].clear()
+    again = cached_analyse_text(machine, "the")
+    machine._compiled = None  # Compiled again on next use, as after the machine is reloaded.
+    recompiled = cached_analyse_text(machine, "the")
+
+    # ASSERT.
+    assert again == [Analysis(states=("start", "end"), transitions=("word-transition",), spans=((0, 3),), data="word")]
+    assert recompiled == again
+    assert len(calls) == 6  # the, cat, sat, cat (evicted by sat), the (evicted by cat), and the once recompiled.
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 6, 3) and len(cache) == 1
+    assert cache_results(machine) is cache
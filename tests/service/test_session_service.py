@@ -0,0 +1,141 @@
+import random
+import pytest
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import create_machine
+from app.service.session_service import ParserSession
+
+
+def test_parser_session_segments_by_maximal_munch():
+    # ARRANGE.
+    transitions = [
+        Transition(name="ab-transition", pattern="ab", state1_name="start", state2_name="end"),
+        Transition(name="abc-transition", pattern="abc", state1_name="start", state2_name="end"),
+        Transition(name="c-transition", pattern="c", state1_name="start", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    session = ParserSession(create_machine(transitions, states), lookahead=0)
+
+    # ACT.
+    first = session.feed("ab")
+    second = session.feed("cab")
+    third = session.feed("c")
+    last = session.close()
+
+    # ASSERT.
+    assert first == []  # "ab" could still be the start of "abc".
+    assert [(offset, situation.input_complete) for offset, situation in second] == [(0, "abc")]
+    assert [(offset, situation.input_complete) for offset, situation in third] == [(3, "abc")]
+    assert last == []
+    with pytest.raises(ValueError):
+        session.feed("ab")
+
+
+def test_parser_session_waits_for_regex_lookahead():
+    # ARRANGE.
+    transitions = [
+        Transition(name="number-transition", pattern=r"[0-9]+\b", state1_name="start", state2_name="number"),
+        Transition(name="space-transition", pattern=" ", state1_name="number", state2_name="end"),
+        Transition(name="last-transition", pattern="", state1_name="number", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "number": State(name="number", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    session = ParserSession(create_machine(transitions, states), max_match=4)
+
+    # ACT.
+    emitted = []
+    for chunk in ["1", "2 3", "4 567", "8 9", "0"]:
+        emitted.append([(offset, situation.input_complete) for offset, situation in session.feed(chunk)])
+    emitted.append([(offset, situation.input_complete) for offset, situation in session.close()])
+
+    # ASSERT.
+    assert emitted == [[], [], [(0, "12 "), (3, "34 ")], [(6, "5678 ")], [], [(11, "90")]]
+
+
+def test_parser_session_rejects_unaccepted_input():
+    # ARRANGE.
+    transitions = [Transition(name="a-transition", pattern="a", state1_name="start", state2_name="end")]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    session = ParserSession(create_machine(transitions, states))
+
+    # ACT / ASSERT.
+    assert [offset for offset, _ in session.feed("aaa")] == [0, 1]
+    assert [offset for offset, _ in session.feed("b")] == [2]
+    with pytest.raises(ValueError):
+        session.close()
+
+
+def test_parser_session_waits_for_long_regex_match_across_chunks():
+    # ARRANGE.
+    transitions = [
+        Transition(name="number-transition", pattern="[0-9]+", state1_name="start", state2_name="number"),
+        Transition(name="space-transition", pattern=" ", state1_name="number", state2_name="end"),
+        Transition(name="last-transition", pattern="", state1_name="number", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "number": State(name="number", start=False, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    session = ParserSession(machine, max_match=4096)
+    capped_session = ParserSession(machine)
+
+    # ACT.
+    emitted = [session.feed("1" * 1500), session.feed("2" * 1500), session.feed(" 3"), session.close()]
+
+    # ASSERT.
+    assert emitted[:3] == [[], [], []]  # Less than max_match is buffered, so the number may go on.
+    assert [(offset, situation.input_complete) for offset, situation in emitted[3]] == [(0, "1" * 1500 + "2" * 1500 + " "), (3001, "3")]
+    with pytest.raises(ValueError, match="max_match"):
+        capped_session.feed("1" * 1500)  # Longer than the default max_match (1024): not cut short.
+
+
+def _segments(machine, chunks):
+    session = ParserSession(machine, max_match=6)
+    segments = []
+    try:
+        for chunk in chunks:
+            segments.extend((offset, situation.input_complete) for offset, situation in session.feed(chunk))
+        segments.extend((offset, situation.input_complete) for offset, situation in session.close())
+    except ValueError:
+        return None  # Segments emitted before the error depend on the chunks, the error does not.
+    return segments
+
+
+def test_parser_session_segments_do_not_depend_on_chunks():
+    # ARRANGE.
+    transitions = [
+        Transition(name="ab-transition", pattern="(ab)+", state1_name="start", state2_name="end"),
+        Transition(name="ba-transition", pattern="b*a", state1_name="start", state2_name="end"),
+        Transition(name="a-transition", pattern=r"a\b", state1_name="start", state2_name="end"),
+        Transition(name="space-transition", pattern=" ", state1_name="start", state2_name="end"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "end": State(name="end", start=False, end=True),
+    }
+    machine = create_machine(transitions, states)
+    generator = random.Random(0)
+    texts = ["abab", "ababa ba", "bba ab a"] + ["".join(generator.choice("ab ") for _ in range(12)) for _ in range(30)]
+
+    for text in texts:
+        # ACT.
+        whole = _segments(machine, [text])
+        by_character = _segments(machine, list(text))
+        cuts = [sorted(generator.sample(range(1, len(text)), 3)) for _ in range(5)]
+        splits = [_segments(machine, [text[begin:end] for begin, end in zip([0] + cut, cut + [len(text)])]) for cut in cuts]
+
+        # ASSERT.
+        assert by_character == whole, text
+        assert whole is not None or text not in texts[:3]
+        assert all(split == whole for split in splits), text
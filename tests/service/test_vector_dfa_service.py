@@ -0,0 +1,63 @@
+import pytest
+from app.model.state import State
+from app.model.transition import Transition
+from app.service.machine_service import accepts, compile_machine, create_machine
+
+np = pytest.importorskip("numpy")
+from app.service.vector_dfa_service import VectorDfa, encode_batch  # noqa: E402
+
+
+def _word_machine():
+    transitions = [
+        Transition(name="foo-transition", pattern="foo", state1_name="start", state2_name="word"),
+        Transition(name="fo-transition", pattern="fo", state1_name="start", state2_name="word"),
+        Transition(name="o-transition", pattern="o", state1_name="word", state2_name="word"),
+        Transition(name="bar-transition", pattern="bär", state1_name="word", state2_name="suffix"),
+        Transition(name="empty-transition", pattern="", state1_name="word", state2_name="plain"),
+        Transition(name="suffix-transition", pattern="", state1_name="suffix", state2_name="suffixed"),
+    ]
+    states = {
+        "start": State(name="start", start=True, end=False),
+        "word": State(name="word", start=False, end=False),
+        "suffix": State(name="suffix", start=False, end=False),
+        "plain": State(name="plain", start=False, end=True),
+        "suffixed": State(name="suffixed", start=False, end=True),
+    }
+    return create_machine(transitions, states)
+
+
+def test_encode_batch_pads_code_points():
+    # ACT.
+    codes, lengths = encode_batch(["ab", "", "ä"])
+
+    # ASSERT.
+    assert codes.tolist() == [[97, 98], [-1, -1], [228, -1]]
+    assert lengths.tolist() == [2, 0, 1]
+
+
+def test_vector_dfa_matches_accepts():
+    # ARRANGE.
+    machine = _word_machine()
+    dfa = VectorDfa(compile_machine(machine))
+    texts = ["fo", "foo", "fooo", "foobär", "fobär", "bär", "", "f", "foox", "foobärbär", "fooobä", "xfoo"] * 3
+
+    # ACT.
+    result = dfa.run(texts, batch_size=5)
+
+    # ASSERT.
+    assert result.accepted.tolist() == [accepts(machine, text) for text in texts]
+    assert dfa.end_states(int(result.states[0])) == {"plain"}
+    assert dfa.end_states(int(result.states[3])) == {"suffixed"}
+    assert result.states[8] == 0 and dfa.end_states(0) == frozenset()
+
+
+def test_vector_dfa_rejects_regex_machines_and_large_dfas():
+    # ARRANGE.
+    regex_machine = create_machine([Transition(name="a-transition", pattern="a+", state1_name="start", state2_name="end")],
+                                   {"start": State(name="start", start=True, end=False), "end": State(name="end", start=False, end=True)})
+
+    # ACT / ASSERT.
+    with pytest.raises(ValueError):
+        VectorDfa(compile_machine(regex_machine))
+    with pytest.raises(ValueError):
+        VectorDfa(compile_machine(_word_machine()), max_states=2)
@@ -0,0 +1,32 @@
+import pytest
+from app.model.frontier import Frontier
+from app.service.machine_service import run_machine
+from app.service.weighted_service import run_machine_k_best
+from tests.helpers import compositions_machine, start_situation
+
+
+def test_run_machine_k_best_returns_cheapest_trails_in_order():
+    # ARRANGE.
+    machine = compositions_machine(one_cost=1.0, two_cost=1.5, joint_cost=0.25)
+    text = "a" * 12
+    frontier = Frontier()
+
+    # ACT.
+    best = run_machine_k_best(machine, start_situation(machine, text), k=3, frontier=frontier)
+    every = run_machine(machine, start_situation(machine, text))
+
+    # ASSERT.
+    expected = sorted(situation.cost for situation in every)[:3]
+    assert [situation.cost for situation in best] == expected == [10.5, 11.25, 11.25]
+    assert [situation.matched for situation in best[0].history if situation.matched] == ["aa"] * 6
+    assert len(every) == 233
+    assert frontier.expanded < 233
+
+
+def test_run_machine_k_best_rejects_negative_costs():
+    # ARRANGE.
+    machine = compositions_machine(one_cost=1.0, two_cost=-1.0)
+
+    # ACT / ASSERT.
+    with pytest.raises(ValueError):
+        run_machine_k_best(machine, start_situation(machine, "aa"))